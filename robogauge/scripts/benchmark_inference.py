@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : benchmark_inference.py
+@Time    : 2026/10/17 20:48:05
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Parity and latency report of the policy inference backends for one model
+'''
+import torch
+import numpy as np
+from argparse import ArgumentParser
+
+from robogauge.utils.logger import logger
+from robogauge.utils.helpers import parse_path
+from robogauge.tasks.robots.inference import (
+    INFERENCE_BACKENDS, TorchScriptBackend, make_backend, check_parity, measure_latency
+)
+
+def parse_benchmark_args():
+    parser = ArgumentParser()
+    parser.add_argument("--model-path", type=str, required=True, help="TorchScript policy path.")
+    parser.add_argument("--num-obs", type=int, default=45, help="Observation size of the policy.")
+    parser.add_argument("--hidden-state-names", type=str, nargs="*", default=["history"], help="Model attributes holding the hidden state.")
+    parser.add_argument("--backends", type=str, nargs="+", default=INFERENCE_BACKENDS, choices=INFERENCE_BACKENDS)
+    parser.add_argument("--threads", type=int, default=1, help="Intra-op threads, 0 keeps the library default.")
+    parser.add_argument("--num-iters", type=int, default=1000, help="Timed forwards per backend.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_benchmark_args()
+    logger.create("benchmark_inference", "inference")
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    model = torch.jit.load(parse_path(args.model_path)).eval()
+    hidden_state_names = [name for name in args.hidden_state_names if hasattr(model, name)]
+    reference = TorchScriptBackend(model)
+    obs = np.random.default_rng(0).standard_normal((8, args.num_obs)).astype(np.float32)
+    report = f"\n{'Backend':^14}{'Max diff':^12}{'Mean [us]':^12}{'P50 [us]':^12}{'P99 [us]':^12}\n"
+    for name in args.backends:
+        try:
+            backend = make_backend(name, model, args.num_obs, hidden_state_names, args.threads)
+            max_diff = check_parity(reference, backend, obs, model, getattr(backend, 'module', model), hidden_state_names)
+            latency = measure_latency(backend, obs[0], num_iters=args.num_iters)
+            report += f"{name:^14}{max_diff:^12.2e}{latency['mean_us']:^12.1f}{latency['p50_us']:^12.1f}{latency['p99_us']:^12.1f}\n"
+        except Exception as e:
+            report += f"{name:^14}unavailable: {e}\n"
+    logger.info(report)
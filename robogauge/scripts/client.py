@@ -2,7 +2,7 @@ import requests
 import time
 import json
 import sys
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
 from robogauge.scripts.server import ResponseStatus
 
 class RoboGaugeClient:
@@ -18,7 +18,10 @@ class RoboGaugeClient:
         task_name: str, 
         experiment_name: str, 
         wait_for_server: bool = True,
-        retry_interval: int = 2
+        retry_interval: int = 2,
+        priority: int = 0,
+        coalesce: str = 'none',
+        coalesce_k: int = 1,
     ) -> Optional[str]:
         """ Submit stress pipeline evaluation
         Args:
@@ -28,6 +31,10 @@ class RoboGaugeClient:
             experiment_name (str): Experiment name for logging.
             wait_for_server (bool): If True, will keep retrying until the server is available.
             retry_interval (int): Seconds to wait before retrying connection.
+            priority (int): Pending jobs with higher priority start first.
+            coalesce (str): Pending jobs of the experiment when evaluation falls behind, 'none' keeps all,
+                'latest' keeps the newest step only, 'every_k' keeps every `coalesce_k`-th step from the newest.
+            coalesce_k (int): Step stride of 'every_k'.
         Returns:
             Optional[str]: Task ID if submission is successful, else None.
         """
@@ -35,7 +42,10 @@ class RoboGaugeClient:
             "model_path": model_path,
             "step": step,
             "task_name": task_name,
-            "experiment_name": experiment_name
+            "experiment_name": experiment_name,
+            "priority": priority,
+            "coalesce": coalesce,
+            "coalesce_k": coalesce_k,
         }
 
         print(f"[RoboGaugeClient]📤 Preparing to submit task: {task_name}")
@@ -66,6 +76,25 @@ class RoboGaugeClient:
                 print(f"[RoboGaugeClient]❌ Unknown error: {e}")
                 return None
 
+    def wait_result(self, task_id: str, timeout: float = 60.0) -> Dict[str, Any]:
+        """ Long-poll the result of a task, returns the response after the final status or `timeout` seconds. """
+        response = requests.get(f"{self.base_url}/get_result/{task_id}", params={"wait": timeout}, timeout=timeout + 10)
+        return response.json()
+
+    def stream_task(self, task_id: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """ Yield the server-sent events (event, data) of a task: 'progress' with the job progress
+        (done/total subtasks, ETA, levels and partial scores), then the final 'result'.
+        """
+        with requests.get(f"{self.base_url}/stream/{task_id}", stream=True, timeout=(10, None)) as response:
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    yield event, json.loads(line[len("data: "):])
+                    if event == "result":
+                        return
+
     def monitor_tasks(self):
         print("[RoboGaugeClient]⏱️ Monitoring submitted tasks...")
         """ Monitor all submitted tasks until completion. """
@@ -85,6 +114,8 @@ class RoboGaugeClient:
                 print(f"[RoboGaugeClient]🎉 Task {self.task_id2info[task_id]} finished successfully!")
             elif status == ResponseStatus.ERROR:
                 print(f"[RoboGaugeClient]❌ Task {self.task_id2info[task_id]} encountered an error: {resp_data.get('error_msg')}")
+            elif status == ResponseStatus.SUPERSEDED:
+                print(f"[RoboGaugeClient]⏭️ Task {self.task_id2info[task_id]} skipped, superseded by step {resp_data.get('superseded_by')}.")
             elif status == ResponseStatus.NOT_FOUND:
                 print(f"[RoboGaugeClient]❓ Task {self.task_id2info[task_id]} not found on server.")
             self.processing_ids.remove(task_id)
@@ -112,11 +143,13 @@ if __name__ == "__main__":
         wait_for_server=True
     )
 
-    while True:
-        client.monitor_tasks()
-        for task_id, resp in client.response_data.items():
-            scores = resp['results']['scores']
+    for event, data in client.stream_task(task_id):
+        if event == "progress" and "progress" in data:
+            progress = data["progress"]
+            eta = f", ETA {progress['eta']:.0f}s" if progress.get('eta') is not None else ""
+            print(f"[RoboGaugeClient]⏳ {progress['done']}/{progress['total']} subtasks done{eta}")
+        elif event == "result" and data["status"] == ResponseStatus.FINISHED:
             print("[RoboGaugeClient]📊 Scores:")
-            print(json.dumps(scores, indent=2, ensure_ascii=False))
-        client.response_data.clear()
-        time.sleep(5)
+            print(json.dumps(data['results']['scores'], indent=2, ensure_ascii=False))
+        elif event == "result":
+            print(f"[RoboGaugeClient]❌ Task {task_id} ended with status {data['status']}: {data.get('error_msg')}")
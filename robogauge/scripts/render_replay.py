@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : render_replay.py
+@Time    : 2026/10/17 17:41:52
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Render videos from trajectories recorded with `render.record_trajectory`
+'''
+import os
+
+# Headless rendering, replays never open a window
+# For GPU
+os.environ.setdefault('MUJOCO_GL', 'egl')
+# For CPU (Slow)
+# os.environ['MUJOCO_GL'] = 'osmesa'
+
+from pathlib import Path
+from argparse import ArgumentParser
+
+from robogauge.utils.logger import logger
+from robogauge.tasks.simulator import render_replay
+
+def parse_replay_args():
+    parser = ArgumentParser()
+    parser.add_argument("paths", type=str, nargs="+", help="Trajectory .npz files or directories (searched recursively).")
+    parser.add_argument("--output-dir", type=str, help="Directory of the rendered videos, defaults to next to each trajectory.")
+    parser.add_argument("--width", type=int, help="Video width, defaults to MujocoConfig.render.width.")
+    parser.add_argument("--height", type=int, help="Video height, defaults to MujocoConfig.render.height.")
+    parser.add_argument("--fps", type=int, help="Video fps, defaults to the recorded fps.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_replay_args()
+    logger.create("render_replay", "replay")
+    trajectory_paths = []
+    for path in map(Path, args.paths):
+        if path.is_dir():
+            trajectory_paths.extend(sorted(path.rglob("*.npz")))
+        else:
+            trajectory_paths.append(path)
+    logger.info(f"🎬 Rendering {len(trajectory_paths)} trajectories.")
+    for path in trajectory_paths:
+        video_path = None
+        if args.output_dir is not None:
+            video_path = Path(args.output_dir) / f"{path.parent.parent.name}_{path.stem}.mp4"
+        render_replay(path, video_path, width=args.width, height=args.height, fps=args.fps)
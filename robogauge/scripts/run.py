@@ -20,6 +20,8 @@ os.environ['MUJOCO_GL'] = 'glfw'
 os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["MKL_NUM_THREADS"] = "1"
 
+import torch
+
 from robogauge.tasks import *
 from robogauge.tasks.pipeline import *
 
@@ -30,6 +32,8 @@ from robogauge.utils.logger import logger
 
 if __name__ == '__main__':
     args = parse_args()
+    if args.inference_threads is not None:
+        torch.set_num_threads(args.inference_threads)  # serial episodes run in this process, pool workers set it in `warm_up_worker`
     if args.stress_benchmark:
         stress_pipeline = StressPipeline(args)
         stress_pipeline.run()
@@ -22,17 +22,26 @@ os.environ["MKL_NUM_THREADS"] = "1"
 
 import multiprocessing
 import uvicorn
+import json
 import queue
 import time
+import asyncio
 import uuid
-from fastapi import FastAPI
+import threading
+import traceback
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 import argparse
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
 from robogauge.utils.helpers import parse_args, class_to_dict
 from robogauge.tasks.pipeline.stress_pipeline import StressPipeline
+from robogauge.utils.process_utils import Executor, WorkerPool, FairShareExecutor
+from robogauge.utils.job_store import JobStore, ResponseStatus, FINAL_STATUSES, DB_PATH, make_job_key
+from robogauge.utils.measure import format_results
+from robogauge.utils.progress_monitor import ProgressState, ProgressTypes
 from pprint import pprint
 
 default_args_list = [
@@ -47,124 +56,293 @@ default_args_list = [
     '--headless',
 ]
 
+COALESCE_POLICIES = ['none', 'latest', 'every_k']
+PROGRESS_INTERVAL = 0.5  # seconds between progress updates of a running job
+
 @dataclass
 class EvalTaskData:
     model_path: str
     step: int
     task_name: str
     experiment_name: str
+    priority: int = 0
+    coalesce: str = 'none'
+    coalesce_k: int = 1
 
 class EvalRequest(BaseModel):
     model_path: str
     step: int
     task_name: str
     experiment_name: str
+    priority: int = 0  # pending jobs with higher priority start first, FIFO within a priority
+    coalesce: str = 'none'  # pending jobs of the same experiment: 'none' keep all, 'latest' keep the newest step, 'every_k' keep every k-th step from the newest
+    coalesce_k: int = 1
 
-class ResponseStatus:
-    PENDING = "pending"
-    PROCESSING = "processing"
-    FINISHED = "finished"
-    ERROR = "error"
-    NOT_FOUND = "not_found"
+POLL_INTERVAL = 0.5  # seconds between reads of the job state in long-poll and streaming requests
+MAX_WAIT = 300  # longest long-poll of get_result
 
-def run_api_server(input_queue: multiprocessing.Queue, result_dict: dict, port=9973):
+def run_api_server(input_queue: multiprocessing.Queue, db_path: str, port=9973):
     """
     Running in a separate subprocess.
-    I/O Process: submit requests -> put into queue -> return ID.
+    I/O Process: submit requests -> store and put into queue -> return ID, results are read from the job store.
     """
     app = FastAPI()
+    store = JobStore(db_path)
+
+    async def read(task_id: str) -> dict:
+        """ Blocking sqlite read in a worker thread, keeps the event loop serving other requests. """
+        return await asyncio.to_thread(store.get, task_id) or {"status": ResponseStatus.NOT_FOUND}
 
     @app.post("/submit_eval")
     def submit_eval(req: EvalRequest):
+        if req.coalesce not in COALESCE_POLICIES or req.coalesce_k < 1:
+            raise HTTPException(status_code=422, detail=f"coalesce must be one of {COALESCE_POLICIES} with coalesce_k >= 1")
         task_id = str(uuid.uuid4())
         task_data = EvalTaskData(
             model_path=req.model_path,
             step=req.step,
             task_name=req.task_name,
-            experiment_name=req.experiment_name
+            experiment_name=req.experiment_name,
+            priority=req.priority,
+            coalesce=req.coalesce,
+            coalesce_k=req.coalesce_k,
         )
+        store.add_task(task_id, asdict(task_data), ResponseStatus.PENDING)  # before the main process can update it
         input_queue.put((task_id, task_data))
-
-        result_dict[task_id] = {"status": ResponseStatus.PENDING}
         return {"task_id": task_id, "message": "Queued"}
 
     @app.get("/get_result/{task_id}")
-    def get_result(task_id: str):
-        if task_id not in result_dict:
-            return {"status": ResponseStatus.NOT_FOUND}
-        result = result_dict[task_id]
-        if result["status"] == ResponseStatus.FINISHED:
-            result_dict.pop(task_id)
+    async def get_result(task_id: str, wait: float = 0.0):
+        """ wait: long-poll up to `wait` seconds for the final status """
+        deadline = time.time() + min(wait, MAX_WAIT)
+        result = await read(task_id)
+        while result["status"] not in FINAL_STATUSES and time.time() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            result = await read(task_id)
         return result
 
+    @app.get("/results")
+    def list_results(experiment_name: Optional[str] = None, step: Optional[int] = None, status: Optional[str] = None, limit: int = 100):
+        """ Tasks (newest first) with request, timings and response, filtered by experiment, step and status. """
+        return store.query(experiment_name=experiment_name, step=step, status=status, limit=limit)
+
+    @app.get("/stream/{task_id}")
+    async def stream(task_id: str):
+        """ Server-sent events: 'progress' on every change of the job state, then one 'result' event with the final response. """
+        async def events():
+            last, last_time = None, time.time()
+            while True:
+                result = await read(task_id)
+                if result["status"] in FINAL_STATUSES:
+                    yield f"event: result\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+                    return
+                if result != last:
+                    last, last_time = result, time.time()
+                    yield f"event: progress\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+                elif time.time() - last_time > 15:  # keep-alive comment for proxies
+                    last_time = time.time()
+                    yield ": keep-alive\n\n"
+                await asyncio.sleep(POLL_INTERVAL)
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
     print(f"📡 API Server listening on port {port}...")
     uvicorn.run(app, host="127.0.0.1", port=port, log_level="error")
 
+def job_args_list(task_data: EvalTaskData) -> List[str]:
+    """ Arguments deciding the results, the model enters the job key by its content hash. """
+    return default_args_list + ['--task-name', task_data.task_name]
+
+def run_stress_job(task_data: EvalTaskData, pool: Executor, num_processes: int, on_progress: Callable = None) -> dict:
+    """ Run one stress benchmark, returns the formatted results. """
+    args_list = job_args_list(task_data) + [
+        '--model-path', task_data.model_path,
+        '--experiment-name', task_data.experiment_name,
+        '--run-name', f"step{task_data.step}",
+        '--num-processes', str(num_processes),
+    ]
+    args = parse_args(args_list)
+
+    print(f"📋 Running with args:")
+    pprint(class_to_dict(args))
+
+    pipeline = StressPipeline(args, pool=pool, on_progress=on_progress)
+    return format_results(pipeline.run())
+
+@dataclass
+class EvalJob:
+    key: str  # make_job_key of the model content and `job_args_list`
+    task_data: EvalTaskData
+    tasks: Dict[str, EvalTaskData] = field(default_factory=dict)  # task id -> every submission attached to the job, of any experiment
+    status: str = ResponseStatus.PENDING
+    priority: int = 0
+    seq: int = 0  # submission order, FIFO within a priority
+    progress_time: float = 0.0  # last progress publish time
+
+class JobManager:
+    """ Evaluation jobs of the main process:
+    - submissions of a finished job key are answered from the result cache
+    - duplicate submissions (same model content and arguments) attach to the pending or running job
+    - pending submissions of an experiment are coalesced by the policy of its latest submission (`EvalRequest.coalesce`),
+      a job shared with other experiments keeps running for them
+    - up to `max_jobs` jobs run at the same time, highest priority first, each in a thread on its fair share of the workers
+    """
+    def __init__(self, store: JobStore, shared_pool: FairShareExecutor, num_processes: int, max_jobs: int):
+        self.store = store
+        self.shared_pool = shared_pool
+        self.num_processes = num_processes
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+        self.jobs: Dict[str, EvalJob] = {}  # key -> pending or running job
+        self.pending: List[EvalJob] = []
+        self.num_running = 0
+        self.num_submitted = 0
+
+    def submit(self, task_id: str, task_data: EvalTaskData):
+        try:
+            key = make_job_key(task_data.model_path, job_args_list(task_data))
+        except OSError as e:
+            print(f"❌ [Main] Task {task_id} model can't be read: {e}")
+            self.store.update(task_id, {"status": ResponseStatus.ERROR, "error": str(e), "error_msg": traceback.format_exc()})
+            return
+        with self.lock:  # `run_job` stores the result before it drops the job under the lock, one of them is found
+            job = self.jobs.get(key)
+            if job is None and self.store.get_result(key) is not None:
+                print(f"♻️ [Main] Task {task_id} (Step {task_data.step}) answered from the result cache.")
+                self.store.update(task_id, {"status": ResponseStatus.FINISHED, "step": task_data.step, "cached": True}, job_key=key)
+                return
+            if job is not None:
+                print(f"🔗 [Main] Task {task_id} (Step {task_data.step}) attached to the same {job.status} job.")
+                job.tasks[task_id] = task_data
+                job.priority = max(job.priority, task_data.priority)
+                self.store.update(task_id, {"status": job.status}, job_key=key)
+                if job.status != ResponseStatus.PENDING:
+                    return
+            else:
+                self.jobs[key] = EvalJob(key, task_data, {task_id: task_data}, priority=task_data.priority, seq=self.num_submitted)
+                self.num_submitted += 1
+                self.pending.append(self.jobs[key])
+            self.coalesce(task_data)
+
+    def coalesce(self, task_data: EvalTaskData):
+        """ Supersede the pending submissions of the experiment, called with `lock` held. Only the backlog is
+        coalesced, a server keeping up evaluates every submission. Submissions of other experiments attached to
+        the same job keep it pending.
+        """
+        if task_data.coalesce == 'none':
+            return
+        experiment = task_data.experiment_name
+        steps = sorted({
+            data.step for job in self.pending for data in job.tasks.values() if data.experiment_name == experiment
+        }, reverse=True)
+        k = task_data.coalesce_k if task_data.coalesce == 'every_k' else max(len(steps), 1)
+        superseded = {step for i, step in enumerate(steps) if i % k != 0}
+        for job in list(self.pending):
+            task_ids = [
+                task_id for task_id, data in job.tasks.items()
+                if data.experiment_name == experiment and data.step in superseded
+            ]
+            if not task_ids:
+                continue
+            for task_id in task_ids:
+                step = job.tasks.pop(task_id).step
+                self.store.update(task_id, {"status": ResponseStatus.SUPERSEDED, "step": step, "superseded_by": steps[0]})
+            if job.tasks:
+                print(f"⏭️ [Main] {len(task_ids)} tasks of '{experiment}' detached from pending job {job.key[:12]}, superseded by step {steps[0]}.")
+                job.task_data = next(iter(job.tasks.values()))
+                job.priority = max(data.priority for data in job.tasks.values())
+            else:
+                print(f"⏭️ [Main] Pending job {job.key[:12]} (Step {job.task_data.step}) superseded by step {steps[0]}.")
+                self.pending.remove(job)
+                self.jobs.pop(job.key)
+
+    def start_ready(self):
+        with self.lock:
+            while self.pending and self.num_running < self.max_jobs:
+                job = max(self.pending, key=lambda job: (job.priority, -job.seq))
+                self.pending.remove(job)
+                job.status = ResponseStatus.PROCESSING
+                self.num_running += 1
+                for task_id in job.tasks:
+                    self.store.update(task_id, {"status": ResponseStatus.PROCESSING}, job_key=job.key)
+                threading.Thread(target=self.run_job, args=(job,), daemon=True).start()
+
+    def publish_progress(self, job: EvalJob, state: ProgressState, force: bool = False):
+        """ Write the progress of a running job for the API process (at most every PROGRESS_INTERVAL seconds). """
+        now = time.time()
+        if not force and now - job.progress_time < PROGRESS_INTERVAL:
+            return
+        job.progress_time = now
+        progress = state.to_dict()
+        with self.lock:
+            for task_id in job.tasks:
+                self.store.update(task_id, {"status": ResponseStatus.PROCESSING, "progress": progress})
+
+    def run_job(self, job: EvalJob):
+        print(f"\n🔄 [Main] Processing Job {job.key[:12]} (Step {job.task_data.step})...")
+        state = ProgressState()
+        def on_progress(task_id, msg_type, data):
+            state.update(task_id, msg_type, data)
+            self.publish_progress(job, state, force=msg_type in [ProgressTypes.FINISH, ProgressTypes.RESULT])
+        try:
+            with self.shared_pool.job_view(job.key) as pool:
+                results = run_stress_job(job.task_data, pool, self.num_processes, on_progress)
+            self.store.put_result(job.key, results)
+            response = {"status": ResponseStatus.FINISHED, "results": results}
+            print(f"✅ [Main] Job {job.key[:12]} Finished.")
+        except Exception as e:
+            print(f"❌ [Main] Error: {e}")
+            traceback.print_exc()
+            response = {"status": ResponseStatus.ERROR, "error": str(e), "error_msg": traceback.format_exc()}
+        with self.lock:
+            self.jobs.pop(job.key)
+            self.num_running -= 1
+            for task_id, data in job.tasks.items():
+                self.store.update(task_id, {**response, "step": data.step, "progress": state.to_dict()}, job_key=job.key)
+        self.start_ready()
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--port', type=int, default=9973, help='API server port')
-    parser.add_argument('--num-processes', type=int, default=30, help='Number of parallel processes for StressPipeline')
+    parser.add_argument('--num-processes', type=int, default=30, help='Number of parallel processes shared by all running jobs')
+    parser.add_argument('--db-path', type=str, default=str(DB_PATH), help='SQLite job and result store, kept across server restarts')
+    parser.add_argument('--max-concurrent-jobs', type=int, default=4, help='Stress benchmarks running at the same time, workers are fair-shared between them')
     args_cli = parser.parse_args()
     print("🤖 RoboGauge Evaluation Server Starting...")
     ctx = multiprocessing.get_context('spawn')
-    manager = ctx.Manager()
-    task_queue = manager.Queue()
-    results_store = manager.dict()
+    task_queue = ctx.Queue()
+    store = JobStore(args_cli.db_path)
 
     api_p = ctx.Process(
         target=run_api_server, 
-        args=(task_queue, results_store, args_cli.port),
+        args=(task_queue, args_cli.db_path, args_cli.port),
         daemon=True
     )
     api_p.start()
 
     print("🚀 Main Process started. Waiting for tasks...")
-    print("   (StressPipeline will run directly in this Main Process)")
+    print(f"   (Up to {args_cli.max_concurrent_jobs} StressPipelines run in this Main Process on {args_cli.num_processes} shared workers)")
+    pool = WorkerPool(args_cli.num_processes)  # warm workers shared by all tasks
+    jobs = JobManager(store, FairShareExecutor(pool), args_cli.num_processes, args_cli.max_concurrent_jobs)
+    for task_id, request in store.unfinished():  # tasks left pending or processing by a stopped server
+        print(f"🔁 [Main] Resubmitting unfinished Task {task_id} (Step {request['step']}).")
+        jobs.submit(task_id, EvalTaskData(**request))
 
     try:
         while True:
             try:
                 task_data: EvalTaskData
                 task_id, task_data = task_queue.get(timeout=1.0)
-                
-                print(f"\n🔄 [Main] Processing Task {task_id} (Step {task_data.step})...")
-                results_store[task_id] = {"status": ResponseStatus.PROCESSING}
-                
-                args_list = default_args_list.copy()
-                args_list += [
-                    '--model-path', task_data.model_path,
-                    '--task-name', task_data.task_name,
-                    '--experiment-name', task_data.experiment_name,
-                    '--num-processes', str(args_cli.num_processes),
-                ]
-                args = parse_args(args_list)
-
-                print(f"📋 Running with args:")
-                pprint(class_to_dict(args))
-                
-                pipeline = StressPipeline(args)
-                stress_results = pipeline.run() 
-
-                results_store[task_id] = {
-                    "status": ResponseStatus.FINISHED,
-                    "step": task_data.step,
-                    "results": stress_results
-                }
-                print(f"✅ [Main] Task {task_id} Finished.")
-
+                jobs.submit(task_id, task_data)
             except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"❌ [Main] Error: {e}")
-                import traceback
-                traceback.print_exc()
-                if 'task_id' in locals():
-                    results_store[task_id] = {"status": ResponseStatus.ERROR, "error": str(e), "error_msg": traceback.format_exc()}
+                pass
+            jobs.start_ready()
 
     except KeyboardInterrupt:
         print("\n🛑 Shutting down...")
         api_p.terminate()
         api_p.join()
+    finally:
+        pool.terminate()
 
 if __name__ == "__main__":
     main()
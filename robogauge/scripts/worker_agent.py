@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : worker_agent.py
+@Time    : 2026/10/18 14:32:40
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Worker agent of the remote executor, runs episode tasks of a coordinator (run.py --executor remote)
+on a local warm worker pool, reconnects after the coordinator finished to serve the next run.
+'''
+import os
+
+os.environ['MUJOCO_GL'] = 'glfw'
+os.environ["OMP_NUM_THREADS"] = "1"
+os.environ["MKL_NUM_THREADS"] = "1"
+
+import time
+import queue
+import multiprocessing
+import socket
+import threading
+from argparse import ArgumentParser
+from multiprocessing.connection import Client
+
+from robogauge.utils.logger import logger
+from robogauge.utils.process_utils import WorkerPool
+from robogauge.utils.remote_executor import get_authkey, parse_address, picklable_error
+
+def parse_agent_args():
+    parser = ArgumentParser()
+    parser.add_argument("--coordinator-address", type=str, default="127.0.0.1:6001", help="host:port of the coordinator.")
+    parser.add_argument("--num-processes", type=int, default=os.cpu_count(), help="Episode tasks run at the same time on this host.")
+    parser.add_argument("--name", type=str, default=f"{socket.gethostname()}-{os.getpid()}", help="Agent name in the coordinator logs.")
+    parser.add_argument("--inference-threads", type=int, default=0, help="Torch intra-op threads per process for policy inference, 0 keeps the default.")
+    parser.add_argument("--retry-interval", type=float, default=5.0, help="Seconds between connection attempts.")
+    return parser.parse_args()
+
+def serve(conn, pool: WorkerPool, slots: threading.Semaphore):
+    """ Run the tasks of one coordinator until it disconnects. A received task starts when one of the pool
+    processes is free (`slots`, shared by all connections), tasks not started yet are dropped on disconnect
+    and the next coordinator only waits for the started ones.
+    """
+    send_lock = threading.Lock()
+    disconnected = threading.Event()
+    tasks = queue.Queue()
+    def finish(message):
+        slots.release()
+        with send_lock:
+            try:
+                conn.send(message)
+            except (OSError, EOFError):  # coordinator gone, result dropped
+                pass
+    def feed():
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            slots.acquire()
+            if disconnected.is_set():
+                slots.release()
+                return
+            task_id, func, args = task
+            pool.apply_async(
+                func, args,
+                callback=lambda result, task_id=task_id: finish(('result', task_id, result, None)),
+                error_callback=lambda e, task_id=task_id: finish(('result', task_id, None, picklable_error(e))),
+            )
+    threading.Thread(target=feed, daemon=True).start()
+    while True:
+        try:
+            _, task_id, func, args = conn.recv()
+        except (OSError, EOFError):
+            disconnected.set()
+            tasks.put(None)
+            return
+        tasks.put((task_id, func, args))
+
+if __name__ == '__main__':
+    args = parse_agent_args()
+    logger.create("worker_agent", args.name)
+    address = parse_address(args.coordinator_address)
+    authkey = get_authkey()
+    slots = threading.Semaphore(args.num_processes)  # free pool processes
+    with WorkerPool(args.num_processes, args.inference_threads) as pool:
+        while True:
+            try:
+                conn = Client(address, authkey=authkey)
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                time.sleep(args.retry_interval)
+                continue
+            conn.send(('hello', args.name, args.num_processes))
+            logger.info(f"🔌 Connected to coordinator {args.coordinator_address} with {args.num_processes} processes.")
+            serve(conn, pool, slots)
+            conn.close()
+            logger.info(f"👋 Coordinator {args.coordinator_address} disconnected, waiting for the next run.")
@@ -16,6 +16,7 @@ from collections import defaultdict
 import numpy as np
 from robogauge.utils.logger import logger
 from robogauge.utils.helpers import class_to_dict, snake_to_pascal
+from robogauge.utils.measure import PhaseTimer, Stat, format_results
 
 from robogauge.tasks.robots import RobotConfig
 from robogauge.tasks.gauge.base_gauge_config import BaseGaugeConfig
@@ -42,6 +43,8 @@ class BaseGauge:
         self.metrics: List[BaseMetric] = []
         self.info = {'goal': [], 'metric': []}
         self.results = {}  # {'goal/sub_goal': {'metric': result}}
+        self.save_name = "results.yaml"  # results file name under logger.log_dir
+        self.timer: PhaseTimer = None  # set by the pipeline, timing is saved in results when enabled
 
         log_str = "Initialized Gauge with Goals 🎯 and Metrics 📊:\n"
         for name, kwargs in self.goals_cfg.items():
@@ -146,6 +149,10 @@ class BaseGauge:
                 metrics_results[metric_name] = val
         self.goals[self.goal_idx].update_metrics(metrics_results)
     
+    def steps_to_next_metric(self, n_step: int, sim_dt: float) -> int:
+        """ Number of physics steps from `n_step` up to (including) the next step sampled by `update_metrics`. """
+        return (-n_step) % int(self.cfg.metrics.metric_dt / sim_dt + 1e-9) + 1
+
     def reset_metrics(self):
         for metric in self.metrics:
             metric.reset()
@@ -162,21 +169,23 @@ class BaseGauge:
             if metric_name not in self.results['summary']:
                 self.results['summary'][metric_name] = {}
             for quantile, vals in quantiles.items():
-                mean = float(np.mean(vals))
-                std = float(np.std(vals))
-                self.results['summary'][metric_name][quantile] = f"{mean:.4f} ± {std:.4f}"
+                stat = Stat.of(vals)
+                self.results['summary'][metric_name][quantile] = stat
                 if metric_name == 'quality_score':
-                    tqs = mean
+                    tqs = stat.mean
                     if self.cfg.assets.terrain_name in SEARCH_LEVELS_TERRAINS:
-                        tqs = 0.09 * (self.cfg.assets.terrain_level - 1) + 0.19 * mean
-                    self.results['summary']['terrain_quality_score'][quantile] = f"{tqs:.4f} ± {std:.4f}"
+                        tqs = 0.09 * (self.cfg.assets.terrain_level - 1) + 0.19 * stat.mean
+                    self.results['summary']['terrain_quality_score'][quantile] = Stat(tqs, stat.std)
 
-        save_path = Path(logger.log_dir) / "results.yaml"
+        save_path = Path(logger.log_dir) / self.save_name
         self.results["terrain_name"] = self.cfg.assets.terrain_name
         self.results["terrain_level"] = self.cfg.assets.terrain_level
+        if self.timer is not None and self.timer.enabled:
+            self.results['timing'] = self.timer.summary()
+            logger.info(f"⏱️ Steps/s: {self.results['timing']['steps_per_second']:.1f}, real time factor: {self.results['timing']['real_time_factor']:.2f}")
 
         with open(save_path, 'w', encoding='utf-8') as file:
-            yaml_str = yaml.dump(self.results, allow_unicode=True, sort_keys=False)
+            yaml_str = yaml.dump(format_results(self.results), allow_unicode=True, sort_keys=False)
             file.write(yaml_str)
         logger.info(
             f"""\n{'='*20} Goals and Metrics results {'='*20}\n"""
@@ -22,6 +22,7 @@ class BaseGaugeConfig(Config):
     gauge_class = 'BaseGauge'
     write_tensorboard = False  # Whether to write tensorboard logs
     backward = False  # Whether to invert init yaw orient and backward move to target
+    settle_snapshot = True  # Restore the state captured when the robot first settled on later resets, instead of settling again (results differ from earlier versions, `--full-settle` disables it)
 
     class assets:
         terrain_name = "flat"
@@ -1,4 +1,5 @@
 from .base_pipeline import BasePipeline
+from .batched_pipeline import BatchedPipeline
 from .multi_pipeline import MultiPipeline
 from .level_pipeline import LevelPipeline
 from .stress_pipeline import StressPipeline
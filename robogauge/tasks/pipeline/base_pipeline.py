@@ -12,16 +12,17 @@ import random
 import traceback
 import numpy as np
 from pathlib import Path
-from copy import deepcopy
 
 from robogauge.utils.logger import logger
 from robogauge.tasks.simulator import MujocoSimulator, MujocoConfig, SimData
+from robogauge.tasks.simulator.noise import ObservationNoise
 from robogauge.tasks.robots import (
     BaseRobot, RobotConfig, Go2Config, Go2, Go2MoEConfig, Go2MoE
 )
 from robogauge.tasks.gauge import BaseGauge, BaseGaugeConfig
 from robogauge.tasks.gauge.goal_data import GoalData, VelocityGoal, PositionGoal
 from robogauge.utils.helpers import class_to_dict
+from robogauge.utils.measure import PhaseTimer
 
 class BasePipeline:
     def __init__(self, 
@@ -43,6 +44,13 @@ class BasePipeline:
 
         self.first_reset = True
         self.last_reset_time = 0.0
+        self.rng = random.Random(args.seed)  # per-episode random stream (action delay)
+        self.noise = ObservationNoise(simulator_cfg.noise, args.seed)
+        self.sim_data: SimData = None
+        self.settled_state = None  # sim and policy state when the robot first settled after a reset
+        self.warning, self.error = None, None
+        self.timer = PhaseTimer(enabled=getattr(args, 'profile', False), sim_dt=simulator_cfg.physics.simulation_dt)
+        self.gauge.timer = self.timer
     
         # save configs
         cfg = {}
@@ -53,106 +61,176 @@ class BasePipeline:
         with open(Path(logger.log_dir) / "configs.yaml", 'w') as file:
             yaml.dump(cfg, file)
     
-    def load(self):
-        self.sim.load(
+    def load(self, sim: MujocoSimulator = None):
+        """ Load terrain and robot assets, `sim` defaults to the pipeline's own simulator. """
+        sim = self.sim if sim is None else sim
+        t = self.timer.tic()
+        sim.load(
             self.gauge_cfg.assets.terrain_xmls,
             self.robot_cfg.assets.robot_xml,
             self.gauge_cfg.assets.terrain_spawn_pos,
             self.robot_cfg.control.default_dof_pos,
             self.gauge_cfg.backward,
+            p_gains=self.robot_cfg.control.p_gains,
+            d_gains=self.robot_cfg.control.d_gains,
         )
+        self.timer.toc('load', t)
 
     def run(self):
         logger.info(f"🚀 Starting single run: {self.run_name}")
         self.load()
-        sim_data = self.sim.step()
-        frame_skip = int(self.robot_cfg.control.control_dt / self.sim_cfg.physics.simulation_dt)
-        assert frame_skip * self.sim_cfg.physics.simulation_dt == self.robot_cfg.control.control_dt, \
-            "Control dt must be multiple of simulation dt."
-        logger.info(f"Sim FPS: {1.0 / self.sim_cfg.physics.simulation_dt:.2f}, Control FPS: {1.0 / self.robot_cfg.control.control_dt:.2f}, Frame Skip: {frame_skip:d}")
+        self.start()
         logger.info("Running pipeline...")
-        warning, error = None, None
         while not self.gauge.is_done():
-            try:
-                if self.first_reset:  # wait for robot to be still
-                    goal_data = GoalData(
-                        goal_type=self.robot_cfg.control.support_goal,
-                        velocity_goal=VelocityGoal(),  # zero velocity
-                        position_goal=PositionGoal(),  # current position
-                    )
-                    if (
-                        (np.linalg.norm(sim_data.proprio.base.lin_vel) < 0.05 and sim_data.sim_time - self.last_reset_time > 0.1) or  # robot is still
-                        (sim_data.sim_time - self.last_reset_time) > 3.0  # wait max 3s
-                    ):
-                        self.first_reset = False
-                else:
-                    goal_data = self.gauge.get_goal(sim_data)
-
-                if goal_data is None:  # Change goal
-                    sim_data = self.reset_sim_and_robot(sim_data)
-                    continue
-
-                # Setup visualization for simulation
-                self.sim.target_pos = goal_data.visualization_pos
-                self.sim.target_velocity = goal_data.velocity_goal
-
-                obs = self.robot.build_observation(self.add_noise(sim_data), goal_data)
-                action, p_gains, d_gains, control_type = self.robot.get_action(obs)
-
-                if self.sim_cfg.domain_rand.action_delay:
-                    actions_start_decimation = random.randint(0, frame_skip - 1)
-                else:
-                    self.sim.setup_action(action, p_gains, d_gains, control_type)
-                for i in range(frame_skip):
-                    if self.sim_cfg.domain_rand.action_delay and i == actions_start_decimation:
-                        self.sim.setup_action(action, p_gains, d_gains, control_type)
-                    sim_data = self.sim.step()
-                    self.gauge.update_metrics(sim_data, goal_data)
-                if not self.first_reset and self.gauge.is_reset(sim_data):
-                    sim_data = self.reset_sim_and_robot(sim_data)
-            except Exception as e:
-                if str(e).startswith("[Penetration Error]"):
-                    warning = e
-                    logger.warning(f"⚠️ Penetration detected! Reset current goal and continue..., error: {e}")
-                    self.gauge.reset_current_goal()
-                    logger.info("⏩ Pipeline recovered from penetration and continued current goal 🎯.")
-                else:
-                    error = e
-                    logger.error(f"❌ Goal '{self.gauge.goal_str}' failed with error: {e},\n{traceback.format_exc()}")
-                    self.gauge.switch_to_next_goal()  # skip to next goal
-                    logger.info("⏩ Pipeline recovered from error and continued next goal 🎯.")
-                sim_data = self.reset_sim_and_robot(sim_data)
+            self.control_step()
 
         self.sim.close_viewer()
         self.sim.close_video_writer()
+        self.sim.close_trajectory()
         logger.info("✅ Pipeline execution finished.")
         logger.info(f"📁 Logging saved at: {logger.log_dir}")
 
-        return self.gauge.results, warning, error
+        return self.gauge.results, self.warning, self.error
+
+    def start(self):
+        """ Take the first simulation step after loading, must be called before `control_step`. """
+        self.sim.timer = self.timer
+        self.timer.start()
+        self.sim_data = self.sim.step()
+        self.frame_skip = int(self.robot_cfg.control.control_dt / self.sim_cfg.physics.simulation_dt)
+        assert self.frame_skip * self.sim_cfg.physics.simulation_dt == self.robot_cfg.control.control_dt, \
+            "Control dt must be multiple of simulation dt."
+        logger.info(f"Sim FPS: {1.0 / self.sim_cfg.physics.simulation_dt:.2f}, Control FPS: {1.0 / self.robot_cfg.control.control_dt:.2f}, Frame Skip: {self.frame_skip:d}")
+        self.warning, self.error = None, None
+
+    def control_step(self):
+        """ Run one control interval: goal -> observation -> action -> frame_skip physics steps. """
+        try:
+            control = self.prepare_control()
+            if control is None:
+                return
+            goal_data, obs = control
+            t = self.timer.tic()
+            action = self.robot.get_action(obs)
+            self.timer.toc('inference', t)
+            self.apply_control(goal_data, action)
+        except Exception as e:
+            self.handle_error(e)
+
+    def run_guarded(self, fn, *args):
+        """ Call `fn(*args)`, errors are handled like in `control_step`, returns None on error. """
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.handle_error(e)
+            return None
+
+    def prepare_control(self):
+        """ Goal and observation of the next control interval.
+        Returns:
+            (goal_data, obs), None if the goal changed (simulator and robot have been reset)
+        """
+        if self.first_reset:  # wait for robot to be still
+            goal_data = GoalData(
+                goal_type=self.robot_cfg.control.support_goal,
+                velocity_goal=VelocityGoal(),  # zero velocity
+                position_goal=PositionGoal(),  # current position
+            )
+            robot_still = np.linalg.norm(self.sim_data.proprio.base.lin_vel) < 0.05 and self.sim_data.sim_time - self.last_reset_time > 0.1
+            if (
+                robot_still or
+                (self.sim_data.sim_time - self.last_reset_time) > 3.0  # wait max 3s
+            ):
+                self.first_reset = False
+                if self.gauge_cfg.settle_snapshot and self.settled_state is None:
+                    if robot_still:
+                        self.settled_state = {'sim': self.sim.get_state(), 'robot': self.robot.get_state()}
+                        logger.info(f"📸 Captured settled state at {self.sim_data.sim_time:.2f}s, later resets restore it.")
+                    else:
+                        logger.info("⏳ Robot didn't settle within 3s, no settled state captured, the next reset settles again.")
+        else:
+            goal_data = self.gauge.get_goal(self.sim_data)
+
+        if goal_data is None:  # Change goal
+            self.sim_data = self.reset_sim_and_robot(self.sim_data)
+            return None
+
+        # Setup visualization for simulation
+        self.sim.target_pos = goal_data.visualization_pos
+        self.sim.target_velocity = goal_data.velocity_goal
+
+        t = self.timer.tic()
+        sim_data = self.add_noise(self.sim_data)
+        self.timer.toc('noise', t)
+        t = self.timer.tic()
+        obs = self.robot.build_observation(sim_data, goal_data)
+        self.timer.toc('observation', t)
+        return goal_data, obs
+
+    def apply_control(self, goal_data: GoalData, action: tuple):
+        """ Apply `(action, p_gains, d_gains, control_type)` from the robot and run frame_skip physics steps. """
+        frame_skip = self.frame_skip
+        action, p_gains, d_gains, control_type = action
+        actions_start_decimation = 0
+        if self.sim_cfg.domain_rand.action_delay:
+            actions_start_decimation = self.rng.randint(0, frame_skip - 1)
+            self.physics_steps(actions_start_decimation, goal_data)  # previous action is still applied
+        self.sim.setup_action(action, p_gains, d_gains, control_type)
+        self.physics_steps(frame_skip - actions_start_decimation, goal_data)
+        if not self.first_reset and self.gauge.is_reset(self.sim_data):
+            self.sim_data = self.reset_sim_and_robot(self.sim_data)
+
+    def handle_error(self, e: Exception):
+        """ Penetration resets the current goal, other errors skip to the next goal. """
+        if str(e).startswith("[Penetration Error]"):
+            self.warning = e
+            logger.warning(f"⚠️ Penetration detected! Reset current goal and continue..., error: {e}")
+            self.gauge.reset_current_goal()
+            logger.info("⏩ Pipeline recovered from penetration and continued current goal 🎯.")
+        else:
+            self.error = e
+            logger.error(f"❌ Goal '{self.gauge.goal_str}' failed with error: {e},\n{traceback.format_exc()}")
+            self.gauge.switch_to_next_goal()  # skip to next goal
+            logger.info("⏩ Pipeline recovered from error and continued next goal 🎯.")
+        self.sim_data = self.reset_sim_and_robot(self.sim_data)
     
+    def physics_steps(self, num_steps: int, goal_data: GoalData):
+        """ Advance `num_steps` physics steps and update metrics. With native PD, consecutive steps are merged
+        into one `sim.step(nstep)` call, split at metric samples, rendered frames and truncation checks.
+        Roll and penetration are only checked on the state after each call, so without
+        `truncation.native_pd_check_dt` they are detected once per merged call instead of every physics step.
+        """
+        while num_steps > 0:
+            nstep = 1
+            if self.sim.native_pd:
+                nstep = min(
+                    num_steps,
+                    self.gauge.steps_to_next_metric(self.sim.n_step, self.sim.sim_dt),
+                    self.sim.steps_to_next_frame(),
+                    self.sim.steps_to_next_truncation_check(),
+                )
+            self.sim_data = self.sim.step(nstep)
+            t = self.timer.tic()
+            self.gauge.update_metrics(self.sim_data, goal_data)
+            self.timer.toc('metrics', t)
+            num_steps -= nstep
+
     def reset_sim_and_robot(self, sim_data: SimData):
+        t = self.timer.tic()
         self.sim.reset()
+        self.timer.toc('reset', t)
         self.last_reset_time = sim_data.sim_time
         self.first_reset = True
+        if self.settled_state is not None:  # skip settling
+            self.sim.set_state(self.settled_state['sim'])
+            self.first_reset = False
         sim_data = self.sim.step()
         self.robot.reset()
+        if self.settled_state is not None:
+            self.robot.set_state(self.settled_state['robot'])
         self.gauge.reset_metrics()
         return sim_data
 
-    def add_noise(self, sim_data: SimData):
-        sim_data = deepcopy(sim_data)
-        noise_cfg = self.sim_cfg.noise
-        if not noise_cfg.enabled:
-            return sim_data
-        proprio = sim_data.proprio
-        def add_uniform_noise(data, noise_level):
-            for i in range(len(data)):
-                noise = random.uniform(-noise_level, noise_level)
-                data[i] += noise
-        add_uniform_noise(proprio.joint.pos, noise_cfg.joint_pos)
-        add_uniform_noise(proprio.joint.vel, noise_cfg.joint_vel)
-        add_uniform_noise(proprio.base.lin_vel, noise_cfg.lin_vel)
-        add_uniform_noise(proprio.base.ang_vel, noise_cfg.ang_vel)
-        add_uniform_noise(proprio.imu.lin_vel, noise_cfg.lin_vel)
-        add_uniform_noise(proprio.imu.ang_vel, noise_cfg.ang_vel)
-        return sim_data
+    def add_noise(self, sim_data: SimData) -> SimData:
+        """ Noisy view of `sim_data`, reused by the next call, `sim_data` itself is not modified. """
+        return self.noise(sim_data)
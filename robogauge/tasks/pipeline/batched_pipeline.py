@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : batched_pipeline.py
+@Time    : 2026/10/17 10:40:18
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Batched Pipeline for Robogauge, drive N episodes in one process
+'''
+import numpy as np
+from typing import List
+
+from robogauge.utils.logger import logger
+from robogauge.tasks.simulator import BatchedMujocoSimulator
+from robogauge.tasks.pipeline.base_pipeline import BasePipeline
+
+class BatchedPipeline:
+    """ Run several episodes (same task and domain parameters, different seeds) side by side.
+    Each episode keeps its own robot, gauge and random stream, all of them share one compiled
+    MuJoCo model through `BatchedMujocoSimulator`. The policy forward of all episodes waiting for an
+    action is done once per control step by the first episode's robot (`BaseRobot.get_actions`).
+    """
+    def __init__(self, episodes: List[BasePipeline]):
+        assert len(episodes) > 0, "BatchedPipeline needs at least one episode."
+        self.episodes = episodes
+        if len(episodes) > 1 and any(episode.gauge.cfg.write_tensorboard for episode in episodes):
+            logger.warning("Tensorboard is disabled for batched worlds, all episodes share one process writer.")
+            for episode in episodes:
+                episode.gauge.cfg.write_tensorboard = False
+            logger.close_tensorboard()  # opened by the gauges of the episodes
+        self.sim_cfg = episodes[0].sim_cfg
+        self.batched_sim = BatchedMujocoSimulator(self.sim_cfg, num_worlds=len(episodes))
+        self.policy = episodes[0].robot
+        for episode in episodes:
+            episode.gauge.save_name = f"results_seed{episode.args.seed}.yaml"
+
+    def load(self):
+        self.episodes[0].load(self.batched_sim)
+        for episode, world in zip(self.episodes, self.batched_sim.worlds):
+            episode.sim = world
+            if self.sim_cfg.render.record_trajectory:
+                world.start_trajectory(f"trajectory_seed{episode.args.seed}")
+
+    def run(self):
+        """
+        Returns:
+            list: (results, warning, error) of each episode, same order as `episodes`.
+        """
+        logger.info(f"🚀 Starting batched run: {[episode.run_name for episode in self.episodes]}")
+        self.load()
+        for episode in self.episodes:
+            episode.start()
+        logger.info("Running batched pipeline...")
+
+        active_ids = list(range(len(self.episodes)))
+        while active_ids:
+            self.control_step(active_ids)
+            active_ids = [i for i in active_ids if not self.episodes[i].gauge.is_done()]
+
+        self.batched_sim.close()
+        logger.info("✅ Batched pipeline execution finished.")
+        logger.info(f"📁 Logging saved at: {logger.log_dir}")
+        return [(episode.gauge.results, episode.warning, episode.error) for episode in self.episodes]
+
+    def control_step(self, active_ids: List[int]):
+        """ `BasePipeline.control_step` of the active episodes with one batched policy forward. """
+        controls = self.batched_sim.map(
+            lambda i: self.episodes[i].run_guarded(self.episodes[i].prepare_control), active_ids)
+        ready = [(i, control) for i, control in zip(active_ids, controls) if control is not None]
+        if not ready:
+            return
+        robots = [self.episodes[i].robot for i, _ in ready]
+        obs_batch = np.stack([obs for _, (_, obs) in ready])
+        t = self.episodes[0].timer.tic()
+        try:
+            actions = self.policy.get_actions(obs_batch, robots)
+        except Exception as e:  # let each episode handle the error as in a single run
+            logger.error(f"❌ Batched policy inference failed: {e}, fall back to per-episode inference.")
+            self.policy.batch_inference = False
+            actions = [self.episodes[i].run_guarded(self.episodes[i].robot.get_action, obs) for i, (_, obs) in ready]
+        dt = self.episodes[0].timer.tic() - t
+        for i, _ in ready:  # split the batched forward time over the episodes
+            self.episodes[i].timer.add('inference', dt / len(ready))
+        action_by_id = {i: (goal_data, action) for (i, (goal_data, _)), action in zip(ready, actions) if action is not None}
+        self.batched_sim.map(
+            lambda i: self.episodes[i].run_guarded(self.episodes[i].apply_control, *action_by_id[i]), list(action_by_id))
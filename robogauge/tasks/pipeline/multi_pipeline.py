@@ -7,50 +7,44 @@
 @Blog    : https://wty-yy.github.io/
 @Desc    : Multiprocessing Pipeline for Robogauge
 '''
+import time
 import yaml
 import traceback
 import functools
 import numpy as np
-from tqdm import tqdm
-import multiprocessing
 from pathlib import Path
+from contextlib import nullcontext
 from copy import deepcopy
 from itertools import product
 from collections import defaultdict
 
 from robogauge.tasks.pipeline.base_pipeline import BasePipeline
+from robogauge.tasks.pipeline.batched_pipeline import BatchedPipeline
 
 from robogauge.utils.task_register import task_register
 from robogauge.utils.logger import Logger
-from robogauge.utils.process_utils import NoDaemonPool
+from robogauge.utils.process_utils import Executor, make_executor, use_executor
+from robogauge.utils.task_graph import TaskBatch, drive
 from robogauge.utils.progress_monitor import report_progress, ProgressTypes, ProgressData
 from robogauge.utils.file_utils import compress_directory
+from robogauge.utils.measure import merge_timings, Stat, format_results
+from robogauge.utils.cost_model import get_cost_model, make_cost_key
 from robogauge.tasks.gauge.gauge_configs.terrain_levels_config import SEARCH_LEVELS_TERRAINS
 
-multi_logger = Logger()  # MultiPipeline logger
+RETURNED_RESULT_KEYS = ['summary', 'terrain_name', 'terrain_level', 'timing']  # per goal metrics stay in the episode results.yaml
 
-def run_single_process(args, data):
+def make_process_result(pipeline, data, results, warning, error, duration=None):
     from robogauge.utils.logger import logger
     seed, base_mass, friction = data
-    local_args = deepcopy(args)
-    local_args.seed = seed
-    local_args.friction = friction
-    local_args.base_mass = base_mass
-    run_name = f"{local_args.run_name}_{seed}_baseMass{base_mass}_friction{friction}"
-    logger.create(
-        experiment_name=local_args.experiment_name,
-        run_name=run_name,
-        console_output=False,
-        parent_log_dir=args.parent_log_dir
-    )
-    pipeline = task_register.make_pipeline(args=local_args, create_logger=False)
-    results, warning, error = pipeline.run()
+    if isinstance(results, dict):
+        results = {key: results[key] for key in RETURNED_RESULT_KEYS if key in results}
     if error is None:
         ret = {
             'status': 'success',
             'results': results,
             'data': data,
             'model_path': pipeline.robot_cfg.control.model_path,
+            'duration': duration,
         }
         if warning is not None:
             logger.warning(f"⚠️ Process with seed={seed}, base_mass={base_mass}, friction={friction} completed with warning: {warning}")
@@ -61,24 +55,79 @@ def run_single_process(args, data):
             'results': results,
             'model_path': pipeline.robot_cfg.control.model_path,
             'data': data,
+            'duration': duration,
             'error_msg': str(error),
             'traceback': traceback.format_exc()
         }
     return ret
 
+def run_single_process(args, data):
+    from robogauge.utils.logger import logger
+    start_time = time.time()
+    seed, base_mass, friction = data
+    local_args = deepcopy(args)
+    local_args.seed = seed
+    local_args.friction = friction
+    local_args.base_mass = base_mass
+    run_name = f"{local_args.run_name}_{seed}_baseMass{base_mass}_friction{friction}"
+    logger.create(
+        experiment_name=local_args.experiment_name,
+        run_name=run_name,
+        console_output=False,
+        parent_log_dir=args.parent_log_dir
+    )
+    pipeline = task_register.make_pipeline(args=local_args, create_logger=False)
+    results, warning, error = pipeline.run()
+    return make_process_result(pipeline, data, results, warning, error, duration=time.time()-start_time)
+
+def run_batched_process(args, data):
+    """ Run several seeds with the same domain parameters in one process (batched worlds). """
+    from robogauge.utils.logger import logger
+    start_time = time.time()
+    seeds, base_mass, friction = data
+    local_args = deepcopy(args)
+    local_args.friction = friction
+    local_args.base_mass = base_mass
+    run_name = f"{local_args.run_name}_{'-'.join(map(str, seeds))}_baseMass{base_mass}_friction{friction}"
+    logger.create(
+        experiment_name=local_args.experiment_name,
+        run_name=run_name,
+        console_output=False,
+        parent_log_dir=args.parent_log_dir
+    )
+    if local_args.write_tensorboard:
+        logger.warning("Tensorboard is disabled for batched worlds, all episodes share one process writer.")
+        local_args.write_tensorboard = False
+    episodes = []
+    for seed in seeds:
+        local_args.seed = seed
+        episodes.append(task_register.make_pipeline(args=deepcopy(local_args), create_logger=False))
+    episode_results = BatchedPipeline(episodes).run()
+    duration = (time.time() - start_time) / len(seeds)  # cost share of each episode
+    return [
+        make_process_result(episode, (seed, base_mass, friction), results, warning, error, duration=duration)
+        for episode, seed, (results, warning, error) in zip(episodes, seeds, episode_results)
+    ]
+
 class MultiPipeline:
-    def __init__(self, args, console_output=True, progress_data: ProgressData = None):
+    def __init__(self, args, console_output=True, progress_data: ProgressData = None, pool: Executor = None):
+        """ pool: shared worker pool of the top-level run, a new pool is created for this run if None. """
         self.args = args
+        self.pool = pool
         self.seeds = args.seeds
         self.frictions = args.frictions
         self.base_masses = args.base_masses
         self.console_output = console_output
         self.progress_data = progress_data
         self.num_processes = args.num_processes
+        self.num_worlds = max(1, getattr(args, 'num_worlds', 1))
         self.static_info = {}
+        self.cost_model = get_cost_model()
+        self.future_cost = 0.0  # expected wall time of the parent pipeline after this evaluation, see `TaskBatch`
         parent_log_dir = getattr(args, 'parent_log_dir', None)
-        multi_logger.create(args.experiment_name+'_multi', args.run_name+'_multi', console_output=console_output, parent_log_dir=parent_log_dir)
-        self.args.parent_log_dir = str(multi_logger.log_dir / "subtasks")
+        self.logger = Logger()
+        self.logger.create(args.experiment_name+'_multi', args.run_name+'_multi', console_output=console_output, parent_log_dir=parent_log_dir)
+        self.args.parent_log_dir = str(self.logger.log_dir / "subtasks")
         self.compress_logs = args.compress_logs
     
     def add_static_info(self, key: str, value):
@@ -87,51 +136,82 @@ class MultiPipeline:
         else:
             assert self.static_info[key] == value, f"Static info key '{key}' has conflicting values: {self.static_info[key]} vs {value}"
 
+    def cost_key(self, friction, level=None) -> str:
+        level = self.args.level if level is None else level
+        return make_cost_key(self.args.task_name, level, self.args.goals, friction)
+
+    def expected_cost(self, level=None) -> float:
+        """ Expected summed episode wall time of this evaluation (at `level`, defaults to args.level). """
+        return sum(
+            self.cost_model.predict(self.cost_key(friction, level))
+            for _, _, friction in product(self.seeds, self.base_masses, self.frictions)
+        )
+
     def run(self):
-        multi_logger.info(f"🚀 Starting Multi-Process Evaluation with {self.num_processes} processes.")
-        multi_logger.info(f"🔢 Seeds: {self.seeds}, Frictions: {self.frictions}, Base masses: {self.base_masses}")
-
-        workers_data = list(product(self.seeds, self.base_masses, self.frictions))
-        report_progress(self.progress_data, ProgressTypes.INIT, total=len(workers_data), desc="🚀 MultiPipeline")
-
-        ctx = multiprocessing.get_context('spawn')
-        worker_func = functools.partial(run_single_process, self.args)
-        results_list = []
-
-        def update_results(results):
-            results_list.append(results)
-            self.add_static_info('model_path', results['model_path'])
-            self.add_static_info('terrain_name', results['results']['terrain_name'])
-            self.add_static_info('terrain_level', results['results']['terrain_level'])
-            report_progress(self.progress_data, ProgressTypes.UPDATE, value=1)
-            if results['status'] != 'success':
-                data = results['data']
-                multi_logger.error(f"❌ Process with seed={data[0]}, base_mass={data[1]}, friction={data[2]} failed with error: {results['error_msg']}")
-
-        if self.num_processes == 1:
-            multi_logger.info("🚀 Running in Serial Mode")
-            bar = workers_data
-            if self.console_output:
-                bar = tqdm(workers_data, desc="Evaluation")
-            for data in bar:
-                results = worker_func(data)
-                update_results(results)
-        else:
-            with NoDaemonPool(processes=self.num_processes, context=ctx) as pool:
-                iterator = pool.imap_unordered(worker_func, workers_data)
-                bar = iterator
-                if self.console_output:
-                    bar = tqdm(iterator, total=len(workers_data), desc="Evaluation")
-                for results in bar:
-                    update_results(results)
-
-        multi_logger.info("✅ Multi-Process Evaluation Completed.")
-        aggregated_results = self.aggregate_results(results_list)
-        return aggregated_results
+        own_pool = self.pool is None and use_executor(self.args)
+        if not own_pool and self.pool is None:
+            self.logger.info("🚀 Running in Serial Mode")
+        with make_executor(self.args) if own_pool else nullcontext(self.pool) as pool:
+            return drive(self.iter_tasks(), pool, console_output=self.console_output)
+
+    def iter_tasks(self):
+        """ Generator of the evaluation, yields one `TaskBatch` of episodes and returns the aggregated results.
+        `run` drives it, StressPipeline interleaves it with other evaluations on one worker pool.
+        """
+        try:
+            self.logger.info(f"🚀 Starting Multi-Process Evaluation with {self.num_processes} processes.")
+            self.logger.info(f"🔢 Seeds: {self.seeds}, Frictions: {self.frictions}, Base masses: {self.base_masses}")
+
+            num_episodes = len(self.seeds) * len(self.base_masses) * len(self.frictions)
+            if self.num_worlds > 1:  # group seeds with the same domain parameters into one process
+                self.logger.info(f"🌐 Batched worlds: {self.num_worlds} seeds per process.")
+                seed_batches = [tuple(self.seeds[i:i+self.num_worlds]) for i in range(0, len(self.seeds), self.num_worlds)]
+                workers_data = list(product(seed_batches, self.base_masses, self.frictions))
+                worker_func = functools.partial(run_batched_process, self.args)
+            else:
+                workers_data = list(product(self.seeds, self.base_masses, self.frictions))
+                worker_func = functools.partial(run_single_process, self.args)
+            report_progress(self.progress_data, ProgressTypes.INIT, total=num_episodes, desc="🚀 MultiPipeline")
+
+            results_list = []
+
+            def update_results(results):
+                for result in (results if isinstance(results, list) else [results]):
+                    results_list.append(result)
+                    if result.get('duration') is not None:
+                        self.cost_model.record(self.cost_key(result['data'][2]), result['duration'])
+                    self.add_static_info('model_path', result['model_path'])
+                    self.add_static_info('terrain_name', result['results']['terrain_name'])
+                    self.add_static_info('terrain_level', result['results']['terrain_level'])
+                    report_progress(self.progress_data, ProgressTypes.UPDATE, value=1)
+                    if result['status'] != 'success':
+                        data = result['data']
+                        self.logger.error(f"❌ Process with seed={data[0]}, base_mass={data[1]}, friction={data[2]} failed with error: {result['error_msg']}")
+
+            def task_cost(data):
+                seeds, _, friction = data
+                return self.cost_model.predict(self.cost_key(friction)) * (len(seeds) if self.num_worlds > 1 else 1)
+
+            def task_key(data):
+                seeds, base_mass, friction = data
+                seeds = '-'.join(map(str, seeds)) if self.num_worlds > 1 else seeds
+                return f"{self.cost_key(friction)}|{self.args.spawn_type}|S{seeds}|M{base_mass}"
+
+            yield TaskBatch(
+                worker_func, workers_data, on_result=update_results,
+                cost=task_cost, key=task_key, future_cost=self.future_cost,
+            )
+
+            self.cost_model.save()
+            self.logger.info("✅ Multi-Process Evaluation Completed.")
+            aggregated_results = self.aggregate_results(results_list)
+            return aggregated_results
+        finally:
+            self.logger.close()
     
     def aggregate_results(self, all_results):
         """ Process results from all processes and aggregate them. """
-        multi_logger.info("📊 Aggregating Results from all runs...")
+        self.logger.info("📊 Aggregating Results from all runs...")
 
         summary = {'success': {}, **self.static_info, 'summary': {}, 'terrain_weighted_summary': {}}
         finish_msg = (
@@ -146,10 +226,10 @@ class MultiPipeline:
             finish_msg += f"{seed:^10}{base_mass:^15}{friction:^15}{status_str:^10}\n"
             summary['success'][f"Seed_{seed}_BaseMass_{base_mass}_Friction_{friction}"] = True if success else False
         finish_msg += f"""{'='*88}"""
-        multi_logger.info(finish_msg)
+        self.logger.info(finish_msg)
 
         if not all_results:
-            multi_logger.error("No results to aggregate.")
+            self.logger.error("No results to aggregate.")
             return
         
         value_collections = defaultdict(lambda: defaultdict(list))
@@ -159,13 +239,13 @@ class MultiPipeline:
                     continue
                 for metric, means in metrics.items():
                     for mean_name, mean_value in means.items():
-                        value_collections[metric][mean_name].append(float(mean_value.split(' ')[0]))
+                        value_collections[metric][mean_name].append(mean_value.mean)
         
         for metric, means in value_collections.items():
             summary['summary'][metric] = {}
             for mean_name, values in means.items():
                 v = float(np.mean(values))
-                summary['summary'][metric][mean_name] = f"{v:.4f} ± {float(np.std(values)):.4f}"
+                summary['summary'][metric][mean_name] = Stat.of(values)
 
             if 'quality_score' in metric: continue
             summary['terrain_weighted_summary'][metric] = {}
@@ -173,17 +253,22 @@ class MultiPipeline:
                 twv = float(np.mean(values))
                 if summary['terrain_name'] in SEARCH_LEVELS_TERRAINS:
                     twv = 0.09 * (summary['terrain_level'] - 1) + 0.19 * v
-                summary['terrain_weighted_summary'][metric][mean_name] = f"{twv:.4f} ± {float(np.std(values)):.4f}"
+                summary['terrain_weighted_summary'][metric][mean_name] = Stat(twv, float(np.std(values)))
+
+        timing = merge_timings([result['results'].get('timing') for result in all_results])
+        if timing is not None:
+            summary['timing'] = timing
+            self.logger.info(f"⏱️ {timing['num_runs']} runs, steps/s per worker: {timing['steps_per_second']:.1f}, real time factor: {timing['real_time_factor']:.2f}")
         
-        save_path = multi_logger.log_dir / "aggregated_results.yaml"
+        save_path = self.logger.log_dir / "aggregated_results.yaml"
         with open(save_path, 'w') as file:
-            yaml.dump(summary, file, allow_unicode=True, sort_keys=False)
-        multi_logger.info("✅ Aggregated execution finished.")
-        multi_logger.info(f"📁 Aggregated results saved to: {save_path}")
+            yaml.dump(format_results(summary), file, allow_unicode=True, sort_keys=False)
+        self.logger.info("✅ Aggregated execution finished.")
+        self.logger.info(f"📁 Aggregated results saved to: {save_path}")
 
         if self.compress_logs:
-            compress_directory(multi_logger.log_dir / "subtasks", delete_original=True, logger=multi_logger)
-        # multi_logger.info(
+            compress_directory(self.logger.log_dir / "subtasks", delete_original=True, logger=self.logger)
+        # self.logger.info(
         #     f"""\n{'='*20} Multi-Run Summary {'='*20}\n"""
         #     f"""{yaml.dump(summary, allow_unicode=True)}"""
         #     f"""{'='*60}"""
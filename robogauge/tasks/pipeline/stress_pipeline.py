@@ -15,29 +15,35 @@ absl.logging.set_verbosity(absl.logging.ERROR)
 
 import yaml
 import traceback
-import functools
 import numpy as np
 from tqdm import tqdm
-import multiprocessing
 from copy import deepcopy
+from contextlib import nullcontext
 from itertools import product
 from collections import defaultdict
+from typing import Callable
 
 from robogauge.utils.logger import Logger
-from robogauge.utils.process_utils import NoDaemonPool
-from robogauge.utils.progress_monitor import report_progress, ProgressTypes, start_progress_monitor_thread, ProgressData
+from robogauge.utils.process_utils import Executor, make_executor
+from robogauge.utils.progress_monitor import report_progress, ProgressTypes, start_progress_monitor_thread, ProgressData, MAIN_BAR_ID
 from robogauge.tasks.pipeline import MultiPipeline, LevelPipeline
 from robogauge.tasks.gauge.gauge_configs.terrain_levels_config import SEARCH_LEVELS_TERRAINS
 from robogauge.utils.file_utils import compress_directory
-
-stress_logger = Logger()  # StressPipeline logger
+from robogauge.utils.measure import merge_timings, Stat, format_results
+from robogauge.utils.task_graph import TaskGraphScheduler
+from robogauge.utils.cost_model import get_cost_model, make_cost_key
+from robogauge.utils.journal import Journal, make_fingerprint
+from robogauge.utils.task_register import task_register
 
 GOALS = {
     'level_pipeline': ['target_pos_velocity'],
     'multi_pipeline': ['max_velocity', 'diagonal_velocity']
 }
 
-def run_pipeline(args, progress_queue, data):
+def stress_task(args, progress_queue, data):
+    """ Task graph of one (terrain, friction, mass): level search bisection steps -> final multi evaluation.
+    Generator of episode `TaskBatch`es, driven by `TaskGraphScheduler`, returns the task results.
+    """
     try:
         args = deepcopy(args)
         task_id = data['task_id']
@@ -48,6 +54,9 @@ def run_pipeline(args, progress_queue, data):
             msg_prefix=task_label + ' ',
             progress_queue=progress_queue
         )
+        report_progress(progress_data, ProgressTypes.RESULT, value={
+            'terrain_name': data['terrain_name'], 'base_mass': data['base_mass'], 'friction': data['friction'],
+        })
 
         args.friction = data['friction']
         args.frictions = [data['friction']]
@@ -59,20 +68,28 @@ def run_pipeline(args, progress_queue, data):
         if search is True:
             args.goals = GOALS['level_pipeline']
             args.spawn_type = "level_search"
-            level, level_results = LevelPipeline(args, console_output=False, progress_data=progress_data).run()
+            level_pipeline = LevelPipeline(args, console_output=False, progress_data=progress_data)
+            final_key = make_cost_key(args.task_name, '*', GOALS['multi_pipeline'], data['friction'])  # level unknown yet
+            level_pipeline.future_cost = len(args.seeds) * get_cost_model().predict(final_key)
+            level, level_results = yield from level_pipeline.iter_tasks()
+            report_progress(progress_data, ProgressTypes.RESULT, value={'level': level})
             if level == 0:  # no valid level found
+                report_progress(progress_data, ProgressTypes.RESULT, value={'score': 0.0})
                 report_progress(progress_data, ProgressTypes.FINISH, desc=f"❌ Failed (Lv 0)")
                 results = {
                     'success': False,
                     'results': level_results,
                     'data': data,
                     'level': 0,
+                    'search_timing': level_results.get('search_timing'),
                 }
                 return results
+            search_timing = level_results.get('search_timing')
             report_progress(progress_data, ProgressTypes.RESET, total=0, desc=f"✅ Found Lv {level} -> Running")
             progress_data.msg_prefix += f"(Lv {level}) "
         else:
             level = None  # flat terrain
+            search_timing = None
             args.task_name = f"{data['task_robot_model']}.{data['terrain_name']}"
             args.experiment_name = f"{args.experiment_name}_{data['terrain_name']}"
             
@@ -81,10 +98,13 @@ def run_pipeline(args, progress_queue, data):
         args.spawn_type = "level_eval"
         results = {
             'success': True,
-            'results': MultiPipeline(args, console_output=False, progress_data=progress_data).run(),
+            'results': (yield from MultiPipeline(args, console_output=False, progress_data=progress_data).iter_tasks()),
             'data': data,
             'level': level,
+            'search_timing': search_timing,
         }
+        tqs = results['results']['summary'].get('terrain_quality_score', {}).get('mean@50')
+        report_progress(progress_data, ProgressTypes.RESULT, value={'score': tqs.mean if tqs is not None else None})
         report_progress(progress_data, ProgressTypes.FINISH, desc=f"✅ Done (Lv {level})")
         return results
     except Exception as e:
@@ -100,17 +120,26 @@ def run_pipeline(args, progress_queue, data):
         raise RuntimeError(error_context) from e
 
 class StressPipeline:
-    def __init__(self, args):
+    def __init__(self, args, pool: Executor = None, on_progress: Callable = None):
+        """
+        pool: long-lived worker pool (e.g. shared by the server jobs), a new pool is created for this run if None.
+        on_progress: called with every progress message (task_id, msg_type, data), e.g. `ProgressState.update`.
+        """
         self.args = args
+        self.pool = pool
+        self.on_progress = on_progress
         self.task_robot_model = args.task_name.split('.')[0]
         self.num_processes = args.num_processes
         args.experiment_name = self.task_robot_model + '_stress' + ('' if args.cli_experiment_name is None else '_' + args.cli_experiment_name)
         self.static_info = {}
-        stress_logger.create(args.experiment_name, args.run_name)
-        self.args.parent_log_dir = str(stress_logger.log_dir / "subtasks")
+        self.logger = Logger()
+        resume_dir = getattr(args, 'resume', None)
+        self.logger.create(args.experiment_name, args.run_name, log_dir=resume_dir)
+        if resume_dir:
+            self.logger.info(f"🔁 Resume stress benchmark from: {resume_dir}")
+        self.args.parent_log_dir = str(self.logger.log_dir / "subtasks")
         self.compress_logs = args.compress_logs
         args.compress_logs = False  # Disable child log compression
-        args.num_processes = 1  # Disable child multi-process
 
     def add_static_info(self, key: str, value):
         if key not in self.static_info:
@@ -119,57 +148,75 @@ class StressPipeline:
             assert self.static_info[key] == value, f"Static info key '{key}' has conflicting values: {self.static_info[key]} vs {value}"
 
     def run(self):
-        stress_logger.info(f"🚀 Starting Stress Benchmark for '{self.args.experiment_name}'.")
-        stress_logger.info(f"🔢 Seeds: {self.args.seeds}, Level Search Seeds: {self.args.search_seeds}")
-        terrain_names = self.args.stress_terrain_names
-        stress_logger.info(f"🌄 Stress Test Terrain Names: {terrain_names}")
-
-        ### Build worker data ###
-        workers_data = []
-        for terrain_name in terrain_names:
-            search_max_level = True
-            if terrain_name not in SEARCH_LEVELS_TERRAINS:  # Flattened terrain
-                search_max_level = False
-            data = {
-                'task_robot_model': self.task_robot_model,
-                'terrain_name': terrain_name,
-                'search_max_level': search_max_level,
-            }
-            for friction, base_mass in product(self.args.frictions, self.args.base_masses):
-                now_data = deepcopy(data)
-                now_data.update({
-                    'friction': friction,
-                    'base_mass': base_mass,
-                })
-                workers_data.append(now_data)
-
-        ### Start progress monitor ###
-        progress_queue, monitor_thread = start_progress_monitor_thread(len(workers_data))
-        for i, data in enumerate(workers_data):
-            data['task_id'] = i
-
-        ### Run and collect results ###
-        ctx = multiprocessing.get_context('spawn')
-        worker_func = functools.partial(run_pipeline, self.args, progress_queue)
-        results_list = []
         try:
-            with NoDaemonPool(processes=self.num_processes, context=ctx) as pool:
-                iterator = pool.imap_unordered(worker_func, workers_data)
-                for results in iterator:
-                    results_list.append(results)
-                    self.add_static_info('model_path', results['results'].pop('model_path', None))
-        except Exception as e:
-            stress_logger.error(f"❌ Stress benchmark encountered an error: {e}, {traceback.format_exc()}")
-        finally:
-            progress_queue.put(None)  # Stop the progress monitor thread
-            monitor_thread.join()
+            self.logger.info(f"🚀 Starting Stress Benchmark for '{self.args.experiment_name}'.")
+            self.logger.info(f"🔢 Seeds: {self.args.seeds}, Level Search Seeds: {self.args.search_seeds}")
+            terrain_names = self.args.stress_terrain_names
+            self.logger.info(f"🌄 Stress Test Terrain Names: {terrain_names}")
+
+            ### Build worker data ###
+            workers_data = []
+            for terrain_name in terrain_names:
+                search_max_level = True
+                if terrain_name not in SEARCH_LEVELS_TERRAINS:  # Flattened terrain
+                    search_max_level = False
+                data = {
+                    'task_robot_model': self.task_robot_model,
+                    'terrain_name': terrain_name,
+                    'search_max_level': search_max_level,
+                }
+                for friction, base_mass in product(self.args.frictions, self.args.base_masses):
+                    now_data = deepcopy(data)
+                    now_data.update({
+                        'friction': friction,
+                        'base_mass': base_mass,
+                    })
+                    workers_data.append(now_data)
+
+            ### Open the journal, a resumed journal must have the same config fingerprint ###
+            task_cfgs = []
+            for terrain_name in terrain_names:
+                cfgs = task_register.get_cfgs(f"{self.task_robot_model}.{terrain_name}")
+                task_register.update_args_to_cfg(*cfgs, self.args)
+                task_cfgs.append(cfgs)
+            model_paths = [robot_cfg.control.model_path for _, _, robot_cfg in task_cfgs]
+            journal = Journal(self.logger.log_dir / "journal.jsonl", make_fingerprint(self.args, model_paths, task_cfgs), logger=self.logger)
+
+            ### Start progress monitor ###
+            progress_queue, monitor_thread = start_progress_monitor_thread(len(workers_data), on_message=self.on_progress)
+            for i, data in enumerate(workers_data):
+                data['task_id'] = i
+            eta_progress = ProgressData(progress_queue=progress_queue, task_id=MAIN_BAR_ID)
+            report_progress(eta_progress, ProgressTypes.INIT, total=len(workers_data))
+
+            ### Run and collect results ###
+            # All episodes of all tasks share the pool: the next bisection step or the final evaluation
+            # of a task is ready as soon as its previous episodes finished, longest expected episodes start first.
+            results_list = []
+            def collect(name, results):
+                results_list.append(results)
+                self.add_static_info('model_path', results['results'].pop('model_path', None))
+            try:
+                with nullcontext(self.pool) if self.pool is not None else make_executor(self.args) as pool:
+                    scheduler = TaskGraphScheduler(pool, logger=self.logger, journal=journal)
+                    scheduler.run({
+                        data['task_id']: stress_task(self.args, progress_queue, data) for data in workers_data
+                    }, on_finish=collect, on_eta=lambda eta: report_progress(eta_progress, ProgressTypes.ETA, value=eta))
+            except Exception as e:
+                self.logger.error(f"❌ Stress benchmark encountered an error: {e}, {traceback.format_exc()}")
+            finally:
+                journal.close()
+                progress_queue.put(None)  # Stop the progress monitor thread
+                monitor_thread.join()
         
-        stress_logger.info("✅ Stress Benchmark Completed.")
-        stress_results = self.aggregate_results(results_list)
-        return stress_results
+            self.logger.info("✅ Stress Benchmark Completed.")
+            stress_results = self.aggregate_results(results_list)
+            return stress_results
+        finally:
+            self.logger.close()
 
     def aggregate_results(self, all_results):
-        stress_logger.info("📊 Aggregating Stress Benchmark Results...")
+        self.logger.info("📊 Aggregating Stress Benchmark Results...")
         finish_msg = (
             f"""\n{'='*20} Stress Benchmark Summary {'='*20}\n"""
             f"""{'Seeds':^20}{str(self.args.seeds):^15}{'Level Search Seeds':^20}{str(self.args.search_seeds):^15}\n"""
@@ -183,10 +230,10 @@ class StressPipeline:
             status = f"{result['level']}" if result['success'] else "❌"
             finish_msg += f"{terrain_name:^20}{str(base_mass):^15}{str(friction):^15}{status:^15}\n"
         finish_msg += f"""{'='*66}"""
-        stress_logger.info(finish_msg)
+        self.logger.info(finish_msg)
 
         if not all_results:
-            stress_logger.error("No results to aggregate.")
+            self.logger.error("No results to aggregate.")
             return
 
         summary = {**self.static_info, 'summary': {}, 'robust_score': {}, 'benchmark_score': 0.0, 'scores': {}}
@@ -195,7 +242,11 @@ class StressPipeline:
         terrain_collections = defaultdict(lambda: defaultdict(list))
         zero_terrain_count = defaultdict(lambda: 0)
         robust_score = summary['robust_score']
+        timings = []
         for result in all_results:
+            timings.append(result.get('search_timing'))
+            if result['level'] != 0:
+                timings.append(result['results'].get('timing'))
             terrain_name = result['data']['terrain_name']
             terrain_level = result['level']  # None, 0, 1, ..., 10
             scores[terrain_name] = 0.0
@@ -209,18 +260,16 @@ class StressPipeline:
             summary[key] = result['results']
 
             for metric, means in result['results']['terrain_weighted_summary'].items():
-                for mean_name, value_str in means.items():
-                    value = float(value_str.split(' ± ')[0])
-                    metric_collections[metric][mean_name].append(value)
-            for mean_name, value_str in result['results']['summary']['terrain_quality_score'].items():
-                value = float(value_str.split(' ± ')[0])
-                terrain_collections[terrain_name][mean_name].append(value)
+                for mean_name, stat in means.items():
+                    metric_collections[metric][mean_name].append(stat.mean)
+            for mean_name, stat in result['results']['summary']['terrain_quality_score'].items():
+                terrain_collections[terrain_name][mean_name].append(stat.mean)
 
         for metric, means in metric_collections.items():
             summary['summary'][metric] = {}
             for mean_name, values in means.items():
                 values.extend([0.0] * sum(zero_terrain_count.values()))  # include zero terrains
-                summary['summary'][metric][mean_name] = f"{float(np.mean(values)):.4f} ± {float(np.std(values)):.4f}"
+                summary['summary'][metric][mean_name] = Stat.of(values)
         
         for terrain_name, means in terrain_collections.items():
             for mean_name, values in means.items():
@@ -232,13 +281,17 @@ class StressPipeline:
                 robust_score[terrain_name] = None
         summary['benchmark_score'] = float(np.mean(list(scores.values())))
         scores['benchmark'] = summary['benchmark_score']
+        timing = merge_timings(timings)
+        if timing is not None:
+            summary['timing'] = timing
+            self.logger.info(f"⏱️ {timing['num_runs']} runs, steps/s per worker: {timing['steps_per_second']:.1f}, real time factor: {timing['real_time_factor']:.2f}")
 
-        save_path = stress_logger.log_dir / "stress_benchmark_results.yaml"
+        save_path = self.logger.log_dir / "stress_benchmark_results.yaml"
         with open(save_path, 'w') as file:
-            yaml.dump(summary, file, allow_unicode=True, sort_keys=False)
-        stress_logger.info(f"✅ Stress benchmark aggregated execution finished.")
-        stress_logger.info(f"📁 Stress benchmark results saved to: {save_path}")
+            yaml.dump(format_results(summary), file, allow_unicode=True, sort_keys=False)
+        self.logger.info(f"✅ Stress benchmark aggregated execution finished.")
+        self.logger.info(f"📁 Stress benchmark results saved to: {save_path}")
 
         if self.compress_logs:
-            compress_directory(stress_logger.log_dir / "subtasks", delete_original=True, logger=stress_logger)
+            compress_directory(self.logger.log_dir / "subtasks", delete_original=True, logger=self.logger)
         return summary
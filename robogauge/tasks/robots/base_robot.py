@@ -7,15 +7,38 @@
 @Blog    : https://wty-yy.github.io/
 @Desc    : Base Robot Class
 '''
+import os
+import copy
 import torch
 import numpy as np
+from typing import List
+from collections import OrderedDict
 
 from robogauge.utils.helpers import parse_path
 from robogauge.utils.logger import logger
 from robogauge.tasks.robots.base_robot_config import RobotConfig
+from robogauge.tasks.robots.inference import (
+    TorchScriptBackend, make_backend, check_parity, measure_latency, get_module_state, set_module_state
+)
 from robogauge.tasks.simulator.sim_data import SimData
 from robogauge.tasks.gauge.goal_data import GoalData
 
+POLICY_CACHE_SIZE = 4
+policy_cache = OrderedDict()  # (path, mtime, device) -> TorchScript model, warm in long-lived worker processes
+backend_cache = OrderedDict()  # (path, mtime, device, backend, threads, check) -> (backend or None for fallback, inference info)
+
+def load_policy_model(model_path: str, device: str) -> torch.jit.ScriptModule:
+    """ Load a TorchScript policy, repeated loads of the same file return a copy of the cached model
+    (each robot keeps its own hidden state).
+    """
+    key = (str(model_path), os.path.getmtime(model_path), str(device))
+    if key not in policy_cache:
+        policy_cache[key] = torch.jit.load(model_path, map_location=device)
+        while len(policy_cache) > POLICY_CACHE_SIZE:
+            policy_cache.popitem(last=False)
+    policy_cache.move_to_end(key)
+    return copy.deepcopy(policy_cache[key])
+
 class BaseRobot:
     def __init__(self, cfg: RobotConfig):
         self.cfg = cfg
@@ -27,13 +50,84 @@ class BaseRobot:
         self.d_gains = np.array(cfg.control.d_gains)
         model_path = parse_path(cfg.control.model_path)
         logger.info(f"Loading robot model from '{model_path}'")
-        self.model = torch.jit.load(model_path).to(self.device)
+        self.model = load_policy_model(model_path, self.device).to(self.device)
         self.model.eval()
+        self.hidden_state_names = [name for name in cfg.control.hidden_state_names if hasattr(self.model, name)]
+        self.num_threads = getattr(cfg.control, 'num_threads', 0)  # torch threads are set once per process, see `warm_up_worker`
+        self.inference_info = {}
+        self.policy = self.load_backend(getattr(cfg.control, 'inference_backend', 'torchscript'), model_path)
+        self.batch_inference = getattr(cfg.control, 'batch_inference', True)
+        self.batch_parity = None  # result of the first batched forward check, see `get_actions`
     
+    def load_backend(self, name: str, model_path: str):
+        """ Inference backend `name` of the policy file, built (with parity check and latencies) once per process
+        and reused by the robots of the next episodes, each stateful robot gets a copy holding its own hidden state.
+        `self.model` becomes the module holding the hidden state.
+        """
+        if name == 'torchscript':
+            return TorchScriptBackend(self.model)
+        if self.device != 'cpu':
+            logger.warning(f"⚠️ Inference backend '{name}' is CPU only, use torchscript on device '{self.device}'.")
+            return TorchScriptBackend(self.model)
+        key = (
+            str(model_path), os.path.getmtime(model_path), str(self.device), name, self.num_threads,
+            getattr(self.cfg.control, 'inference_check', True),
+        )
+        if key not in backend_cache:
+            backend_cache[key] = self.build_backend(name)
+            while len(backend_cache) > POLICY_CACHE_SIZE:
+                backend_cache.popitem(last=False)
+        backend_cache.move_to_end(key)
+        backend, inference_info = backend_cache[key]
+        self.inference_info = dict(inference_info)
+        if backend is None:
+            return TorchScriptBackend(self.model)
+        if len(self.hidden_state_names):
+            backend = copy.deepcopy(backend)
+        self.model = getattr(backend, 'module', self.model)
+        return backend
+
+    def build_backend(self, name: str):
+        """ Build the inference backend `name` from `self.model`.
+        Returns:
+            (backend, inference info), backend is None when it can't be built or its actions differ from the
+            reference TorchScript model (fall back to torchscript)
+        """
+        reference = TorchScriptBackend(self.model)
+        inference_info = {}
+        try:
+            backend = make_backend(name, self.model, self.num_obs, self.hidden_state_names, self.num_threads)
+            module = getattr(backend, 'module', self.model)
+            if getattr(self.cfg.control, 'inference_check', True):
+                obs = np.random.default_rng(0).standard_normal((8, self.num_obs)).astype(np.float32)
+                max_diff = check_parity(reference, backend, obs, self.model, module, self.hidden_state_names)
+                states = [get_module_state(m, self.hidden_state_names) for m in (self.model, module)]
+                latency = {'torchscript': measure_latency(reference, obs[0]), name: measure_latency(backend, obs[0])}
+                for m, state in zip((self.model, module), states):
+                    set_module_state(m, state)
+                inference_info = {'backend': name, 'max_abs_diff': max_diff, 'latency': latency}
+                logger.info(
+                    f"🧮 Inference backend '{name}': max action diff {max_diff:.2e}, latency "
+                    f"{latency[name]['mean_us']:.1f}us (p99 {latency[name]['p99_us']:.1f}us) vs torchscript "
+                    f"{latency['torchscript']['mean_us']:.1f}us (p99 {latency['torchscript']['p99_us']:.1f}us)"
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Inference backend '{name}' unavailable, fall back to torchscript: {e}")
+            return None, inference_info
+        return backend, inference_info
+
     def build_observation(self, sim_data: SimData, goal_data: GoalData) -> np.ndarray:
         obs = np.zeros(self.num_obs, dtype=np.float32)
         return obs
     
+    def forward(self, obs_tensor: torch.Tensor) -> torch.Tensor:
+        """ Policy forward, (B, num_obs) -> (B, num_action) in model joint order. """
+        return self.policy(obs_tensor)
+
+    def postprocess_action(self, action: np.ndarray):
+        """ Convert the raw policy output of this episode to the `get_action` tuple. """
+        return action, self.p_gains, self.d_gains, self.control_type
+
     def get_action(self, obs: np.ndarray):
         """
         Returns:
@@ -42,9 +136,86 @@ class BaseRobot:
             d_gains: (num_action,) derivative gains for Mujoco PD controller
             control_type: 'P', 'V', or 'T' for position/velocity/torque control
         """
-        action = np.zeros(self.num_action, dtype=np.float32)
-        return action, self.p_gains, self.d_gains, self.control_type
+        obs_tensor = torch.tensor(obs, dtype=torch.float32).unsqueeze(0).to(self.device)
+        action = self.forward(obs_tensor).detach().cpu().numpy().squeeze(0)
+        return self.postprocess_action(action)
+
+    def get_actions(self, obs_batch: np.ndarray, robots: List['BaseRobot']) -> list:
+        """ `get_action` for several episodes with one forward of this robot's model.
+        `robots[i]` keeps the hidden state (e.g. history) and last action of episode `i`, its rows are
+        concatenated before the forward and split back after it.
+        Args:
+            obs_batch: (B, num_obs) observations built by `robots[i].build_observation`
+        Returns:
+            list of B `get_action` tuples
+        """
+        if len(robots) > 1 and self.batch_inference and self.batch_parity is None:
+            self.batch_parity = self.check_batch_parity(obs_batch, robots)
+            if not self.batch_parity:
+                self.batch_inference = False
+        if len(robots) == 1 or not self.batch_inference:
+            return [robot.get_action(obs) for robot, obs in zip(robots, obs_batch)]
+        actions = self.forward_batch(obs_batch, robots)
+        return [robot.postprocess_action(action) for robot, action in zip(robots, actions)]
+
+    def forward_batch(self, obs_batch: np.ndarray, robots: List['BaseRobot']) -> np.ndarray:
+        own_state = self.get_hidden_state() if self not in robots else None
+        for name in self.hidden_state_names:
+            setattr(self.model, name, torch.cat([getattr(robot.model, name) for robot in robots], dim=0))
+        obs_tensor = torch.as_tensor(np.asarray(obs_batch), dtype=torch.float32).to(self.device)
+        with torch.no_grad():
+            actions = self.forward(obs_tensor).detach().cpu().numpy()
+        for name in self.hidden_state_names:
+            for robot, value in zip(robots, torch.split(getattr(self.model, name), 1, dim=0)):
+                setattr(robot.model, name, value.clone())
+        if own_state is not None:
+            self.set_hidden_state(own_state)
+        return actions
+
+    def check_batch_parity(self, obs_batch: np.ndarray, robots: List['BaseRobot'], atol: float = 1e-5) -> bool:
+        """ Compare one batched forward with per-episode forwards (actions and hidden states), states are restored.
+        Models that only support batch size 1 (e.g. reshape to [1, H, -1]) fail here and keep per-episode inference.
+        """
+        states = [robot.get_hidden_state() for robot in robots]
+        try:
+            with torch.no_grad():
+                expected = np.stack([
+                    robot.forward(torch.as_tensor(obs[None], dtype=torch.float32).to(self.device)).detach().cpu().numpy()[0]
+                    for robot, obs in zip(robots, obs_batch)
+                ])
+            expected_states = [robot.get_hidden_state() for robot in robots]
+            for robot, state in zip(robots, states):
+                robot.set_hidden_state(state)
+            actions = self.forward_batch(obs_batch, robots)
+            parity = actions.shape == expected.shape and np.allclose(actions, expected, atol=atol, rtol=1e-4)
+            for robot, expected_state in zip(robots, expected_states):
+                for name, value in robot.get_hidden_state().items():
+                    parity = parity and value.shape == expected_state[name].shape and \
+                        torch.allclose(value, expected_state[name], atol=atol, rtol=1e-4)
+            if not parity:
+                logger.warning(f"⚠️ Batched policy forward differs from per-episode forwards, fall back to per-episode inference.")
+        except Exception as e:
+            parity = False
+            logger.warning(f"⚠️ Batched policy forward failed ({e}), fall back to per-episode inference.")
+        for robot, state in zip(robots, states):
+            robot.set_hidden_state(state)
+        if parity:
+            logger.info(f"🧮 Batched policy inference enabled for {len(robots)} episodes.")
+        return parity
 
     def reset(self):
         """ Reset model state/history if needed """
         pass
+
+    def get_hidden_state(self) -> dict:
+        return get_module_state(self.model, self.hidden_state_names)
+
+    def set_hidden_state(self, state: dict):
+        set_module_state(self.model, state)
+
+    def get_state(self) -> dict:
+        """ Snapshot of the policy hidden state, restored by `set_state`. """
+        return {'model': self.get_hidden_state()}
+
+    def set_state(self, state: dict):
+        self.set_hidden_state(state['model'])
@@ -38,6 +38,11 @@ class RobotConfig(Config):
 
         mj2model_dof_indices = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
         save_additional_output = False
+        hidden_state_names = ['history']  # TorchScript model attributes kept in settled-state snapshots
+        inference_backend = 'torchscript'  # 'torchscript', 'optimized' (frozen, inference mode), 'onnx' or 'numpy' (stateless MLP only)
+        inference_check = True  # check a non-default backend against torchscript and log latencies, fall back on mismatch
+        num_threads = 0  # onnxruntime intra-op threads, 0 keeps the library default (torch threads are set once per process from --inference-threads)
+        batch_inference = True  # one forward for all episodes of a batched run (checked against per-episode forwards)
 
         class scales:
             lin_vel = 2.0
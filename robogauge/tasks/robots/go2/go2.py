@@ -26,40 +26,82 @@ class Go2(BaseRobot):
         self.action_scale = cfg.control.scales.action
         self.mj2model_idx = self.cfg.control.mj2model_dof_indices
         self.model2mj_idx = [self.mj2model_idx.index(i) for i in range(len(self.mj2model_idx))]
+        self.model2mj_order = np.array(self.model2mj_idx, dtype=np.intp)
+        self.compile_observation_layout()
     
+    def compile_observation_layout(self):
+        """ Precompute slices, index arrays, clamp bounds and scales of the velocity observation once.
+        `build_observation` writes into `self.obs`, a view of a float32 buffer shared with `self.obs_tensor`.
+        """
+        n = self.num_action
+        scales = self.cfg.control.scales
+        self.obs_buffer = np.zeros((1, self.num_obs), dtype=np.float32)
+        self.obs_tensor = torch.from_numpy(self.obs_buffer)  # shares memory with obs_buffer
+        self.obs = self.obs_buffer[0]
+        self.obs_slices = {
+            'ang_vel': slice(0, 3),
+            'projected_gravity': slice(3, 6),
+            'cmd': slice(6, 9),
+            'dof_pos': slice(9, 9+n),
+            'dof_vel': slice(9+n, 9+2*n),
+            'last_action': slice(9+2*n, 9+3*n),
+        }
+        self.mj2model_order = np.array(self.mj2model_idx, dtype=np.intp)
+        self.default_dof_pos_model = self.default_dof_pos[self.mj2model_order]
+        self.cmd_low = np.array([self.cmd_range.lin_vel_x[0], self.cmd_range.lin_vel_y[0], self.cmd_range.ang_vel_yaw[0]], dtype=np.float32)
+        self.cmd_high = np.array([self.cmd_range.lin_vel_x[1], self.cmd_range.lin_vel_y[1], self.cmd_range.ang_vel_yaw[1]], dtype=np.float32)
+        self.cmd_scale = np.array(scales.cmd, dtype=np.float32)
+        self.obs_scales = {'ang_vel': scales.ang_vel, 'dof_pos': scales.dof_pos, 'dof_vel': scales.dof_vel}
+        self.joint_buffer = np.zeros(n)  # mujoco joint data (float64) gathered in model order
+
     def build_observation(self, sim_data: SimData, goal_data: GoalData) -> np.ndarray:
+        """ Returns `self.obs`, overwritten by the next call. """
+        if goal_data.goal_type != 'velocity':
+            raise NotImplementedError(f"Goal type '{goal_data.goal_type}' not implemented in Go2 robot.")
         sim_proprio = sim_data.proprio
-        obs = np.zeros(self.num_obs)
-        if goal_data.goal_type == 'velocity':
-            ang_vel = sim_proprio.imu.ang_vel * self.cfg.control.scales.ang_vel
-            projected_gravity = get_projected_gravity(sim_proprio.imu.quat)
-            dof_pos = (sim_proprio.joint.pos - self.default_dof_pos) * self.cfg.control.scales.dof_pos
-            dof_vel = sim_proprio.joint.vel * self.cfg.control.scales.dof_vel
+        obs, sl, scales = self.obs, self.obs_slices, self.obs_scales
 
-            goal = goal_data.velocity_goal
-            cmd = np.array([goal.lin_vel_x, goal.lin_vel_y, goal.ang_vel_yaw], dtype=np.float32)
-            cmd = np.minimum(np.maximum(cmd, np.array([self.cmd_range.lin_vel_x[0], self.cmd_range.lin_vel_y[0], self.cmd_range.ang_vel_yaw[0]], dtype=np.float32)), 
-                             np.array([self.cmd_range.lin_vel_x[1], self.cmd_range.lin_vel_y[1], self.cmd_range.ang_vel_yaw[1]], dtype=np.float32))
-            
-            cmd *= self.cfg.control.scales.cmd
+        np.multiply(sim_proprio.imu.ang_vel, scales['ang_vel'], out=obs[sl['ang_vel']])
+        get_projected_gravity(sim_proprio.imu.quat, out=obs[sl['projected_gravity']])
 
-            obs[:3] = ang_vel
-            obs[3:6] = projected_gravity
-            obs[6:9] = cmd
-            obs[9:9+self.num_action] = dof_pos[self.mj2model_idx]
-            obs[9+self.num_action:9+2*self.num_action] = dof_vel[self.mj2model_idx]
-            obs[9+2*self.num_action:9+3*self.num_action] = self.last_action[self.mj2model_idx]
-        else:
-            raise NotImplementedError(f"Goal type '{goal_data.goal_type}' not implemented in Go2 robot.")
+        goal = goal_data.velocity_goal
+        cmd = obs[sl['cmd']]
+        cmd[0], cmd[1], cmd[2] = goal.lin_vel_x, goal.lin_vel_y, goal.ang_vel_yaw
+        np.clip(cmd, self.cmd_low, self.cmd_high, out=cmd)
+        cmd *= self.cmd_scale
+
+        dof_pos = obs[sl['dof_pos']]
+        np.take(sim_proprio.joint.pos, self.mj2model_order, out=self.joint_buffer)
+        np.subtract(self.joint_buffer, self.default_dof_pos_model, out=dof_pos)
+        dof_pos *= scales['dof_pos']
+
+        dof_vel = obs[sl['dof_vel']]
+        np.take(sim_proprio.joint.vel, self.mj2model_order, out=self.joint_buffer)
+        np.multiply(self.joint_buffer, scales['dof_vel'], out=dof_vel)
+
+        np.take(self.last_action, self.mj2model_order, out=obs[sl['last_action']])
         return obs
     
     def reset(self):
-        self.last_action = np.zeros(self.num_action, dtype=np.float32)
+        self.last_action[:] = 0
         self.model.reset()  # reset history
 
+    def get_state(self) -> dict:
+        state = super().get_state()
+        state['last_action'] = self.last_action.copy()
+        return state
+
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self.last_action[:] = state['last_action']
+
     def get_action(self, obs: np.ndarray):
-        obs_tensor = torch.tensor(obs, dtype=torch.float32).unsqueeze(0).to(self.device)
-        action = self.model(obs_tensor).detach().cpu().numpy().squeeze(0)[self.model2mj_idx]
-        self.last_action = action
-        target_dof_pos = action * self.action_scale + self.default_dof_pos
+        if obs is not self.obs:  # observation not built by this robot
+            return super().get_action(obs)
+        action = self.forward(self.obs_tensor.to(self.device)).detach().cpu().numpy().squeeze(0)
+        return self.postprocess_action(action)
+
+    def postprocess_action(self, action: np.ndarray):
+        np.take(action, self.model2mj_order, out=self.last_action)
+        target_dof_pos = self.last_action * self.action_scale + self.default_dof_pos
         return target_dof_pos, self.p_gains, self.d_gains, self.control_type
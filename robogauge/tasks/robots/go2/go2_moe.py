@@ -19,11 +19,12 @@ class Go2MoE(Go2):
         super().__init__(cfg)
         self.save_info = defaultdict(list)
         self.save_count = 0
+        if self.cfg.control.save_additional_output:  # expert weights are saved per episode
+            self.batch_inference = False
 
-    def get_action(self, obs: np.ndarray):
-        obs_tensor = torch.tensor(obs, dtype=torch.float32).unsqueeze(0).to(self.device)
-        action, results = self.model(obs_tensor)
-        if isinstance(results, tuple):
+    def forward(self, obs_tensor: torch.Tensor) -> torch.Tensor:
+        action, results = self.policy(obs_tensor)
+        if isinstance(results, tuple) and self.cfg.control.save_additional_output:
             latent = results[-1]
             latent = latent.detach().cpu().numpy().squeeze(0) if latent is not None else None
             student_weights = None
@@ -34,16 +35,12 @@ class Go2MoE(Go2):
             if len(results) >= 3:
                 actor_weights = results[1]
                 actor_weights = actor_weights.detach().cpu().numpy().squeeze(0) if actor_weights is not None else None
-            if self.cfg.control.save_additional_output:
-                self.save_info['latent'].append(latent)
-                if student_weights is not None:
-                    self.save_info['weights'].append(student_weights)
-                if actor_weights is not None:
-                    self.save_info['actor_weights'].append(actor_weights)
-        action = action.detach().cpu().numpy().squeeze(0)[self.model2mj_idx]
-        self.last_action = action
-        target_dof_pos = action * self.action_scale + self.default_dof_pos
-        return target_dof_pos, self.p_gains, self.d_gains, self.control_type
+            self.save_info['latent'].append(latent)
+            if student_weights is not None:
+                self.save_info['weights'].append(student_weights)
+            if actor_weights is not None:
+                self.save_info['actor_weights'].append(actor_weights)
+        return action
 
     def reset(self):
         super().reset()
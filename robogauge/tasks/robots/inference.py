@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : inference.py
+@Time    : 2026/10/17 20:12:36
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : CPU inference backends for TorchScript robot policies, include:
+- torchscript: reference `torch.jit.load` model under `torch.no_grad`
+- optimized: frozen + `optimize_for_inference` TorchScript under `torch.inference_mode`
+- onnx: ONNX Runtime session exported from the TorchScript model (stateless policies)
+- numpy: pure NumPy MLP from the Linear/activation layers (stateless MLP actors)
+'''
+import io
+import time
+import torch
+import numpy as np
+from typing import List
+
+from robogauge.utils.logger import logger
+
+INFERENCE_BACKENDS = ['torchscript', 'optimized', 'onnx', 'numpy']
+
+class TorchScriptBackend:
+    def __init__(self, module: torch.jit.ScriptModule, inference_mode: bool = False):
+        self.module = module  # holds the hidden state (e.g. history) of the policy
+        self.inference_mode = inference_mode
+
+    def __call__(self, obs_tensor: torch.Tensor):
+        with torch.inference_mode() if self.inference_mode else torch.no_grad():
+            return self.module(obs_tensor)
+
+def make_optimized_backend(model: torch.jit.ScriptModule, hidden_state_names: List[str]) -> TorchScriptBackend:
+    """ Freeze the model, hidden state attributes and `reset` stay mutable. Inference mode tensors can't be
+    updated in place outside of it, so stateful models run under `no_grad`.
+    """
+    preserved_attrs = list(hidden_state_names) + [name for name in ['reset'] if hasattr(model, name)]
+    module = torch.jit.freeze(model.eval(), preserved_attrs=preserved_attrs)
+    try:
+        module = torch.jit.optimize_for_inference(module)
+    except Exception as e:
+        logger.warning(f"⚠️ torch.jit.optimize_for_inference failed, use the frozen model: {e}")
+    return TorchScriptBackend(module, inference_mode=len(hidden_state_names) == 0)
+
+class OnnxBackend:
+    def __init__(self, model: torch.jit.ScriptModule, num_obs: int, num_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX backend requires onnx and onnxruntime, install with 'pip install onnx onnxruntime'.") from e
+        buffer = io.BytesIO()
+        torch.onnx.export(
+            model, torch.zeros(1, num_obs, dtype=torch.float32), buffer,
+            input_names=['obs'], output_names=['action'],
+            dynamic_axes={'obs': {0: 'batch'}, 'action': {0: 'batch'}},
+        )
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(buffer.getvalue(), options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, obs_tensor: torch.Tensor) -> torch.Tensor:
+        action = self.session.run(None, {'obs': obs_tensor.numpy()})[0]
+        return torch.from_numpy(action)
+
+class NumpyMLPBackend:
+    """ Run the Linear/activation leaf modules of the model in registration order, only valid for plain MLP
+    actors (the parity check catches models with any other logic in `forward`).
+    """
+    activations = {
+        'ELU': lambda m: (lambda x, a=float(getattr(m, 'alpha', 1.0)): np.where(x > 0, x, a * np.expm1(x))),
+        'ReLU': lambda m: (lambda x: np.maximum(x, 0)),
+        'LeakyReLU': lambda m: (lambda x, s=float(getattr(m, 'negative_slope', 0.01)): np.where(x > 0, x, s * x)),
+        'Tanh': lambda m: np.tanh,
+        'Sigmoid': lambda m: (lambda x: 1 / (1 + np.exp(-x))),
+        'Identity': lambda m: (lambda x: x),
+    }
+    skipped = ['Sequential', 'ModuleList', 'Dropout']
+
+    def __init__(self, model: torch.jit.ScriptModule):
+        self.layers = []
+        num_linear = 0
+        for name, module in model.named_modules():
+            if name == '':
+                continue
+            kind = getattr(module, 'original_name', type(module).__name__)
+            if kind == 'Linear':
+                weight = module.weight.detach().cpu().numpy().astype(np.float32)
+                bias = module.bias.detach().cpu().numpy().astype(np.float32) if module.bias is not None else np.zeros(weight.shape[0], np.float32)
+                self.layers.append((np.ascontiguousarray(weight.T), bias))
+                num_linear += 1
+            elif kind in self.activations:
+                self.layers.append(self.activations[kind](module))
+            elif kind not in self.skipped:
+                raise ValueError(f"NumPy backend doesn't support layer '{name}' ({kind}).")
+        if num_linear == 0:
+            raise ValueError("NumPy backend found no Linear layer in the model.")
+
+    def __call__(self, obs_tensor: torch.Tensor) -> torch.Tensor:
+        x = obs_tensor.numpy()
+        for layer in self.layers:
+            if isinstance(layer, tuple):
+                x = x @ layer[0] + layer[1]
+            else:
+                x = layer(x)
+        return torch.from_numpy(np.asarray(x, dtype=np.float32))
+
+def make_backend(name: str, model: torch.jit.ScriptModule, num_obs: int, hidden_state_names: List[str], num_threads: int = 0):
+    """ Create the inference backend `name` for the loaded TorchScript `model`. """
+    if name == 'torchscript':
+        return TorchScriptBackend(model)
+    if name == 'optimized':
+        return make_optimized_backend(model, hidden_state_names)
+    if name in ['onnx', 'numpy']:
+        if len(hidden_state_names):
+            raise ValueError(f"Backend '{name}' only supports stateless policies, model has hidden state {hidden_state_names}.")
+        if name == 'onnx':
+            return OnnxBackend(model, num_obs, num_threads)
+        return NumpyMLPBackend(model)
+    raise ValueError(f"Unknown inference backend '{name}', choose from {INFERENCE_BACKENDS}.")
+
+def get_module_state(module, hidden_state_names: List[str]) -> dict:
+    return {name: getattr(module, name).clone() for name in hidden_state_names}
+
+def set_module_state(module, state: dict):
+    for name, value in state.items():
+        setattr(module, name, value.clone())
+
+def check_parity(reference, backend, obs_batch: np.ndarray, reference_module, backend_module, hidden_state_names: List[str],
+                 atol: float = 1e-4, rtol: float = 1e-3) -> float:
+    """ Run both policies on the same observation sequence (hidden states are restored afterwards).
+    Returns:
+        max absolute action difference, raise AssertionError if it exceeds the tolerance
+    """
+    ref_state = get_module_state(reference_module, hidden_state_names)
+    backend_state = get_module_state(backend_module, hidden_state_names)
+    max_diff = 0.0
+    try:
+        for obs in obs_batch:
+            obs_tensor = torch.as_tensor(obs[None], dtype=torch.float32)
+            with torch.no_grad():
+                expected = reference(obs_tensor)
+            actual = backend(obs_tensor)
+            assert isinstance(actual, tuple) == isinstance(expected, tuple), "Output structure differs from the reference"
+            if isinstance(expected, tuple):  # e.g. MoE (action, results), compare actions
+                expected, actual = expected[0], actual[0]
+            expected, actual = expected.detach().cpu().numpy(), actual.detach().cpu().numpy()
+            assert expected.shape == actual.shape, f"Action shape {actual.shape} != reference {expected.shape}"
+            max_diff = max(max_diff, float(np.abs(expected - actual).max()))
+            assert np.allclose(actual, expected, atol=atol, rtol=rtol), f"Max action difference {max_diff:.2e} exceeds atol={atol}"
+    finally:
+        set_module_state(reference_module, ref_state)
+        set_module_state(backend_module, backend_state)
+    return max_diff
+
+def measure_latency(policy, obs: np.ndarray, num_iters: int = 200, num_warmup: int = 20) -> dict:
+    """ Per-call latency of `policy` on a (1, num_obs) observation, in microseconds. """
+    obs_tensor = torch.as_tensor(obs[None], dtype=torch.float32)
+    for _ in range(num_warmup):
+        policy(obs_tensor)
+    latencies = np.empty(num_iters)
+    for i in range(num_iters):
+        t = time.perf_counter()
+        policy(obs_tensor)
+        latencies[i] = time.perf_counter() - t
+    latencies *= 1e6
+    return {
+        'mean_us': float(latencies.mean()),
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p99_us': float(np.percentile(latencies, 99)),
+    }
@@ -1,3 +1,5 @@
 from .mujoco_simulator import MujocoSimulator
 from .mujoco_config import MujocoConfig
 from .sim_data import SimData
+from .batched_mujoco_simulator import BatchedMujocoSimulator
+from .replay import render_replay
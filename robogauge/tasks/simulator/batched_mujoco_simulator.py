@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : batched_mujoco_simulator.py
+@Time    : 2026/10/17 10:12:36
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Batched Mujoco Simulator, N MjData worlds stepped together against one compiled MjModel
+'''
+import copy
+import numpy as np
+from typing import Callable, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+
+from robogauge.utils.logger import logger
+from robogauge.tasks.simulator.mujoco_config import MujocoConfig
+from robogauge.tasks.simulator.mujoco_simulator import MujocoSimulator
+from robogauge.tasks.simulator.sim_data import SimData
+
+class BatchedMujocoSimulator:
+    """ World 0 compiles the model (`MujocoSimulator.load`), the other worlds share it
+    through `MujocoSimulator.make_world`. Worlds are stepped on a small thread pool.
+    """
+    def __init__(self, sim_cfg: MujocoConfig, num_worlds: int):
+        assert num_worlds >= 1, f"num_worlds must be positive, got {num_worlds}."
+        if not sim_cfg.viewer.headless or sim_cfg.render.save_video:
+            logger.warning("Batched worlds are always headless, viewer and video recording are disabled.")
+            sim_cfg = copy.deepcopy(sim_cfg)  # the caller's config is left unchanged
+            sim_cfg.viewer.headless = True
+            sim_cfg.render.save_video = False
+        self.cfg = sim_cfg
+        self.num_worlds = num_worlds
+        self.worlds: List[MujocoSimulator] = [MujocoSimulator(sim_cfg)]
+        self.executor = None
+
+    def load(self, *args, **kwargs):
+        """ Compile the model once in world 0 and create the other worlds from it. """
+        root = self.worlds[0]
+        root.load(*args, **kwargs)
+        self.worlds = [root] + [root.make_world() for _ in range(self.num_worlds - 1)]
+        if self.executor is None:
+            num_threads = max(1, min(self.cfg.physics.num_threads, self.num_worlds))
+            self.executor = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix='mj_world')
+        logger.info(f"Loaded {self.num_worlds} batched worlds on {self.executor._max_workers} threads.")
+
+    def map(self, fn: Callable[[int], object], world_ids: List[int] = None) -> list:
+        """ Run fn(world_id) for each world on the thread pool, results keep the order of world_ids. """
+        if world_ids is None:
+            world_ids = range(self.num_worlds)
+        if len(world_ids) == 1:
+            return [fn(world_ids[0])]
+        return list(self.executor.map(fn, world_ids))
+
+    def step(self, world_ids: List[int] = None, nstep: int = 1) -> List[SimData]:
+        """ Step the selected worlds by `nstep` physics steps. """
+        return self.map(lambda i: self.worlds[i].step(nstep), world_ids)
+
+    def reset(self, world_ids: List[int] = None):
+        self.map(lambda i: self.worlds[i].reset(), world_ids)
+
+    def get_proprio_batch(self, world_ids: List[int] = None) -> Dict[str, np.ndarray]:
+        """ Stack the latest proprioception of the selected worlds, each value has shape (N, dim). """
+        if world_ids is None:
+            world_ids = range(self.num_worlds)
+        proprios = [self.worlds[i].proprio for i in world_ids]
+        batch = {}
+        for group in ['joint', 'base', 'imu']:
+            for name in ['pos', 'vel', 'torque', 'quat', 'acc', 'lin_vel', 'ang_vel']:
+                if not hasattr(getattr(proprios[0], group), name):
+                    continue
+                batch[f"{group}_{name}"] = np.stack([getattr(getattr(p, group), name) for p in proprios])
+        return batch
+
+    def close(self):
+        self.worlds[0].close_viewer()
+        self.worlds[0].close_video_writer()
+        for world in self.worlds:
+            world.close_trajectory()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
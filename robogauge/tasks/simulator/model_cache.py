@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : model_cache.py
+@Time    : 2026/10/17 14:05:51
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Content-addressed on-disk cache of compiled MuJoCo models (.mjb)
+'''
+import os
+import copy
+import json
+import uuid
+import hashlib
+import mujoco
+from pathlib import Path
+from typing import List, Optional
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+
+from robogauge.utils.logger import logger
+
+# Bump when the way MujocoSimulator builds the MJCF model changes
+COMPILE_VERSION = 1
+
+def collect_xml_files(xml_path: str) -> List[Path]:
+    """ Collect the xml file, its <include> files and every asset file (mesh, hfield, texture, skin) it references. """
+    xml_path = Path(xml_path)
+    files = [xml_path]
+    root = ET.parse(xml_path).getroot()
+    compiler = root.find('compiler')
+    compiler = {} if compiler is None else compiler.attrib
+    xml_dir = xml_path.parent
+    asset_dir = xml_dir / compiler.get('assetdir', '')
+    mesh_dir = xml_dir / compiler['meshdir'] if 'meshdir' in compiler else asset_dir
+    texture_dir = xml_dir / compiler['texturedir'] if 'texturedir' in compiler else asset_dir
+    for elem in root.iter():
+        file = elem.get('file')
+        if file is None:
+            continue
+        if elem.tag == 'include':
+            files.extend(collect_xml_files(xml_dir / file))
+        elif elem.tag == 'texture':
+            files.append(texture_dir / file)
+        else:
+            files.append(mesh_dir / file)
+    return files
+
+def get_mjcf_model_name(xml_path: str) -> str:
+    """ Model name used by dm_control as the attachment prefix, fallback to the file stem. """
+    name = ET.parse(xml_path).getroot().get('model')
+    return name if name else Path(xml_path).stem
+
+class ModelCache:
+    """ Compiled models are stored as `<key>.mjb`, key is the sha256 of every model input.
+    Least recently used files are evicted when the cache grows over `max_size_mb`.
+    Long-lived worker processes also keep the last models and keys in memory, `load` returns copies since
+    the simulator changes masses/frictions of its model in place.
+    """
+    memory_size = 8
+    memory = OrderedDict()  # key -> pristine MjModel
+    key_memo = {}  # (inputs, file mtimes) -> key, skip hashing unchanged files
+    def __init__(self, cache_dir: str, max_size_mb: float = 512):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size_mb * 1024 * 1024
+
+    def make_key(self, terrain_xmls: List[str], robot_xml: str, terrain_spawn_pos: list) -> str:
+        inputs = json.dumps({
+            'compile_version': COMPILE_VERSION,
+            'mujoco_version': mujoco.__version__,
+            'terrain_spawn_pos': [float(x) for x in terrain_spawn_pos],
+        }, sort_keys=True)
+        files = [path for xml in list(terrain_xmls) + [robot_xml] for path in collect_xml_files(xml)]
+        memo = (inputs, tuple((str(path), path.stat().st_mtime_ns if path.exists() else None) for path in files))
+        if memo in ModelCache.key_memo:
+            return ModelCache.key_memo[memo]
+        hasher = hashlib.sha256()
+        hasher.update(inputs.encode())
+        for path in files:
+            hasher.update(path.name.encode())
+            if path.exists():
+                hasher.update(path.read_bytes())
+        key = ModelCache.key_memo[memo] = hasher.hexdigest()
+        return key
+
+    def remember(self, key: str, mj_model: mujoco.MjModel):
+        ModelCache.memory[key] = copy.deepcopy(mj_model)
+        ModelCache.memory.move_to_end(key)
+        while len(ModelCache.memory) > self.memory_size:
+            ModelCache.memory.popitem(last=False)
+
+    def load(self, key: str) -> Optional[mujoco.MjModel]:
+        if key in ModelCache.memory:
+            ModelCache.memory.move_to_end(key)
+            return copy.deepcopy(ModelCache.memory[key])
+        path = self.cache_dir / f"{key}.mjb"
+        if not path.exists():
+            return None
+        try:
+            mj_model = mujoco.MjModel.from_binary_path(str(path))
+        except Exception as e:
+            logger.warning(f"Failed to load cached model {path}, remove it: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # mark as recently used
+        logger.info(f"Loaded compiled model from cache: {path}")
+        self.remember(key, mj_model)
+        return mj_model
+
+    def save(self, key: str, mj_model: mujoco.MjModel):
+        self.remember(key, mj_model)
+        path = self.cache_dir / f"{key}.mjb"
+        tmp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            mujoco.mj_saveModel(mj_model, str(tmp_path), None)
+            os.replace(tmp_path, path)  # atomic, concurrent workers may write the same key
+        except Exception as e:
+            logger.warning(f"Failed to save compiled model to cache {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        logger.info(f"Saved compiled model to cache: {path}")
+        self.evict()
+
+    def evict(self):
+        """ Remove least recently used models until the cache fits in max_size. """
+        files = []
+        for path in self.cache_dir.glob("*.mjb"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # removed by another worker
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            logger.info(f"Evicted cached model: {path}")
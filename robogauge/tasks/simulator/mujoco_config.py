@@ -14,6 +14,14 @@ class MujocoConfig(Config):
 
     class physics:
         simulation_dt = 0.002  # 500 Hz
+        native_pd = False  # PD law computed by MuJoCo position actuators, a control interval becomes a few native mj_step calls
+        copy_proprio = False  # Return a copy of proprioception each step, enable if callers keep references across steps
+        num_threads = 4  # Thread pool size to step batched worlds, mj_step releases the GIL
+    
+    class model_cache:
+        enabled = True  # Cache compiled models (.mjb) on disk, keyed by the hash of xml/asset files and spawn position
+        cache_dir = "{ROBOGAUGE_ROOT_DIR}/.cache/models"
+        max_size_mb = 512  # Least recently used models are evicted above this size
     
     class viewer:
         headless = False
@@ -27,6 +35,11 @@ class MujocoConfig(Config):
         video_fps = 30
         width = 640
         height = 480
+        async_encode = True  # Encode video frames on a background thread
+        queue_size = 64  # Max frames waiting for the encoder
+        queue_policy = 'block'  # 'block': wait for the encoder when the queue is full, 'drop': skip the frame
+        record_trajectory = False  # Record state trajectories (cheap), render them later with scripts/render_replay.py
+        record_fps = 30
         # width = 1920
         # height = 1080
     
@@ -53,3 +66,4 @@ class MujocoConfig(Config):
         skip_penetration_geoms = ['wall', 'floor']  # Geometries to skip penetration check
         skip_self_penetration = True  # Whether to check self-penetration
         penetration_max_reset_num = 1  # Max number of resets due to penetration per run
+        native_pd_check_dt = 0.0  # [s] with physics.native_pd, max time between roll/penetration checks (merged steps are split), 0 checks after each merged call only (at most one control interval)
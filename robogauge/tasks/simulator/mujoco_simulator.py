@@ -20,14 +20,33 @@ from typing import Literal, List, Optional, Union
 
 from robogauge.utils.logger import logger
 from robogauge.utils.helpers import parse_path
-from robogauge.utils.math_utils import get_projected_gravity, quat_rotate_inverse
+from robogauge.utils.measure import PhaseTimer
+from robogauge.utils.math_utils import get_projected_gravity
 from robogauge.tasks.simulator.mujoco_config import MujocoConfig
+from robogauge.tasks.simulator.model_cache import ModelCache, get_mjcf_model_name
+from robogauge.tasks.simulator.video_writer import AsyncVideoWriter
+from robogauge.tasks.simulator.trajectory import TrajectoryRecorder
 from robogauge.tasks.simulator.sim_data import (
     SimData,
     RobotProprioception, JointState, BaseState, IMUState
 )
 from robogauge.tasks.gauge.goal_data import VelocityGoal
 
+def step_physics(mj_model: mujoco.MjModel, mj_data: mujoco.MjData, nstep: int = 1):
+    """ Same stepping semantics as dm_control `Physics.step` (legacy step), but usable for any MjData.
+    Finish the current step with mj_step2, then run mj_step1 so sensors are in sync with qpos and qvel.
+    All mujoco calls release the GIL, so different MjData can be stepped from different threads.
+    """
+    if mj_model.opt.integrator != mujoco.mjtIntegrator.mjINT_RK4:
+        mujoco.mj_step2(mj_model, mj_data)
+        if nstep > 1:
+            mujoco.mj_step(mj_model, mj_data, nstep - 1)
+    else:
+        mujoco.mj_step(mj_model, mj_data, nstep)
+    mujoco.mj_step1(mj_model, mj_data)
+    if mj_data.warning[int(mujoco.mjtWarning.mjWARN_BADQACC)].number > 0:
+        raise RuntimeError(f"[Physics Error] Simulation became unstable (bad qacc) at time {mj_data.time:.3f}s")
+
 class MujocoSimulator:
     def __init__(self, sim_cfg: MujocoConfig):
         self.cfg = sim_cfg
@@ -42,12 +61,15 @@ class MujocoSimulator:
         self.renderer = None
         self.vid_writer = None
         self.vid_count = 0
+        self.trajectory: Optional[TrajectoryRecorder] = None
+        self.traj_count = 0
         self._pause = True
         self.n_step = 0
         self.sim_time = 0.0
         self.target_pos = None
         self.target_velocity: Optional[VelocityGoal] = None
         self.penetration_reset_count = 0
+        self.timer = PhaseTimer(enabled=False)  # replaced by the pipeline timer when profiling
 
     def load(
         self,
@@ -56,8 +78,12 @@ class MujocoSimulator:
         terrain_spawn_pos: list = None,
         default_dof_pos: list = None,
         invert_yaw: bool = None,
+        p_gains: list = None,
+        d_gains: list = None,
     ):
-        """ Load terrain and robot into the simulator, support re-loading. """
+        """ Load terrain and robot into the simulator, support re-loading.
+        `p_gains`/`d_gains` are required by `physics.native_pd`, the PD law is then computed by MuJoCo actuators.
+        """
         if terrain_xmls is not None:
             self.terrain_xmls = [parse_path(xml) for xml in terrain_xmls]
         if robot_xml is not None:
@@ -77,37 +103,11 @@ class MujocoSimulator:
         if default_dof_pos is None:
             raise ValueError("Default DOF positions must be provided.")
         
-        # Create MJCF models
-        robot_mjcf = mjcf.from_path(robot_xml)
-        terrain_mjcf = mjcf.from_path(terrain_xmls[0])
-        visual_elem = terrain_mjcf.visual
-        global_elem = visual_elem.get_children('global')
-        global_elem.offwidth = 1920
-        global_elem.offheight = 1080
-
-        for path in terrain_xmls[1:]:
-            next_terrain = mjcf.from_path(path)
-            terrain_mjcf.attach(next_terrain)
-        for j in robot_mjcf.find_all('joint'):
-            if j.tag == 'freejoint':
-                j.remove()
-        robot_base = robot_mjcf.find('body', 'base_link')
-        if robot_base is not None:
-            origin_robot_height = robot_base.pos.copy() if robot_base.pos is not None else None
-            robot_base.pos = [0, 0, 0]  # move base_link translation to terrain_spawn_pos
-        else:
-            raise ValueError("Robot base_link body not found in the robot MJCF model.")
-        attachment_frame = terrain_mjcf.attach(robot_mjcf)
-        attachment_frame.add('freejoint', name='root')
-        if origin_robot_height is not None:
-            terrain_spawn_pos = np.array(terrain_spawn_pos) + origin_robot_height
-        attachment_frame.pos = terrain_spawn_pos
-
         self.close_viewer()
         self.close_video_writer()
-        self.mj_physics = mjcf.Physics.from_mjcf_model(terrain_mjcf)
-        self.mj_model = self.mj_physics.model.ptr
-        self.mj_data = self.mj_physics.data.ptr
+        self.close_trajectory()
+        self.mj_model = self.compile_model(terrain_xmls, robot_xml, terrain_spawn_pos)
+        self.mj_data = mujoco.MjData(self.mj_model)
         self.mj_model.opt.timestep = self.cfg.physics.simulation_dt
         self.sim_dt = self.cfg.physics.simulation_dt
         if self.invert_yaw:
@@ -115,26 +115,14 @@ class MujocoSimulator:
             self.mj_data.qpos[6] = 1.0
         self.mj_data.qpos[7:] = default_dof_pos
 
-        # Domain randomization: base mass
-        base_body_name = f'{robot_mjcf.model}/base_link'
+        # Domain randomization: base mass and friction
+        base_body_name = f'{get_mjcf_model_name(robot_xml)}/base_link'
         body_id = mujoco.mj_name2id(self.mj_model, mujoco.mjtObj.mjOBJ_BODY, base_body_name)
         assert body_id != -1, f"Body '{base_body_name}' not found in the model."
-        if self.cfg.domain_rand.base_mass != 0.0:
-            original_mass = self.mj_model.body_mass[body_id]
-            new_mass = max(0.01, original_mass + self.cfg.domain_rand.base_mass)
-            self.mj_model.body_mass[body_id] = new_mass
-            logger.info(f"Randomized base mass: {original_mass:.3f} -> {new_mass:.3f} kg")
-        
-        # Domain randomization: friction
-        if self.cfg.domain_rand.friction != 0.0:
-            for i in range(self.mj_model.ngeom):
-                # Both change robot friction and terrain friction
-                # If one of the two geoms has higher priority, the friction of that geom is used.
-                # If both geoms have the save priopirty, the maximum of the two friction is used.
-                # (Go2 foot friction is 0.4 and priority is 1, terrain priority is 0 except floor)
-                self.mj_model.geom_friction[i][0] = self.cfg.domain_rand.friction
-            logger.info(f"Scaled geom friction by factor: {self.cfg.domain_rand.friction:.3f}")
-        mujoco.mj_forward(self.mj_model, self.mj_data)
+        self.base_body_id = body_id
+        self.original_body_mass = self.mj_model.body_mass.copy()
+        self.original_geom_friction = self.mj_model.geom_friction.copy()
+        self.set_domain_params(self.cfg.domain_rand.base_mass, self.cfg.domain_rand.friction)
 
         # Setup offscreen camera
         self.offscreen_cam.type = mujoco.mjtCamera.mjCAMERA_TRACKING
@@ -169,21 +157,120 @@ class MujocoSimulator:
             vid_dir = logger.log_dir / "videos"
             vid_dir.mkdir(parents=True, exist_ok=True)
             vid_path = str(vid_dir / f"sim_video_{self.vid_count:03d}.mp4")
-            self.vid_writer = imageio.get_writer(
-                vid_path,
-                fps=self.cfg.render.video_fps,
-            )
+            if self.cfg.render.async_encode:
+                self.vid_writer = AsyncVideoWriter(
+                    vid_path,
+                    fps=self.cfg.render.video_fps,
+                    queue_size=self.cfg.render.queue_size,
+                    policy=self.cfg.render.queue_policy,
+                )
+            else:
+                self.vid_writer = imageio.get_writer(
+                    vid_path,
+                    fps=self.cfg.render.video_fps,
+                )
             self.vid_frame_skip = int(1 / (self.cfg.render.video_fps * self.sim_dt))
             logger.info(f"Simulation video saved at: {vid_path}")
             self.vid_count += 1
 
+        if self.cfg.render.record_trajectory:
+            self.start_trajectory(f"trajectory_{self.traj_count:03d}")
+            self.traj_count += 1
+
         # Initialize simulation state
+        self.load_dof_limits()
+        self.preload_sensors()
+        self.preload_geom_masks()
+        self.native_pd = False
+        if self.cfg.physics.native_pd:
+            if p_gains is None or d_gains is None:
+                logger.warning("physics.native_pd needs p_gains and d_gains in load, fallback to python PD control.")
+            else:
+                self.setup_native_pd(p_gains, d_gains)
+        self.init_proprio()
+        self.init_state()
+
+    def set_domain_params(self, base_mass: float = None, friction: float = None):
+        """ Patch base mass and geom friction of the loaded model in place, the original values are restored first.
+        Batched worlds share the model, so the parameters apply to all of them.
+        Args:
+            base_mass: [kg] added to the base body mass, None keeps `domain_rand.base_mass`
+            friction: sliding friction of every geom, 0 keeps the original frictions, None keeps `domain_rand.friction`
+        """
+        if base_mass is not None:
+            self.cfg.domain_rand.base_mass = base_mass
+        if friction is not None:
+            self.cfg.domain_rand.friction = friction
+        base_mass = self.cfg.domain_rand.base_mass
+        friction = self.cfg.domain_rand.friction
+        self.mj_model.body_mass[:] = self.original_body_mass
+        self.mj_model.geom_friction[:] = self.original_geom_friction
+
+        if base_mass != 0.0:
+            original_mass = self.original_body_mass[self.base_body_id]
+            new_mass = max(0.01, original_mass + base_mass)
+            self.mj_model.body_mass[self.base_body_id] = new_mass
+            logger.info(f"Randomized base mass: {original_mass:.3f} -> {new_mass:.3f} kg")
+        
+        if friction != 0.0:
+            # Both change robot friction and terrain friction
+            # If one of the two geoms has higher priority, the friction of that geom is used.
+            # If both geoms have the save priopirty, the maximum of the two friction is used.
+            # (Go2 foot friction is 0.4 and priority is 1, terrain priority is 0 except floor)
+            self.mj_model.geom_friction[:, 0] = friction
+            logger.info(f"Scaled geom friction by factor: {friction:.3f}")
+        mujoco.mj_forward(self.mj_model, self.mj_data)
+
+    def compile_model(self, terrain_xmls: List[str], robot_xml: str, terrain_spawn_pos: list) -> mujoco.MjModel:
+        """ Attach the robot to the terrains and compile the model.
+        Compiled models are cached on disk, keyed by the content of all xml/asset files and the spawn position.
+        """
+        cache_cfg = self.cfg.model_cache
+        cache = None
+        if cache_cfg.enabled:
+            cache = ModelCache(parse_path(cache_cfg.cache_dir), cache_cfg.max_size_mb)
+            key = cache.make_key(terrain_xmls, robot_xml, terrain_spawn_pos)
+            mj_model = cache.load(key)
+            if mj_model is not None:
+                return mj_model
+
+        # Create MJCF models
+        robot_mjcf = mjcf.from_path(robot_xml)
+        terrain_mjcf = mjcf.from_path(terrain_xmls[0])
+        visual_elem = terrain_mjcf.visual
+        global_elem = visual_elem.get_children('global')
+        global_elem.offwidth = 1920
+        global_elem.offheight = 1080
+
+        for path in terrain_xmls[1:]:
+            next_terrain = mjcf.from_path(path)
+            terrain_mjcf.attach(next_terrain)
+        for j in robot_mjcf.find_all('joint'):
+            if j.tag == 'freejoint':
+                j.remove()
+        robot_base = robot_mjcf.find('body', 'base_link')
+        if robot_base is not None:
+            origin_robot_height = robot_base.pos.copy() if robot_base.pos is not None else None
+            robot_base.pos = [0, 0, 0]  # move base_link translation to terrain_spawn_pos
+        else:
+            raise ValueError("Robot base_link body not found in the robot MJCF model.")
+        attachment_frame = terrain_mjcf.attach(robot_mjcf)
+        attachment_frame.add('freejoint', name='root')
+        if origin_robot_height is not None:
+            terrain_spawn_pos = np.array(terrain_spawn_pos) + origin_robot_height
+        attachment_frame.pos = terrain_spawn_pos
+
+        mj_model = mjcf.Physics.from_mjcf_model(terrain_mjcf).model.ptr
+        if cache is not None:
+            cache.save(key, mj_model)
+        return mj_model
+
+    def init_state(self):
+        """ Initialize step counters and robot controller placeholders. """
         self._pause = False
         self.n_step = 0
         self.sim_time = 0.0
         self.penetration_reset_count = 0
-        self.load_dof_limits()
-        self.preload_sensors()
 
         # Robot controller placeholders
         self.action = None
@@ -191,24 +278,72 @@ class MujocoSimulator:
         self.d_gains = None
         self.control_type = None
 
+    def make_world(self) -> 'MujocoSimulator':
+        """ Create a headless world which shares the compiled MjModel but owns a new MjData.
+        The world has no viewer and no video writer, it is used by `BatchedMujocoSimulator`.
+        """
+        world = MujocoSimulator(self.cfg)
+        world.terrain_xmls = self.terrain_xmls
+        world.robot_xml = self.robot_xml
+        world.terrain_spawn_pos = self.terrain_spawn_pos
+        world.default_dof_pos = self.default_dof_pos
+        world.invert_yaw = self.invert_yaw
+        world.headless = True
+        world.mj_model = self.mj_model
+        world.mj_data = mujoco.MjData(self.mj_model)
+        world.sim_dt = self.sim_dt
+        world.dof_limits = self.dof_limits
+        world.dof_names = self.dof_names
+        world.sensor_cache = self.sensor_cache
+        world.sensor_index = self.sensor_index
+        world.base_body_id = self.base_body_id
+        world.original_body_mass = self.original_body_mass
+        world.original_geom_friction = self.original_geom_friction
+        world.geom_names = self.geom_names
+        world.geom_skip_mask = self.geom_skip_mask
+        world.geom_owner_ids = self.geom_owner_ids
+        world.native_pd = self.native_pd
+        if self.native_pd:
+            world.native_p_gains = self.native_p_gains
+            world.native_d_gains = self.native_d_gains
+            world.native_zero_torque_gains = self.native_zero_torque_gains
+        world.init_proprio()
+        world.init_state()
+        world.reset()
+        return world
+
     def key_callback(self, keycode):
         if keycode == 32:
             self._pause = not self._pause
             logger.info(f"Pause toggled: {self._pause}")
 
-    def step(self) -> SimData:
-        """ Simulation step, pause will block thread. """
+    def step(self, nstep: int = 1) -> SimData:
+        """ Simulation step, pause will block thread.
+        With native PD and an action set, `nstep` physics steps run in one native call, otherwise
+        the python PD loops over them. Viewer, video, truncation and the returned SimData refer to the last step.
+        """
         while self._pause:
             time.sleep(0.1)
-        self.update_torque()
-        self.mj_physics.step()
+        timer = self.timer
+        t = timer.tic()
+        if self.native_pd and self.action is not None:
+            step_physics(self.mj_model, self.mj_data, nstep)
+        else:
+            for i in range(nstep):
+                if i > 0:
+                    self.update_proprio()
+                self.update_torque()
+                step_physics(self.mj_model, self.mj_data)
+        last_step = self.n_step + nstep - 1
+        timer.toc('physics', t, count=nstep)
 
         # Viewer sync
+        t = timer.tic()
         if self.viewer is not None:
             if self.viewer.is_running():
                 self.update_external_rendering(self.viewer, ctype='viewer')
                 self.viewer.sync()
-                time_untile_next_render = self.cfg.physics.simulation_dt - (
+                time_untile_next_render = self.cfg.physics.simulation_dt * nstep - (
                     time.time() - self.last_render_time
                 )
                 if time_untile_next_render > 0:
@@ -219,37 +354,25 @@ class MujocoSimulator:
                 self.close_viewer()
 
         # Video recording
-        if self.vid_writer is not None and self.n_step % self.vid_frame_skip == 0:
+        if self.vid_writer is not None and last_step // self.vid_frame_skip != (self.n_step - 1) // self.vid_frame_skip:
             render_cam = self.viewer.cam if self.viewer is not None else self.offscreen_cam
             # mujoco.mjv_updateCamera(render_cam)
             self.renderer.update_scene(self.mj_data, camera=render_cam)
             self.update_external_rendering(self.renderer, ctype='renderer')
             frame = self.renderer.render()
             self.vid_writer.append_data(frame)
-
-        self.proprio = proprio = RobotProprioception(
-            joint=JointState(
-                pos=self.get_sensor_data('joint_pos'),
-                vel=self.get_sensor_data('joint_vel'),
-                torque=self.get_sensor_data('joint_eff'),
-                limits=self.dof_limits,
-                names=self.dof_names,
-            ),
-            imu=IMUState(
-                pos=self.get_sensor_data('imu_pos'),
-                quat=self.get_sensor_data('imu_quat'),
-                acc=self.get_sensor_data('imu_acc'),
-                lin_vel=self.get_sensor_data('imu_lin_vel'),  # body frame, check direction, go2 is inverted
-                ang_vel=self.get_sensor_data('imu_ang_vel'),  # body frame, check direction, go2 is inverted
-            ),
-            base=BaseState(
-                pos=self.mj_data.qpos[:3],      # world frame
-                quat=self.mj_data.qpos[3:7],    # world frame
-                lin_vel=quat_rotate_inverse(self.mj_data.qpos[3:7], self.mj_data.qvel[:3]),  # body frame
-                ang_vel=quat_rotate_inverse(self.mj_data.qpos[3:7], self.mj_data.qvel[3:6]), # body frame
-            )
-        )
-        if self.n_step % int(0.1 / self.sim_dt) == 0:
+        if self.trajectory is not None and last_step // self.traj_frame_skip != (self.n_step - 1) // self.traj_frame_skip:
+            self.trajectory.record(self.mj_data.time, self.mj_data.qpos, self.mj_data.qvel, self.target_pos, self.target_velocity)
+        timer.toc('render', t)
+
+        t = timer.tic()
+        self.update_proprio()
+        timer.toc('sensors', t)
+        proprio = self.proprio.copy() if self.cfg.physics.copy_proprio else self.proprio
+        self.n_step = last_step
+        self.sim_time = self.n_step * self.sim_dt
+        if logger.writer is not None and self.n_step % int(0.1 / self.sim_dt) == 0:
+            t = timer.tic()
             logger.log(value=np.mean(proprio.imu.quat - proprio.base.quat), tag="sim/delta_quat", step=self.n_step)
             logger.log(value=np.mean(proprio.imu.ang_vel - proprio.base.ang_vel), tag="sim/delta_ang_vel", step=self.n_step)
             logger.log(value=np.mean(proprio.imu.lin_vel - proprio.base.lin_vel), tag="sim/delta_lin_vel", step=self.n_step)
@@ -257,6 +380,7 @@ class MujocoSimulator:
             logger.log(value=proprio.imu.lin_vel[1], tag="sim/imu_lin_vel_y", step=self.n_step)
             logger.log(value=proprio.base.lin_vel[0], tag="sim/base_lin_vel_x", step=self.n_step)
             logger.log(value=proprio.base.lin_vel[1], tag="sim/base_lin_vel_y", step=self.n_step)
+            timer.toc('tensorboard', t)
         if self.n_step == 0:
             self.debug_print_proprio_shapes()
 
@@ -270,7 +394,11 @@ class MujocoSimulator:
         # input("DEBUG")
         self.n_step += 1
         self.sim_time = self.n_step * self.sim_dt
-        self.check_truncation(sim_data)
+        t = timer.tic()
+        try:
+            self.check_truncation(sim_data)
+        finally:
+            timer.toc('truncation', t)
         return sim_data
     
     def update_external_rendering(self,
@@ -374,15 +502,25 @@ class MujocoSimulator:
             handle.user_scn.ngeom = viewer_geom_idx
     
     def check_penetration(self, threshold: float = -0.02):
+        """ Find the first contact deeper than threshold, skipped geoms and self contacts (if enabled) are ignored.
+        Vectorized over all contacts with the geom masks from `preload_geom_masks`.
+        """
         if self.penetration_reset_count >= self.cfg.truncation.penetration_max_reset_num:
             return False, None, None, None
-        for i in range(self.mj_data.ncon):
-            contact = self.mj_data.contact[i]
-            if contact.dist < threshold:
-                geom1_name = mujoco.mj_id2name(self.mj_model, mujoco.mjtObj.mjOBJ_GEOM, contact.geom1)
-                geom2_name = mujoco.mj_id2name(self.mj_model, mujoco.mjtObj.mjOBJ_GEOM, contact.geom2)
-                return True, geom1_name, geom2_name, contact.dist
-        return False, None, None, None
+        contact = self.mj_data.contact
+        dist = contact.dist
+        hit = dist < threshold
+        if not hit.any():
+            return False, None, None, None
+        geom1, geom2 = contact.geom1, contact.geom2
+        hit &= ~(self.geom_skip_mask[geom1] | self.geom_skip_mask[geom2])
+        if self.cfg.truncation.skip_self_penetration:
+            hit &= self.geom_owner_ids[geom1] != self.geom_owner_ids[geom2]
+        ids = np.flatnonzero(hit)
+        if len(ids) == 0:
+            return False, None, None, None
+        i = ids[0]
+        return True, self.geom_names[geom1[i]], self.geom_names[geom2[i]], dist[i]
     
     def check_truncation(self, sim_data: SimData):
         if self.cfg.truncation.enabled:
@@ -392,32 +530,48 @@ class MujocoSimulator:
 
             is_penetrated, geom1, geom2, dist = self.check_penetration(self.cfg.truncation.penetration_threshold)
             if is_penetrated:
-                is_err = True
-                if self.cfg.truncation.skip_penetration_geoms is not None and (
-                    any(skip_geom in geom1.lower() for skip_geom in self.cfg.truncation.skip_penetration_geoms) or
-                    any(skip_geom in geom2.lower() for skip_geom in self.cfg.truncation.skip_penetration_geoms)
-                ):
-                    is_err = False
-                if self.cfg.truncation.skip_self_penetration:
-                    if geom1.split('/')[0] == geom2.split('/')[0]:
-                        is_err = False
-                if is_err:
-                    self.penetration_reset_count += 1
-                    raise RuntimeError(f"[Penetration Error] Episode truncated: Penetration ({geom1} <-> {geom2}), distance: {dist}")
+                self.penetration_reset_count += 1
+                raise RuntimeError(f"[Penetration Error] Episode truncated: Penetration ({geom1} <-> {geom2}), distance: {dist}")
     
     def reset(self):
         """ Reset the simulator to initial state. """
-        self.mj_physics.reset()
+        mujoco.mj_resetData(self.mj_model, self.mj_data)
         if self.invert_yaw:
             self.mj_data.qpos[3] = 0.0
             self.mj_data.qpos[6] = 1.0
         self.mj_data.qpos[7:] = self.default_dof_pos
         mujoco.mj_forward(self.mj_model, self.mj_data)
+        self.update_proprio()
 
         self.action = None
         if self.viewer is not None:
             self.viewer.sync()
 
+    def get_state(self) -> dict:
+        """ Snapshot of the full integration state (time, qpos, qvel, act, warmstart, ctrl, ...) and the current action. """
+        spec = mujoco.mjtState.mjSTATE_INTEGRATION
+        physics = np.empty(mujoco.mj_stateSize(self.mj_model, spec))
+        mujoco.mj_getState(self.mj_model, self.mj_data, physics, spec)
+        return {
+            'physics': physics,
+            'action': None if self.action is None else np.array(self.action),
+            'p_gains': self.p_gains,
+            'd_gains': self.d_gains,
+            'control_type': self.control_type,
+        }
+
+    def set_state(self, state: dict):
+        """ Restore a snapshot from `get_state`, step counters are not changed. """
+        mujoco.mj_setState(self.mj_model, self.mj_data, state['physics'], mujoco.mjtState.mjSTATE_INTEGRATION)
+        mujoco.mj_forward(self.mj_model, self.mj_data)
+        self.update_proprio()
+        self.action = None if state['action'] is None else state['action'].copy()
+        self.p_gains = state['p_gains']
+        self.d_gains = state['d_gains']
+        self.control_type = state['control_type']
+        if self.viewer is not None:
+            self.viewer.sync()
+
     def setup_action(self,
             action: np.ndarray,
             p_gains: np.ndarray = None,
@@ -429,8 +583,45 @@ class MujocoSimulator:
         self.p_gains = p_gains
         self.d_gains = d_gains
         self.control_type = control_type
+        if self.native_pd:
+            if control_type != 'P':
+                raise NotImplementedError(f"Control type '{control_type}' not supported by native PD.")
+            if not (np.array_equal(p_gains, self.native_p_gains) and np.array_equal(d_gains, self.native_d_gains)):
+                self.setup_native_pd(p_gains, d_gains)
+            self.mj_data.ctrl[:] = action
     
+    def setup_native_pd(self, p_gains: np.ndarray, d_gains: np.ndarray):
+        """ Turn the actuators into PD servos, force = kp * (ctrl - q) - kd * qd,
+        the original ctrlrange becomes the forcerange (same clipping as the python PD torques).
+        Actuators are assumed to be gear 1 motors with the same order as the joint sensors.
+        """
+        m = self.mj_model
+        kp = np.broadcast_to(np.asarray(p_gains, np.float64), (m.nu,))
+        kd = np.broadcast_to(np.asarray(d_gains, np.float64), (m.nu,))
+        if not m.actuator_biastype.any():  # first conversion of the model
+            limited = m.actuator_ctrllimited.astype(bool)
+            m.actuator_forcerange[limited] = m.actuator_ctrlrange[limited]
+            m.actuator_forcelimited[limited] = 1
+            m.actuator_ctrllimited[:] = 0
+        m.actuator_gaintype[:] = mujoco.mjtGain.mjGAIN_FIXED
+        m.actuator_gainprm[:] = 0
+        m.actuator_gainprm[:, 0] = kp
+        m.actuator_biastype[:] = mujoco.mjtBias.mjBIAS_AFFINE
+        m.actuator_biasprm[:] = 0
+        m.actuator_biasprm[:, 1] = -kp
+        m.actuator_biasprm[:, 2] = -kd
+        self.native_pd = True
+        self.native_p_gains = np.array(p_gains)
+        self.native_d_gains = np.array(d_gains)
+        # ctrl = q + kd / kp * qd gives zero torque while no action is set
+        self.native_zero_torque_gains = np.divide(kd, kp, out=np.zeros(m.nu), where=kp != 0)
+        logger.info(f"Native PD enabled on {m.nu} actuators, kp={kp.tolist()}, kd={kd.tolist()}")
+
     def update_torque(self):
+        if self.native_pd:
+            if self.action is None:
+                self.mj_data.ctrl[:] = self.proprio.joint.pos + self.native_zero_torque_gains * self.proprio.joint.vel
+            return
         if self.action is None:
             return
         dof_pos = self.proprio.joint.pos
@@ -440,7 +631,48 @@ class MujocoSimulator:
         else:
             raise NotImplementedError(f"Control type '{self.control_type}' not implemented.")
         self.mj_data.ctrl[:] = torques
-    
+
+    def steps_to_next_frame(self) -> int:
+        """ Max steps for the next `step(nstep)` call so that no viewer sync or video frame is skipped. """
+        if self.viewer is not None:
+            return 1
+        nstep = 1 << 30
+        if self.vid_writer is not None:
+            nstep = (-self.n_step) % self.vid_frame_skip + 1
+        if self.trajectory is not None:
+            nstep = min(nstep, (-self.n_step) % self.traj_frame_skip + 1)
+        return nstep
+
+    def steps_to_next_truncation_check(self) -> int:
+        """ Max steps for the next `step(nstep)` call so that the truncation check runs every `truncation.native_pd_check_dt`. """
+        check_dt = self.cfg.truncation.native_pd_check_dt
+        if not self.cfg.truncation.enabled or check_dt <= 0:
+            return 1 << 30
+        check_skip = max(1, int(round(check_dt / self.sim_dt)))
+        return (-self.n_step) % check_skip + 1
+
+    def start_trajectory(self, name: str):
+        """ Record the state trajectory to `{log_dir}/trajectories/{name}.npz`, replaces the current recorder. """
+        meta = {
+            'terrain_xmls': self.terrain_xmls,
+            'robot_xml': self.robot_xml,
+            'terrain_spawn_pos': [float(x) for x in self.terrain_spawn_pos],
+            'default_dof_pos': [float(x) for x in self.default_dof_pos],
+            'invert_yaw': bool(self.invert_yaw),
+            'sim_dt': self.sim_dt,
+            'fps': self.cfg.render.record_fps,
+            'base_mass': self.cfg.domain_rand.base_mass,
+            'friction': self.cfg.domain_rand.friction,
+        }
+        self.trajectory = TrajectoryRecorder(Path(logger.log_dir) / "trajectories" / f"{name}.npz", meta)
+        self.traj_frame_skip = max(1, int(1 / (self.cfg.render.record_fps * self.sim_dt)))
+
+    def close_trajectory(self):
+        """ Save the recorded trajectory if exists. """
+        if self.trajectory is not None:
+            self.trajectory.save()
+            self.trajectory = None
+
     def close_viewer(self):
         """ Close the viewer and video writer. """
         if self.viewer is not None:
@@ -503,6 +735,77 @@ class MujocoSimulator:
                 indices.append((adr, dim))
             self.sensor_cache[key] = indices
 
+        # Gather indices of each sensor group, adjacent sensors become a slice (view of sensordata)
+        self.sensor_index = {}
+        for key, indices in self.sensor_cache.items():
+            index = np.array([adr + i for adr, dim in indices for i in range(dim)], dtype=np.int64)
+            if len(index) > 0 and np.all(np.diff(index) == 1):
+                index = slice(int(index[0]), int(index[-1]) + 1)
+            self.sensor_index[key] = index
+
+    def preload_geom_masks(self):
+        """ Per-geom masks for the penetration check:
+        - geom_skip_mask: name contains one of `truncation.skip_penetration_geoms`
+        - geom_owner_ids: root body id of the geom (the robot free body, world for the terrain), used to detect
+          self contacts, most geoms (robot meshes, terrain boxes) have no name
+        """
+        self.geom_names = [
+            mujoco.mj_id2name(self.mj_model, mujoco.mjtObj.mjOBJ_GEOM, i) or ''
+            for i in range(self.mj_model.ngeom)
+        ]
+        skip_geoms = self.cfg.truncation.skip_penetration_geoms or []
+        self.geom_skip_mask = np.array([
+            any(skip_geom in name.lower() for skip_geom in skip_geoms) for name in self.geom_names
+        ], dtype=bool)
+        self.geom_owner_ids = self.mj_model.body_rootid[self.mj_model.geom_bodyid].astype(np.int32)
+
+    def init_proprio(self):
+        """ Allocate the proprioception once, `update_proprio` refreshes it in place after each step.
+        Adjacent sensor groups are views of `mj_data.sensordata`, the others are gather buffers.
+        """
+        self.gather_buffers = {}
+        def sensor_buffer(key):
+            index = self.sensor_index[key]
+            if isinstance(index, slice):
+                return self.mj_data.sensordata[index]
+            self.gather_buffers[key] = np.zeros(len(index), dtype=self.mj_data.sensordata.dtype)
+            return self.gather_buffers[key]
+
+        self.base_quat_inv = np.zeros(4)
+        self.proprio = RobotProprioception(
+            joint=JointState(
+                pos=sensor_buffer('joint_pos'),
+                vel=sensor_buffer('joint_vel'),
+                torque=sensor_buffer('joint_eff'),
+                limits=self.dof_limits,
+                names=self.dof_names,
+            ),
+            imu=IMUState(
+                pos=sensor_buffer('imu_pos'),
+                quat=sensor_buffer('imu_quat'),
+                acc=sensor_buffer('imu_acc'),
+                lin_vel=sensor_buffer('imu_lin_vel'),  # body frame, check direction, go2 is inverted
+                ang_vel=sensor_buffer('imu_ang_vel'),  # body frame, check direction, go2 is inverted
+            ),
+            base=BaseState(
+                pos=self.mj_data.qpos[:3],      # world frame
+                quat=self.mj_data.qpos[3:7],    # world frame
+                lin_vel=np.zeros(3),            # body frame
+                ang_vel=np.zeros(3),            # body frame
+            )
+        )
+        self.update_proprio()
+
+    def update_proprio(self):
+        """ Refresh gather buffers and base velocities in place, no allocation. """
+        sensordata = self.mj_data.sensordata
+        for key, buffer in self.gather_buffers.items():
+            np.take(sensordata, self.sensor_index[key], out=buffer)
+        base = self.proprio.base
+        mujoco.mju_negQuat(self.base_quat_inv, base.quat)
+        mujoco.mju_rotVecQuat(base.lin_vel, self.mj_data.qvel[:3], self.base_quat_inv)
+        mujoco.mju_rotVecQuat(base.ang_vel, self.mj_data.qvel[3:6], self.base_quat_inv)
+
     def find_sensors(self, *, pattern: re.Pattern = None, tag_name: str = None) -> list:
         model = self.mj_model
         found = []
@@ -535,14 +838,13 @@ class MujocoSimulator:
         return found
 
     def get_sensor_data(self, cache_key: str) -> np.ndarray:
-        ids = self.sensor_cache.get(cache_key, [])
-        if not ids:
+        """ Read a sensor group, returns a view of sensordata if the sensors are adjacent, else a copy. """
+        index = self.sensor_index.get(cache_key)
+        if index is None:
             return np.array([])
-
-        data_list = []
-        for adr, dim in ids:
-            data_list.append(self.mj_data.sensordata[adr:adr+dim])
-        return np.concatenate(data_list)
+        if isinstance(index, slice):
+            return self.mj_data.sensordata[index]
+        return np.take(self.mj_data.sensordata, index)
 
     def debug_print_proprio_shapes(self):
         """Log shapes (or lengths) of each numpy vector inside a RobotProprioception.
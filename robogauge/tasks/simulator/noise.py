@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : noise.py
+@Time    : 2026/10/17 21:26:50
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Vectorized uniform observation noise of `MujocoConfig.noise`
+'''
+import numpy as np
+from dataclasses import replace
+
+from robogauge.tasks.simulator.mujoco_config import MujocoConfig
+from robogauge.tasks.simulator.sim_data import SimData, RobotProprioception
+
+class ObservationNoise:
+    """ Uniform noise in [-level, level] on every element of the noisy proprioception fields.
+    All noise of a control step is drawn with one call of the per-episode generator into a preallocated buffer,
+    the noisy values are written to reused arrays and the clean `SimData` is left untouched (other fields are
+    shared with it, not copied).
+    """
+    fields = [  # (proprio attribute, state field, noise level name)
+        ('joint', 'pos', 'joint_pos'),
+        ('joint', 'vel', 'joint_vel'),
+        ('base', 'lin_vel', 'lin_vel'),
+        ('base', 'ang_vel', 'ang_vel'),
+        ('imu', 'lin_vel', 'lin_vel'),
+        ('imu', 'ang_vel', 'ang_vel'),
+    ]
+
+    def __init__(self, cfg: MujocoConfig.noise, seed: int):
+        self.cfg = cfg
+        self.rng = np.random.default_rng(seed)
+        self.sizes = None
+
+    def compile(self, proprio: RobotProprioception):
+        """ Preallocate the noise buffer, per-element levels and the noisy arrays for the field sizes of `proprio`. """
+        self.sizes = tuple(len(getattr(getattr(proprio, group), name)) for group, name, _ in self.fields)
+        self.slices = np.cumsum((0,) + self.sizes)
+        self.scale = np.concatenate([
+            np.full(size, float(getattr(self.cfg, level))) for (_, _, level), size in zip(self.fields, self.sizes)
+        ])
+        self.noise = np.zeros(len(self.scale))
+        self.noisy = [np.zeros(size) for size in self.sizes]
+
+    def __call__(self, sim_data: SimData) -> SimData:
+        if not self.cfg.enabled:
+            return sim_data
+        proprio = sim_data.proprio
+        if self.sizes is None or self.sizes != tuple(len(getattr(getattr(proprio, g), n)) for g, n, _ in self.fields):
+            self.compile(proprio)
+        self.rng.random(out=self.noise)  # [0, 1) -> [-level, level)
+        self.noise *= 2 * self.scale
+        self.noise -= self.scale
+        noisy = {'joint': {}, 'base': {}, 'imu': {}}
+        for i, (group, name, _) in enumerate(self.fields):
+            out = self.noisy[i]
+            np.add(getattr(getattr(proprio, group), name), self.noise[self.slices[i]:self.slices[i+1]], out=out)
+            noisy[group][name] = out
+        return replace(sim_data, proprio=RobotProprioception(
+            joint=replace(proprio.joint, **noisy['joint']),
+            base=replace(proprio.base, **noisy['base']),
+            imu=replace(proprio.imu, **noisy['imu']),
+        ))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : replay.py
+@Time    : 2026/10/17 17:25:10
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Render videos from recorded state trajectories
+'''
+import mujoco
+import numpy as np
+from pathlib import Path
+
+from robogauge.utils.logger import logger
+from robogauge.tasks.gauge.goal_data import VelocityGoal
+from robogauge.tasks.simulator.mujoco_config import MujocoConfig
+from robogauge.tasks.simulator.mujoco_simulator import MujocoSimulator
+from robogauge.tasks.simulator.trajectory import load_trajectory
+from robogauge.tasks.simulator.video_writer import AsyncVideoWriter
+
+def render_replay(
+        trajectory_path: str,
+        video_path: str = None,
+        width: int = None,
+        height: int = None,
+        fps: int = None,
+    ) -> Path:
+    """ Rebuild the scene of a trajectory recorded with `render.record_trajectory` and render it to mp4.
+    The model comes from the compiled model cache when possible, physics is not stepped (kinematic replay).
+    Returns:
+        Path: rendered video path, defaults to the trajectory path with `.mp4` suffix.
+    """
+    traj = load_trajectory(trajectory_path)
+    meta = traj['meta']
+    video_path = Path(trajectory_path).with_suffix('.mp4') if video_path is None else Path(video_path)
+    video_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cfg = MujocoConfig()
+    cfg.viewer.headless = True
+    cfg.render.save_video = False
+    cfg.render.record_trajectory = False
+    cfg.physics.native_pd = False
+    cfg.physics.simulation_dt = meta['sim_dt']
+    cfg.domain_rand.base_mass = 0.0
+    cfg.domain_rand.friction = 0.0
+    sim = MujocoSimulator(cfg)
+    sim.load(
+        meta['terrain_xmls'],
+        meta['robot_xml'],
+        meta['terrain_spawn_pos'],
+        meta['default_dof_pos'],
+        meta['invert_yaw'],
+    )
+    sim.renderer = mujoco.Renderer(
+        sim.mj_model,
+        height=height or cfg.render.height,
+        width=width or cfg.render.width,
+    )
+    writer = AsyncVideoWriter(str(video_path), fps=fps or meta['fps'], queue_size=cfg.render.queue_size, policy='block')
+
+    for i in range(len(traj['time'])):
+        sim.mj_data.time = traj['time'][i]
+        sim.mj_data.qpos[:] = traj['qpos'][i]
+        sim.mj_data.qvel[:] = traj['qvel'][i]
+        mujoco.mj_forward(sim.mj_model, sim.mj_data)
+        sim.update_proprio()
+        target_pos, target_velocity = traj['target_pos'][i], traj['target_velocity'][i]
+        sim.target_pos = None if np.isnan(target_pos).any() else target_pos
+        sim.target_velocity = None if np.isnan(target_velocity).any() else VelocityGoal(
+            lin_vel_x=target_velocity[0], lin_vel_y=target_velocity[1], ang_vel_yaw=target_velocity[2]
+        )
+        sim.renderer.update_scene(sim.mj_data, camera=sim.offscreen_cam)
+        sim.update_external_rendering(sim.renderer, ctype='renderer')
+        writer.append_data(sim.renderer.render())
+
+    writer.close()
+    sim.renderer = None
+    logger.info(f"Replay video ({len(traj['time'])} frames) saved at: {video_path}")
+    return video_path
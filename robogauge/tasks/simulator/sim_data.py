@@ -1,5 +1,13 @@
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+
+def copy_arrays(obj):
+    """ Shallow copy of a state dataclass with every numpy array copied. """
+    values = {}
+    for f in fields(obj):
+        value = getattr(obj, f.name)
+        values[f.name] = value.copy() if isinstance(value, np.ndarray) else value
+    return type(obj)(**values)
 
 @dataclass
 class JointState:
@@ -30,6 +38,14 @@ class RobotProprioception:
     base: BaseState
     imu: IMUState
 
+    def copy(self) -> 'RobotProprioception':
+        """ The simulator refreshes proprioception in place, copy it to keep a snapshot. """
+        return RobotProprioception(
+            joint=copy_arrays(self.joint),
+            base=copy_arrays(self.base),
+            imu=copy_arrays(self.imu),
+        )
+
 @dataclass
 class SimData:
     n_step: int
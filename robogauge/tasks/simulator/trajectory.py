@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : trajectory.py
+@Time    : 2026/10/17 17:03:26
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : State trajectory recorder, trajectories are rendered later by `render_replay`
+'''
+import json
+import numpy as np
+from pathlib import Path
+from typing import Optional, Sequence
+
+from robogauge.utils.logger import logger
+from robogauge.tasks.gauge.goal_data import VelocityGoal
+
+class TrajectoryRecorder:
+    """ Record qpos, qvel, time and the rendered goal (target position, command velocity) at a fixed fps.
+    Saved as a compressed npz, `meta` keeps what is needed to rebuild the scene (xml paths, spawn, ...).
+    """
+    def __init__(self, path: str, meta: dict):
+        self.path = Path(path)
+        self.meta = meta
+        self.time, self.qpos, self.qvel = [], [], []
+        self.target_pos, self.target_velocity = [], []
+
+    def record(self,
+            time: float,
+            qpos: np.ndarray,
+            qvel: np.ndarray,
+            target_pos: Optional[Sequence[float]] = None,
+            target_velocity: Optional[VelocityGoal] = None,
+        ):
+        self.time.append(time)
+        self.qpos.append(np.array(qpos))
+        self.qvel.append(np.array(qvel))
+        self.target_pos.append(np.full(3, np.nan) if target_pos is None else np.array(target_pos[:3], np.float64))
+        self.target_velocity.append(np.full(3, np.nan) if target_velocity is None else np.array(
+            [target_velocity.lin_vel_x, target_velocity.lin_vel_y, target_velocity.ang_vel_yaw]
+        ))
+
+    def save(self):
+        if len(self.time) == 0:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            self.path,
+            time=np.array(self.time),
+            qpos=np.stack(self.qpos),
+            qvel=np.stack(self.qvel),
+            target_pos=np.stack(self.target_pos),
+            target_velocity=np.stack(self.target_velocity),
+            meta=np.array(json.dumps(self.meta)),
+        )
+        logger.info(f"Trajectory ({len(self.time)} frames) saved at: {self.path}")
+
+def load_trajectory(path: str) -> dict:
+    with np.load(path) as data:
+        traj = {key: data[key] for key in data.files if key != 'meta'}
+        traj['meta'] = json.loads(str(data['meta']))
+    return traj
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : video_writer.py
+@Time    : 2026/10/17 16:12:40
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Video writer encoding frames on a background thread
+'''
+import queue
+import imageio
+import threading
+import numpy as np
+from typing import Literal
+
+from robogauge.utils.logger import logger
+
+class AsyncVideoWriter:
+    """ Same interface as the imageio writer (`append_data`, `close`), frames are put in a bounded queue
+    and encoded by a background thread, ffmpeg runs in its own process and releases the GIL while piping.
+    When the queue is full, `policy='block'` waits for the encoder and `policy='drop'` skips the frame.
+    """
+    def __init__(self, path: str, fps: int, queue_size: int = 64, policy: Literal['block', 'drop'] = 'block'):
+        assert policy in ['block', 'drop'], f"Unknown video queue policy '{policy}', use 'block' or 'drop'."
+        self.path = path
+        self.policy = policy
+        self.writer = imageio.get_writer(path, fps=fps)
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.num_dropped = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._encode_loop, name='video_encoder', daemon=True)
+        self.thread.start()
+
+    def _encode_loop(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                continue  # keep draining the queue, producer must not block on a dead encoder
+            try:
+                self.writer.append_data(frame)
+            except Exception as e:
+                self.error = e
+                logger.error(f"Video encoding failed for {self.path}: {e}")
+
+    def append_data(self, frame: np.ndarray):
+        """ `frame` must not be modified after calling, `mujoco.Renderer.render()` returns a new array. """
+        if self.policy == 'block':
+            self.frames.put(frame)
+            return
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            self.num_dropped += 1
+
+    def close(self):
+        """ Wait for the queued frames to be encoded and close the file. """
+        self.frames.put(None)
+        self.thread.join()
+        self.writer.close()
+        if self.num_dropped > 0:
+            logger.warning(f"Video encoder dropped {self.num_dropped} frames (queue full): {self.path}")
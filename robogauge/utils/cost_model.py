@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : cost_model.py
+@Time    : 2026/10/18 09:12:27
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Episode duration history, predicts task cost for longest-expected-first scheduling and ETA
+'''
+import os
+import json
+import uuid
+import threading
+from pathlib import Path
+
+from robogauge import ROBOGAUGE_ROOT_DIR
+
+HISTORY_PATH = Path(ROBOGAUGE_ROOT_DIR) / ".cache" / "task_durations.json"
+MAX_COUNT = 20  # running mean over the last ~MAX_COUNT durations of a key
+
+def make_cost_key(task_name: str, level, goals, friction) -> str:
+    goals = '+'.join(sorted(goals)) if goals else 'all'
+    return f"{task_name}|L{level}|{goals}|F{friction}"
+
+class TaskCostModel:
+    """ Mean episode wall time per (task, level, goal set, friction), stored in a local JSON history file.
+    Unknown keys fall back to the mean of keys sharing the task/level/goals, task/goals, task, then all keys.
+    """
+    def __init__(self, path: Path = HISTORY_PATH, default_cost: float = 60.0):
+        self.path = Path(path)
+        self.default_cost = default_cost
+        self.lock = threading.Lock()
+        self.history = self.load()
+        self.updates = {}  # key -> [durations] recorded since the last save
+        self.fallback_cache = {}  # fallback pattern -> mean
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def record(self, key: str, duration: float):
+        with self.lock:
+            entry = self.history.setdefault(key, {'mean': 0.0, 'count': 0})
+            entry['count'] = min(entry['count'] + 1, MAX_COUNT)
+            entry['mean'] += (duration - entry['mean']) / entry['count']
+            self.updates.setdefault(key, []).append(duration)
+            self.fallback_cache.clear()
+
+    def predict(self, key: str) -> float:
+        """ Expected episode wall time [s] of `key`. """
+        with self.lock:
+            if key in self.history:
+                return self.history[key]['mean']
+            task_name, level, goals, _ = key.split('|')
+            fallbacks = [  # (task, level, goals), (task, goals), (task,), all
+                (task_name, level, goals, None),
+                (task_name, None, goals, None),
+                (task_name, None, None, None),
+                (None, None, None, None),
+            ]
+            for pattern in fallbacks:
+                if pattern not in self.fallback_cache:
+                    means = [
+                        entry['mean'] for k, entry in self.history.items()
+                        if all(p is None or p == part for p, part in zip(pattern, k.split('|')))
+                    ]
+                    self.fallback_cache[pattern] = sum(means) / len(means) if means else None
+                if self.fallback_cache[pattern] is not None:
+                    return self.fallback_cache[pattern]
+            return self.default_cost
+
+    def save(self):
+        """ Merge the durations recorded since the last save into the file (other runs may have written it). """
+        with self.lock:
+            if not self.updates:
+                return
+            history = self.load()
+            for key, durations in self.updates.items():
+                entry = history.setdefault(key, {'mean': 0.0, 'count': 0})
+                for duration in durations:
+                    entry['count'] = min(entry['count'] + 1, MAX_COUNT)
+                    entry['mean'] += (duration - entry['mean']) / entry['count']
+            self.updates = {}
+            self.history = history
+            self.fallback_cache.clear()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, 'w') as file:
+                json.dump(history, file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+cost_model = None
+
+def get_cost_model() -> TaskCostModel:
+    """ Process-wide cost model, loaded on first use. """
+    global cost_model
+    if cost_model is None:
+        cost_model = TaskCostModel()
+    return cost_model
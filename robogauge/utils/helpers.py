@@ -70,6 +70,7 @@ def parse_args(args_list=None):
         {"name": "--model-path", "type": str, "help": "Path to the model file."},
         {"name": "--headless", "action": "store_true", "default": False, "help": "Run in headless mode."},
         {"name": "--save-video", "action": "store_true", "default": False, "help": "Save video output."},
+        {"name": "--record-trajectory", "action": "store_true", "default": False, "help": "Record state trajectories, render them later with scripts/render_replay.py."},
         {"name": "--seed", "type": int, "default": 42, "help": "Random seed."},
         {"name": "--write-tensorboard", "action": "store_true", "default": False, "help": "Write tensorboard logs."},
         {"name": "--plot-radar", "action": "store_true", "default": False, "help": "Plot radar charts for metrics."},
@@ -77,6 +78,9 @@ def parse_args(args_list=None):
         {"name": "--friction", "type": float, "default": 1.0, "help": "Set the ground friction coefficient."},
         {"name": "--level", "type": int, "help": "Set the difficulty level of the environment, range 1-10 (flat is 0)."},
         {"name": "--spawn-type", "type": str, "default": "level_search", "choices": ["level_eval", "level_search"], "help": "Spawn type for the robot when specify level (Default is level_search)."},
+        {"name": "--full-settle", "action": "store_true", "default": False, "help": "Settle the robot after every reset instead of restoring the first settled state."},
+        {"name": "--inference-backend", "type": str, "choices": ["torchscript", "optimized", "onnx", "numpy"], "help": "Policy inference backend, checked against torchscript on load."},
+        {"name": "--inference-threads", "type": int, "help": "Torch/onnxruntime intra-op threads for policy inference."},
         {"name": "--goals", "type": str, "nargs": "+", "help": "List of goal names to evaluate."},
 
         # Multiprocessing parameters, with different seeds
@@ -84,6 +88,7 @@ def parse_args(args_list=None):
         {"name": "--seeds", "type": int, "nargs": "+", "default": [0, 1, 2], "help": "List of random seeds for multiple runs."},
         {"name": "--base-masses", "type": float, "nargs": "+", "default": [0], "help": "List of base masses for the model."},
         {"name": "--frictions", "type": float, "nargs": "+", "default": [0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.25, 2.5], "help": "List of friction coefficients for the model."},
+        {"name": "--num-worlds", "type": int, "default": 1, "help": "Number of seeds stepped together in one process, batched MuJoCo worlds share one compiled model."},
 
         # Level pipeline parameters
         {"name": "--search-max-level", "action": "store_true", "default": False, "help": "Use level pipeline to search maximum level."},
@@ -92,10 +97,15 @@ def parse_args(args_list=None):
         # Stress pipeline parameters
         {"name": "--stress-benchmark", "action": "store_true", "default": False, "help": "Use stress pipeline to benchmark model robustness."},
         {"name": "--stress-terrain-names", "type": str, "nargs": "+", "default": ["flat", "slope_fd", "slope_bd", "wave", "stairs_fd", "stairs_bd"], "help": "List of terrain names for stress benchmark."},
+        {"name": "--resume", "type": str, "help": "Stress benchmark log dir to resume, finished episodes in its journal.jsonl are reused."},
 
         # Common parameters
         {"name": "--num-processes", "type": int, "default": 2, "help": "Number of parallel processes for Multi or Stress benchmark."},
+        {"name": "--executor", "type": str, "default": "local", "choices": ["local", "remote"], "help": "Run episodes on a local process pool, or on worker agents connected over TCP (robogauge/scripts/worker_agent.py)."},
+        {"name": "--coordinator-address", "type": str, "default": "127.0.0.1:6001", "help": "Listen address host:port of the remote executor (e.g. 0.0.0.0:6001 for other hosts), agents share the required ROBOGAUGE_AUTHKEY env secret."},
+        {"name": "--remote-task-timeout", "type": float, "default": 1800.0, "help": "[s] Remote episode tasks without result after this time (e.g. crashed agent worker) are queued again."},
         {"name": "--compress-logs", "action": "store_true", "default": False, "help": "Compress and delete logs after run."},
+        {"name": "--profile", "action": "store_true", "default": False, "help": "Record per-phase timing, steps/s and real time factor in results."},
     ]
     for param in parameters:
         parser.add_argument(param['name'], **{k: v for k, v in param.items() if k != 'name'})
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : job_store.py
+@Time    : 2026/10/18 19:42:16
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Durable SQLite (WAL) store of the evaluation server, shared by the API and main processes:
+- tasks: one row per submission (request, status, job key, timings, progress and response)
+- status_log: every status transition of a task
+- results: result blob per job key, finished job keys are answered from here (result cache)
+'''
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import functools
+from pathlib import Path
+from typing import List
+
+from robogauge import ROBOGAUGE_ROOT_DIR, __version__
+from robogauge.utils.helpers import parse_path
+from robogauge.utils.journal import file_sha256
+
+DB_PATH = Path(ROBOGAUGE_ROOT_DIR) / ".cache" / "server_jobs.sqlite"
+
+class ResponseStatus:
+    PENDING = "pending"
+    PROCESSING = "processing"
+    FINISHED = "finished"
+    ERROR = "error"
+    NOT_FOUND = "not_found"
+    SUPERSEDED = "superseded"  # dropped pending job, a newer checkpoint of the experiment is evaluated
+
+FINAL_STATUSES = [ResponseStatus.FINISHED, ResponseStatus.ERROR, ResponseStatus.NOT_FOUND, ResponseStatus.SUPERSEDED]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    experiment_name TEXT,
+    step INTEGER,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    job_key TEXT,
+    submitted_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    response TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_experiment_step ON tasks (experiment_name, step);
+CREATE TABLE IF NOT EXISTS status_log (
+    task_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    job_key TEXT PRIMARY KEY,
+    results TEXT NOT NULL,
+    created_at REAL
+);
+"""
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """ Package version and hash of the source and MJCF files, results of another code version aren't reused. """
+    hasher = hashlib.sha256()
+    root = Path(ROBOGAUGE_ROOT_DIR)
+    for path in sorted([*(root / "robogauge").rglob("*.py"), *(root / "resources").rglob("*.xml")]):
+        hasher.update(str(path.relative_to(root)).encode())
+        hasher.update(path.read_bytes())
+    return f"{__version__}+{hasher.hexdigest()[:12]}"
+
+def make_job_key(model_path: str, args_list: List[str]) -> str:
+    """ Same policy file content, arguments and code version give the same results, wherever the file is stored. """
+    config = {'model_sha256': file_sha256(parse_path(model_path)), 'args': list(args_list), 'code': code_version()}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+class JobStore:
+    """ One SQLite connection per thread, WAL lets the API process read while the main process writes. """
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self.local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def add_task(self, task_id: str, request: dict, status: str):
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO tasks (task_id, experiment_name, step, request, status, submitted_at, response) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, request.get('experiment_name'), request.get('step'), json.dumps(request), status, now, json.dumps({"status": status})),
+            )
+            conn.execute("INSERT INTO status_log VALUES (?, ?, ?)", (task_id, status, now))
+
+    def update(self, task_id: str, response: dict, job_key: str = None):
+        """ Set the response of a task (its 'status' is the task status), 'results' are stored per job key
+        with `put_result` and joined on read.
+        """
+        now = time.time()
+        status = response['status']
+        response = {key: value for key, value in response.items() if key != 'results'}
+        with self.connection() as conn:
+            row = conn.execute("SELECT status FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return
+            conn.execute(
+                "UPDATE tasks SET status = ?, response = ?, job_key = COALESCE(?, job_key), "
+                "started_at = CASE WHEN ? THEN COALESCE(started_at, ?) ELSE started_at END, "
+                "finished_at = CASE WHEN ? THEN ? ELSE finished_at END WHERE task_id = ?",
+                (
+                    status, json.dumps(response, ensure_ascii=False), job_key,
+                    status == ResponseStatus.PROCESSING, now, status in FINAL_STATUSES, now, task_id,
+                ),
+            )
+            if row['status'] != status:
+                conn.execute("INSERT INTO status_log VALUES (?, ?, ?)", (task_id, status, now))
+
+    def put_result(self, job_key: str, results: dict):
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (job_key, json.dumps(results, ensure_ascii=False), time.time()),
+            )
+
+    def get_result(self, job_key: str) -> dict:
+        row = self.connection().execute("SELECT results FROM results WHERE job_key = ?", (job_key,)).fetchone()
+        return json.loads(row['results']) if row is not None else None
+
+    def to_response(self, row: sqlite3.Row) -> dict:
+        response = json.loads(row['response'])
+        if row['job_key'] is not None and response['status'] == ResponseStatus.FINISHED:
+            response['results'] = self.get_result(row['job_key'])
+        return response
+
+    def get(self, task_id: str) -> dict:
+        """ Response of a task, None if unknown. Reading doesn't remove it. """
+        row = self.connection().execute("SELECT response, job_key FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self.to_response(row) if row is not None else None
+
+    def query(self, experiment_name: str = None, step: int = None, status: str = None, limit: int = 100) -> List[dict]:
+        """ Tasks newest first, with their request, timings and response. """
+        conditions, params = [], []
+        for column, value in [('experiment_name', experiment_name), ('step', step), ('status', status)]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection().execute(
+            f"SELECT * FROM tasks {where} ORDER BY submitted_at DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [{
+            'task_id': row['task_id'],
+            'experiment_name': row['experiment_name'],
+            'step': row['step'],
+            'job_key': row['job_key'],
+            'submitted_at': row['submitted_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            **self.to_response(row),
+        } for row in rows]
+
+    def unfinished(self) -> List[tuple]:
+        """ (task_id, request) of the tasks a stopped server left pending or processing, oldest first. """
+        placeholders = ', '.join('?' * len(FINAL_STATUSES))
+        rows = self.connection().execute(
+            f"SELECT task_id, request FROM tasks WHERE status NOT IN ({placeholders}) ORDER BY submitted_at",
+            tuple(FINAL_STATUSES),
+        ).fetchall()
+        return [(row['task_id'], json.loads(row['request'])) for row in rows]
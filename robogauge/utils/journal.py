@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : journal.py
+@Time    : 2026/10/18 10:37:52
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Append-only journal of finished episode tasks, long benchmarks resume from it after a crash
+'''
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import List
+
+from robogauge.utils.helpers import parse_path, class_to_dict
+from robogauge.utils.measure import Stat
+
+FINGERPRINT_ARGS = ['num_worlds']  # args changing episode results besides the task configs and the task key
+UNFINGERPRINTED_CFG_KEYS = ['viewer', 'render', 'model_cache', 'write_tensorboard']  # config sections without effect on results
+
+def file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def make_fingerprint(args, model_paths: List[str], task_cfgs: List[tuple] = ()) -> str:
+    """ Hash of the policy files and the run configuration, a journal of another config can't be resumed.
+    Args:
+        task_cfgs: effective (sim_cfg, gauger_cfg, robot_cfg) of each task with the args applied, e.g. inference
+            backend, native PD, noise and truncation settings
+    """
+    config = {name: getattr(args, name, None) for name in FINGERPRINT_ARGS}
+    config['model_sha256'] = [file_sha256(parse_path(path)) for path in sorted(set(model_paths))]
+    config['cfgs'] = []
+    for cfgs in task_cfgs:
+        for cfg in cfgs:
+            cfg = {key: value for key, value in class_to_dict(cfg).items() if key not in UNFINGERPRINTED_CFG_KEYS}
+            if 'control' in cfg:
+                cfg['control'] = {key: value for key, value in cfg['control'].items() if key != 'model_path'}  # file hashed above
+            config['cfgs'].append(cfg)
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def to_json(obj):
+    """ Results to JSON values, `Stat`s are tagged to be restored by `from_json`. """
+    if isinstance(obj, Stat):
+        return {'__stat__': [obj.mean, obj.std]}
+    if isinstance(obj, dict):
+        return {key: to_json(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_json(value) for value in obj]
+    if hasattr(obj, 'tolist'):  # numpy scalars/arrays
+        return obj.tolist()
+    return obj
+
+def from_json(obj: dict):
+    if '__stat__' in obj:
+        return Stat(*obj['__stat__'])
+    return obj
+
+class Journal:
+    """ One JSON line per finished task: {'key', 'fingerprint', 'result'}, flushed and fsynced on append.
+    A torn last line (process killed while writing) is cut off on load, a corrupt line before it raises ValueError.
+    Raise ValueError if the journal was written with another config fingerprint, mixing its episodes would change
+    the aggregate.
+    """
+    def __init__(self, path: Path, fingerprint: str, logger=None):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.entries = {}
+        if self.path.exists():
+            self.load(logger)
+        if logger is not None and self.entries:
+            logger.info(f"📒 Journal {self.path}: {len(self.entries)} finished tasks reused.")
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def load(self, logger=None):
+        with open(self.path, 'rb') as file:
+            lines = file.readlines()
+        offset = 0  # end of the last valid line
+        for i, line in enumerate(lines):
+            try:
+                entry = json.loads(line, object_hook=from_json)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                if i < len(lines) - 1:
+                    raise ValueError(f"Journal {self.path} line {i + 1} is corrupt, only the last line may be torn.")
+                if logger is not None:
+                    logger.warning(f"⚠️ Journal {self.path}: torn last line cut off.")
+                with open(self.path, 'r+b') as file:
+                    file.truncate(offset)
+                return
+            if entry.get('fingerprint') != self.fingerprint:
+                raise ValueError(
+                    f"Journal {self.path} was written with config fingerprint {entry.get('fingerprint')}, this run "
+                    f"has {self.fingerprint} (other model or settings), resume with the same arguments or start a new run."
+                )
+            self.entries[entry['key']] = entry['result']
+            offset += len(line)
+        if lines and not lines[-1].endswith(b'\n'):  # complete record killed before its newline
+            with open(self.path, 'ab') as file:
+                file.write(b'\n')
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def get(self, key: str):
+        return self.entries[key]
+
+    def append(self, key: str, result):
+        """ Returns the result as read back from the journal (tuples become lists), so fresh and resumed
+        results look the same to the aggregation.
+        """
+        line = json.dumps({'key': key, 'fingerprint': self.fingerprint, 'result': to_json(result)}, default=str)
+        self.file.write(line + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.entries[key] = json.loads(line, object_hook=from_json)['result']
+        return self.entries[key]
+
+    def close(self):
+        self.file.close()
@@ -50,6 +50,9 @@ class ColorFormatter(logging.Formatter):
 
 
 class Logger:
+    """ The global `logger` of a process, or the own logger of a (nested) pipeline run, several of them run side by side
+    in StressPipeline and the server. Pipeline loggers are released with `close` when their run finishes.
+    """
     logger: logging.Logger = None
     log_dir: Path = None
     writer: SummaryWriter = None
@@ -59,7 +62,8 @@ class Logger:
         run_name,
         console_output=True, color_output=True,
         log_level=logging.DEBUG, save_file_mode='a',
-        parent_log_dir=None
+        parent_log_dir=None,
+        log_dir=None
     ):
         """
         Create customed Logger
@@ -71,20 +75,16 @@ class Logger:
             log_level (int, optional): Defaults to logging.DEBUG.
             save_file_mode (str, optional): The mode of saving to path_log_file
             parent_log_dir (Path | str, optional): If specified, log_dir will be created under this directory.
+            log_dir (Path | str, optional): Reuse this existing log directory (e.g. resumed run).
 
         Returns:
             logging.Logger: logger
         """
-        self.logger = logging.getLogger(experiment_name + "_logger")
+        self.close()  # previous run of this process (warm worker), its log file stays open otherwise
+        self.logger = logging.getLogger(f"{experiment_name}_{id(self):x}_logger")  # loggers of concurrent runs with the same name stay apart
         self.logger.setLevel(log_level)
         self.logger.propagate = False
 
-        # Clear existing handlers to prevent duplicate logging
-        if self.logger.hasHandlers():
-            for handler in self.logger.handlers[:]:
-                handler.close()
-                self.logger.removeHandler(handler)
-
         self.time_tag = time.strftime("%Y%m%d-%H-%M-%S")
         self.tag = f"{self.time_tag}_{run_name}"
         self.experiment_name = experiment_name
@@ -108,7 +108,7 @@ class Logger:
             baes_dir = Path(parent_log_dir)
         else:
             baes_dir = Path(ROBOGAUGE_LOGS_DIR)
-        self.log_dir = baes_dir / experiment_name / self.tag
+        self.log_dir = Path(log_dir) if log_dir else baes_dir / experiment_name / self.tag
         self.log_dir.mkdir(parents=True, exist_ok=True)
         path_log_file = self.log_dir / "stdout.log"
         if path_log_file:
@@ -116,15 +116,29 @@ class Logger:
             fh.setFormatter(file_formatter)
             self.logger.addHandler(fh)
         self.info(f"Logs saved at: {path_log_file}")
+
+    def close(self):
+        """ Close the handlers (log file) and tensorboard writer, and drop the logging.Logger from the registry. """
+        self.close_tensorboard()
+        if self.logger is None:
+            return
+        for handler in self.logger.handlers[:]:
+            handler.close()
+            self.logger.removeHandler(handler)
+        logging.Logger.manager.loggerDict.pop(self.logger.name, None)
     
     def get_data_path(self, robot_name: str, model_name: str, goal_name: str) -> Path:
         data_path = Path(ROBOGAUGE_LOGS_DIR) / self.experiment_name / 'data' / robot_name / model_name / goal_name / self.tag
         data_path.mkdir(parents=True, exist_ok=True)
         return data_path
     
-    def create_tensorboard(self, robot_name: str, model_name: str, goal_name: str):
+    def close_tensorboard(self):
         if self.writer is not None:
             self.writer.close()
+            self.writer = None
+
+    def create_tensorboard(self, robot_name: str, model_name: str, goal_name: str):
+        self.close_tensorboard()
         data_path = self.get_data_path(robot_name, model_name, goal_name)
         self.writer = SummaryWriter(str(data_path))
         self.info(f"Tensorboard writer created at: {data_path}")
@@ -1,15 +1,16 @@
 import numpy as np
 
-def get_projected_gravity(quat):
+def get_projected_gravity(quat, out=None):
     """ Compute world frame gravity (0, 0, -1) projected into robot base frame.
     Args:
         quat: (4,) quaternion (w, x, y, z) from robot base to world frame
+        out: (3,) optional array the result is written to
     Returns:
         projected_gravity: (3,) projected gravity vector in robot base frame
     """
     qw, qx, qy, qz = quat
 
-    gravity_orientation = np.zeros(3)
+    gravity_orientation = np.zeros(3) if out is None else out
 
     gravity_orientation[0] = 2 * (-qz * qx + qw * qy)
     gravity_orientation[1] = -2 * (qz * qy + qw * qx)
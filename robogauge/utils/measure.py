@@ -1,3 +1,9 @@
+import time
+from typing import List, NamedTuple
+from collections import defaultdict
+
+import numpy as np
+
 class Average:
     def __init__(self):
         self.avg = 0.0
@@ -11,3 +17,105 @@ class Average:
     @property
     def mean(self):
         return self.avg
+
+class Stat(NamedTuple):
+    """ Mean ± std of a metric, results carry numbers and are formatted only for YAML, logs and the server API. """
+    mean: float
+    std: float = 0.0
+
+    @classmethod
+    def of(cls, values) -> 'Stat':
+        return cls(float(np.mean(values)), float(np.std(values)))
+
+    def __str__(self):
+        return f"{self.mean:.4f} ± {self.std:.4f}"
+
+def format_results(results):
+    """ Copy of nested results with every `Stat` as "0.1234 ± 0.0567" string. """
+    if isinstance(results, Stat):
+        return str(results)
+    if isinstance(results, dict):
+        return {key: format_results(value) for key, value in results.items()}
+    if isinstance(results, list):
+        return [format_results(value) for value in results]
+    return results
+
+class PhaseTimer:
+    """ Accumulate wall time and call count of hot path phases, `tic`/`toc` cost nothing when disabled.
+    Usage:
+        t = timer.tic()
+        ...
+        timer.toc('physics', t, count=nstep)
+    """
+    def __init__(self, enabled: bool = False, sim_dt: float = None):
+        self.enabled = enabled
+        self.sim_dt = sim_dt
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.start()
+
+    def start(self):
+        """ Start of the measured wall time (phases recorded before are kept). """
+        self.start_time = time.perf_counter()
+
+    def tic(self) -> float:
+        return time.perf_counter() if self.enabled else 0.0
+
+    def toc(self, phase: str, tic: float, count: int = 1):
+        if not self.enabled:
+            return
+        self.totals[phase] += time.perf_counter() - tic
+        self.counts[phase] += count
+
+    def add(self, phase: str, seconds: float, count: int = 1):
+        """ Record time measured elsewhere, e.g. a share of a batched forward. """
+        if not self.enabled:
+            return
+        self.totals[phase] += seconds
+        self.counts[phase] += count
+
+    def summary(self) -> dict:
+        """ Timing summary saved in results, `physics` counts are the number of physics steps. """
+        physics_steps = self.counts.get('physics', 0)
+        return make_timing_summary(
+            wall_time=time.perf_counter() - self.start_time,
+            sim_time=physics_steps * (self.sim_dt or 0.0),
+            physics_steps=physics_steps,
+            num_runs=1,
+            phases={name: {'total': total, 'count': self.counts[name]} for name, total in self.totals.items()},
+        )
+
+def make_timing_summary(wall_time: float, sim_time: float, physics_steps: int, num_runs: int, phases: dict) -> dict:
+    return {
+        'num_runs': int(num_runs),
+        'wall_time': float(wall_time),
+        'sim_time': float(sim_time),
+        'physics_steps': int(physics_steps),
+        'steps_per_second': float(physics_steps / wall_time) if wall_time > 0 else 0.0,
+        'real_time_factor': float(sim_time / wall_time) if wall_time > 0 else 0.0,
+        'phases': {
+            name: {
+                'total': float(phase['total']),
+                'count': int(phase['count']),
+                'mean_us': float(phase['total'] / phase['count'] * 1e6) if phase['count'] > 0 else 0.0,
+            } for name, phase in sorted(phases.items(), key=lambda x: -x[1]['total'])
+        },
+    }
+
+def merge_timings(timings: List[dict]) -> dict:
+    """ Sum timing summaries of several runs, throughput is per worker (total steps / summed wall time). """
+    timings = [t for t in timings if t]
+    if not timings:
+        return None
+    phases = defaultdict(lambda: {'total': 0.0, 'count': 0})
+    for timing in timings:
+        for name, phase in timing['phases'].items():
+            phases[name]['total'] += phase['total']
+            phases[name]['count'] += phase['count']
+    return make_timing_summary(
+        wall_time=sum(t['wall_time'] for t in timings),
+        sim_time=sum(t['sim_time'] for t in timings),
+        physics_steps=sum(t['physics_steps'] for t in timings),
+        num_runs=sum(t['num_runs'] for t in timings),
+        phases=phases,
+    )
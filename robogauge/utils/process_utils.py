@@ -5,10 +5,14 @@
 @Author  : wty-yy
 @Version : 1.0
 @Blog    : https://wty-yy.github.io/
-@Desc    : No Daemon Pool for Multiprocessing
+@Desc    : No Daemon Pool, executor interface and shared warm Worker Pool for Multiprocessing
 '''
+import queue
+import threading
 import multiprocessing
 import multiprocessing.pool
+from functools import partial
+from collections import deque
 
 class NoDaemonProcess(multiprocessing.Process):
     @property
@@ -27,3 +31,180 @@ class NoDaemonPool(multiprocessing.pool.Pool):
         proc = super(NoDaemonPool, self).Process(*args, **kwds)
         proc.__class__ = NoDaemonProcess
         return proc
+
+def warm_up_worker(num_threads: int = 0):
+    """ Pool initializer, import the heavy modules once per worker process.
+    Args:
+        num_threads: torch intra-op threads of policy inference (--inference-threads), 0 keeps the default
+    """
+    import torch
+    import mujoco
+    from dm_control import mjcf
+    from torch.utils import tensorboard
+    import robogauge.tasks  # register tasks
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+
+class Executor:
+    """ Interface of the episode task executors used by the pipelines and `TaskGraphScheduler`:
+    - `WorkerPool`: spawn processes on this host
+    - `RemoteExecutor`: worker agents on other hosts connected over TCP (`remote_executor.py`)
+    `num_processes` is the number of tasks run at the same time, callbacks run in a background thread.
+    """
+    num_processes: int
+
+    def apply_async(self, func, args=(), callback=None, error_callback=None):
+        raise NotImplementedError
+
+    def imap_unordered(self, func, iterable):
+        """ Results in completion order, raises the first task error. """
+        results = queue.Queue()
+        num_tasks = 0
+        for data in iterable:
+            self.apply_async(
+                func, (data,),
+                callback=lambda result: results.put((result, None)),
+                error_callback=lambda e: results.put((None, e)),
+            )
+            num_tasks += 1
+        for _ in range(num_tasks):
+            result, error = results.get()
+            if error is not None:
+                raise error
+            yield result
+
+    def close(self):
+        """ Wait for submitted tasks and release the workers. """
+        raise NotImplementedError
+
+    def terminate(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+class WorkerPool(Executor):
+    """ Long-lived spawn pool shared by all (nested) Multi/Level/Stress evaluations of one top-level run.
+    Workers keep their imports and per-path model caches (policies, compiled MuJoCo models) between tasks.
+    Usage:
+        with WorkerPool(num_processes) as pool:
+            MultiPipeline(args, pool=pool).run()
+    """
+    def __init__(self, num_processes: int, num_threads: int = 0):
+        self.num_processes = num_processes
+        ctx = multiprocessing.get_context('spawn')
+        self.pool = NoDaemonPool(processes=num_processes, context=ctx, initializer=warm_up_worker, initargs=(num_threads,))
+
+    def imap_unordered(self, func, iterable):
+        return self.pool.imap_unordered(func, iterable)
+
+    def apply_async(self, func, args=(), callback=None, error_callback=None):
+        return self.pool.apply_async(func, args, callback=callback, error_callback=error_callback)
+
+    def close(self):
+        """ Wait for submitted tasks and stop the workers. """
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
+
+class FairShareExecutor:
+    """ Share one executor between concurrent jobs (server), each job runs on its own `Executor` view.
+    A free worker goes to the waiting job with the fewest running tasks (max-min fair share), so a job alone
+    uses all workers and a new job gets its share as soon as tasks of the others finish.
+    Usage:
+        shared = FairShareExecutor(WorkerPool(num_processes))
+        with shared.job_view(job_id) as pool:  # in the thread of each job
+            StressPipeline(args, pool=pool).run()
+    """
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self.num_processes = executor.num_processes
+        self.lock = threading.Lock()
+        self.queues = {}  # job -> deque of (func, args, callback, error_callback), jobs in arrival order
+        self.running = {}  # job -> running tasks
+        self.num_running = 0
+
+    def job_view(self, job) -> 'JobExecutor':
+        with self.lock:
+            self.queues[job] = deque()
+            self.running.setdefault(job, 0)
+        return JobExecutor(self, job)
+
+    def submit(self, job, func, args, callback, error_callback):
+        with self.lock:
+            self.queues[job].append((func, args, callback, error_callback))
+            self.dispatch()
+
+    def dispatch(self):
+        """ Start queued tasks while workers are free, called with `lock` held. """
+        while self.num_running < self.num_processes:
+            waiting = [job for job, tasks in self.queues.items() if tasks]
+            if not waiting:
+                return
+            job = min(waiting, key=lambda job: self.running[job])
+            func, args, callback, error_callback = self.queues[job].popleft()
+            self.running[job] += 1
+            self.num_running += 1
+            self.executor.apply_async(
+                func, args,
+                callback=partial(self.finish, job, callback),
+                error_callback=partial(self.finish, job, error_callback),
+            )
+
+    def finish(self, job, callback, value):
+        with self.lock:
+            self.running[job] -= 1
+            self.num_running -= 1
+            if job not in self.queues and self.running[job] == 0:
+                self.running.pop(job)
+            self.dispatch()
+        if callback is not None:
+            callback(value)
+
+    def remove_job(self, job):
+        """ Drop the queued tasks of a finished job, its running tasks finish in the background. """
+        with self.lock:
+            self.queues.pop(job, None)
+            if self.running.get(job) == 0:
+                self.running.pop(job)
+
+    def shares(self) -> dict:
+        """ job -> (running, queued) tasks """
+        with self.lock:
+            return {job: (self.running.get(job, 0), len(tasks)) for job, tasks in self.queues.items()}
+
+class JobExecutor(Executor):
+    """ Executor view of one job on a `FairShareExecutor`. """
+    def __init__(self, shared: FairShareExecutor, job):
+        self.shared = shared
+        self.job = job
+        self.num_processes = shared.num_processes  # the job may use every worker when alone
+
+    def apply_async(self, func, args=(), callback=None, error_callback=None):
+        self.shared.submit(self.job, func, args, callback, error_callback)
+
+    def close(self):
+        self.shared.remove_job(self.job)
+
+    def terminate(self):
+        self.shared.remove_job(self.job)
+
+def use_executor(args) -> bool:
+    """ Whether a top-level run needs an executor, otherwise episodes run serially in this process. """
+    return args.num_processes > 1 or getattr(args, 'executor', 'local') == 'remote'
+
+def make_executor(args) -> Executor:
+    """ Executor of a top-level run: local spawn pool, or the coordinator of remote worker agents (--executor remote). """
+    if getattr(args, 'executor', 'local') == 'remote':
+        from robogauge.utils.remote_executor import RemoteExecutor, parse_address
+        return RemoteExecutor(args.num_processes, parse_address(args.coordinator_address), task_timeout=args.remote_task_timeout)
+    return WorkerPool(args.num_processes, getattr(args, 'inference_threads', None) or 0)
@@ -9,11 +9,13 @@
 '''
 from tqdm import tqdm
 import multiprocessing
-from typing import Dict
+from typing import Callable, Dict
 from threading import Thread
 from dataclasses import dataclass
 import heapq
 
+from robogauge.utils.logger import logger
+
 class ProgressTypes:
     INIT = 'init'       # Init progress (set total, desc)
     UPDATE = 'update'   # Update progress value (set value)
@@ -21,6 +23,10 @@ class ProgressTypes:
     RESET = 'reset'     # Reset progress bar (set total, desc)
     FINISH = 'finish'   # Mark completion (set desc)
     ERROR = 'error'     # Mark error (set desc)
+    ETA = 'eta'         # Expected remaining seconds of the whole run (set value), for MAIN_BAR_ID
+    RESULT = 'result'   # Partial result of a task, e.g. found level and score (set value: dict)
+
+MAIN_BAR_ID = -1  # task_id of messages for the main progress bar
 
 @dataclass
 class ProgressData:
@@ -48,9 +54,50 @@ def report_progress(progress_data: ProgressData, msg_type, value=None, desc=None
         desc = msg_prefix + desc
     queue.put((task_id, msg_type, {'value': value, 'desc': desc, 'total': total}))
 
+class ProgressState:
+    """ Structured view of the progress messages of one run (server streaming), fed by `ProgressMonitor.on_message`. """
+    def __init__(self, total_rows: int = 0):
+        self.total = total_rows
+        self.done = 0
+        self.eta = None
+        self.tasks: Dict[int, Dict] = {}  # task_id -> {'desc', 'n', 'total', 'status'}
+        self.results: Dict[int, Dict] = {}  # task_id -> partial result of ProgressTypes.RESULT
+
+    def update(self, task_id: int, msg_type: str, data: dict):
+        if task_id == MAIN_BAR_ID:
+            if msg_type == ProgressTypes.ETA:
+                self.eta = data.get('value')
+            elif msg_type == ProgressTypes.INIT:
+                self.total = data.get('total') or self.total
+            return
+        if msg_type == ProgressTypes.RESULT:
+            self.results.setdefault(task_id, {}).update(data.get('value') or {})
+            return
+        task = self.tasks.setdefault(task_id, {'desc': '', 'n': 0, 'total': 0, 'status': 'running'})
+        if data.get('desc'):
+            task['desc'] = data['desc']
+        if msg_type in [ProgressTypes.INIT, ProgressTypes.RESET]:
+            task['n'], task['total'] = 0, data.get('total') or 0
+        elif msg_type == ProgressTypes.UPDATE:
+            task['n'] += data.get('value') or 1
+        elif msg_type in [ProgressTypes.FINISH, ProgressTypes.ERROR]:
+            task['status'] = 'error' if msg_type == ProgressTypes.ERROR else 'finished'
+            self.done += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'done': self.done,
+            'eta': self.eta,
+            'running': {task_id: task for task_id, task in self.tasks.items() if task['status'] == 'running'},
+            'results': dict(self.results),
+        }
+
 class ProgressMonitor:
-    def __init__(self, total_rows):
+    def __init__(self, total_rows, on_message: Callable = None):
+        """ on_message: called with (task_id, msg_type, data) of every message, e.g. `ProgressState.update` """
         self.total_rows = total_rows
+        self.on_message = on_message
         self.active_bars: Dict[int, Dict] = {} 
         self.free_slots = []
         self.max_slot_used = 0 
@@ -76,19 +123,32 @@ class ProgressMonitor:
             total=self.total_rows, 
             position=0, 
             desc="🚀 Total Progress", 
-            bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [Done: {n_fmt}] [{elapsed}<{remaining}]",
+            bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [Done: {n_fmt}] [{elapsed}{postfix}]",
             leave=True,
-            smoothing=0.1  # Optional: set smoothing factor (0-1) to prevent drastic ETA fluctuations due to slow tasks
-        )
+        )  # ETA comes from the scheduler cost model (ProgressTypes.ETA), tasks have very different durations
         
         # Number of tasks still pending
         pending_tasks = self.total_rows
+        listener_failed = False
         
         while pending_tasks > 0:
             record = queue.get()
             if record is None: break
             
             task_id, msg_type, data = record
+            if self.on_message is not None:
+                try:
+                    self.on_message(task_id, msg_type, data)
+                except Exception as e:  # a failing listener must not stop the monitor
+                    if not listener_failed:
+                        listener_failed = True
+                        logger.warning(f"⚠️ Progress listener failed, later failures aren't logged: {type(e).__name__}: {e}")
+            if msg_type == ProgressTypes.RESULT:
+                continue
+            if task_id == MAIN_BAR_ID:
+                if msg_type == ProgressTypes.ETA and data.get('value') is not None:
+                    main_bar.set_postfix_str(f"ETA {tqdm.format_interval(data['value'])}")
+                continue
             
             # --- Dynamically create/get sub progress bars ---
             if task_id not in self.active_bars:
@@ -157,17 +217,18 @@ class ProgressMonitor:
         for info in self.active_bars.values():
             info['bar'].close()
 
-def start_progress_monitor_thread(total_rows):
+def start_progress_monitor_thread(total_rows, on_message: Callable = None):
     """
     Create and start a ProgressMonitor thread. Queue is returned for reporting progress.
     Args:
         total_rows: int, number of tasks to monitor
+        on_message: called with (task_id, msg_type, data) of every message
     Returns:
         queue: multiprocessing.Queue
         monitor_thread: threading.Thread
     """
     queue = multiprocessing.Manager().Queue()
-    monitor = ProgressMonitor(total_rows)
+    monitor = ProgressMonitor(total_rows, on_message)
     monitor_thread = Thread(target=monitor.listener_loop, args=(queue,))
     monitor_thread.start()
     return queue, monitor_thread
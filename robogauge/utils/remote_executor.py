@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : remote_executor.py
+@Time    : 2026/10/18 14:05:21
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Remote executor over TCP (stdlib only), the top-level run is the coordinator and worker agents
+(`robogauge/scripts/worker_agent.py`) on other hosts connect to it, pull episode tasks and push the results back.
+Tasks of a lost agent, or running longer than the task timeout (e.g. the agent pool worker crashed), are queued again,
+a timed out attempt keeps its agent process counted as busy until it returns.
+Agents need the same code and model paths as the coordinator.
+Messages (pickled by `multiprocessing.connection`):
+- agent -> coordinator: ('hello', hostname, num_processes), ('result', task_id, result, error)
+- coordinator -> agent: ('task', task_id, func, args)
+'''
+import os
+import time
+import pickle
+import threading
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import Listener, Connection, answer_challenge, deliver_challenge
+from typing import Tuple
+
+from robogauge.utils.logger import logger
+from robogauge.utils.process_utils import Executor
+
+DEFAULT_PORT = 6001
+HANDSHAKE_TIMEOUT = 30.0  # [s] for the hello message of a new agent
+
+def get_authkey() -> bytes:
+    """ Shared secret of coordinator and agents, set ROBOGAUGE_AUTHKEY on every host.
+    Authenticated peers exchange pickles (code execution), so there is no default secret.
+    """
+    authkey = os.environ.get('ROBOGAUGE_AUTHKEY')
+    if not authkey:
+        raise ValueError("Remote executor needs a shared secret, set the ROBOGAUGE_AUTHKEY env on the coordinator and every agent.")
+    return authkey.encode()
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """ 'host:port' or 'host' -> (host, port) """
+    host, _, port = address.rpartition(':') if ':' in address else (address, '', DEFAULT_PORT)
+    return host, int(port)
+
+def picklable_error(e: Exception) -> Exception:
+    """ Task errors are sent back to the coordinator, unpicklable ones as RuntimeError with the traceback. """
+    try:
+        pickle.loads(pickle.dumps(e))
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}\n{''.join(traceback.format_exception(type(e), e, e.__traceback__))}")
+
+@dataclass
+class AgentConnection:
+    conn: Connection
+    name: str
+    num_processes: int
+    in_flight: dict = field(default_factory=dict)  # task id -> number of attempts running on this agent
+
+    def load(self) -> int:
+        return sum(self.in_flight.values())
+
+class RemoteExecutor(Executor):
+    """ Coordinator of remote worker agents, tasks are queued until an agent has a free process.
+    Usage:
+        with RemoteExecutor(num_processes, ('127.0.0.1', 6001)) as pool:
+            StressPipeline(args, pool=pool).run()
+    Args:
+        num_processes: expected total agent processes, `TaskGraphScheduler` keeps this many tasks in flight
+        address: listen address of the coordinator, localhost by default, listen on a trusted network only
+        task_timeout: [s] a task without result after this time is queued again, None waits forever.
+            Tasks fail with ConnectionError if no agent is connected for this long
+        max_attempts: a task timed out this many times fails with TimeoutError
+    """
+    def __init__(
+        self, num_processes: int, address: Tuple[str, int] = ('127.0.0.1', DEFAULT_PORT), authkey: bytes = None,
+        task_timeout: float = None, max_attempts: int = 3,
+    ):
+        self.num_processes = num_processes
+        self.authkey = authkey or get_authkey()
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        self.cond = threading.Condition()
+        self.tasks = {}  # task_id -> (func, args, callback, error_callback)
+        self.attempts = {}  # task_id -> number of timeouts
+        self.sent = {}  # task_id -> (agent id, send time) of the latest attempt, until it times out or returns
+        self.pending = deque()  # task ids waiting for an agent
+        self.agents = {}  # agent id -> AgentConnection
+        self.num_tasks = 0
+        self.num_agents = 0
+        self.closed = False
+        self.no_agents_since = time.time()
+        self.listener = Listener(address)  # authenticated per agent in `handshake`, a stalled peer can't block the others
+        self.address = self.listener.address
+        logger.info(f"🛰️ Remote executor listening on {self.address[0]}:{self.address[1]}, waiting for worker agents.")
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        if task_timeout is not None:
+            threading.Thread(target=self.timeout_loop, daemon=True).start()
+
+    def accept_loop(self):
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+            except Exception as e:  # listener closed
+                if not self.closed:
+                    logger.warning(f"⚠️ Worker agent connection failed: {e}")
+                continue
+            threading.Thread(target=self.handshake, args=(conn,), daemon=True).start()
+
+    def handshake(self, conn: Connection):
+        """ Authenticate a new agent and read its hello, then serve it in this thread. """
+        try:
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+            if not conn.poll(HANDSHAKE_TIMEOUT):
+                raise TimeoutError(f"no hello message in {HANDSHAKE_TIMEOUT}s")
+            _, name, num_processes = conn.recv()
+        except Exception as e:  # wrong authkey, stalled or broken peer
+            conn.close()
+            if not self.closed:
+                logger.warning(f"⚠️ Worker agent connection refused: {e}")
+            return
+        with self.cond:
+            if self.closed:
+                conn.close()
+                return
+            agent_id = self.num_agents
+            self.num_agents += 1
+            self.agents[agent_id] = AgentConnection(conn, name, num_processes)
+            self.no_agents_since = None
+            logger.info(f"🔌 Worker agent '{name}' connected with {num_processes} processes ({self.total_processes()} in total).")
+            self.dispatch()
+        self.receive_loop(agent_id)
+
+    def total_processes(self) -> int:
+        return sum(agent.num_processes for agent in self.agents.values())
+
+    def dispatch(self):
+        """ Send pending tasks to agents with free processes, called with `cond` held. """
+        for agent_id, agent in list(self.agents.items()):
+            while self.pending and agent.load() < agent.num_processes:
+                task_id = self.pending.popleft()
+                if task_id not in self.tasks:  # finished by an earlier attempt
+                    continue
+                func, args, _, _ = self.tasks[task_id]
+                try:
+                    agent.conn.send(('task', task_id, func, args))
+                except Exception as e:
+                    self.pending.appendleft(task_id)
+                    self.drop_agent(agent_id, e)
+                    break
+                agent.in_flight[task_id] = agent.in_flight.get(task_id, 0) + 1
+                self.sent[task_id] = (agent_id, time.time())
+
+    def drop_agent(self, agent_id: int, error: Exception):
+        """ Queue the tasks of a lost agent again (those whose latest attempt ran on it), called with `cond` held. """
+        agent = self.agents.pop(agent_id, None)
+        if agent is None:
+            return
+        agent.conn.close()
+        if not self.agents:
+            self.no_agents_since = time.time()
+        lost = sorted(task_id for task_id in agent.in_flight if self.sent.get(task_id, (None,))[0] == agent_id)
+        for task_id in lost:
+            del self.sent[task_id]
+        self.pending.extendleft(reversed(lost))
+        if not self.closed:
+            logger.warning(f"⚠️ Worker agent '{agent.name}' disconnected ({error}), {len(lost)} tasks queued again.")
+
+    def receive_loop(self, agent_id: int):
+        agent = self.agents.get(agent_id)
+        while agent is not None:
+            try:
+                _, task_id, result, error = agent.conn.recv()
+            except Exception as e:
+                with self.cond:
+                    self.drop_agent(agent_id, e)
+                    self.dispatch()
+                return
+            with self.cond:
+                agent.in_flight[task_id] = agent.in_flight.get(task_id, 1) - 1
+                if agent.in_flight[task_id] <= 0:
+                    del agent.in_flight[task_id]
+                task = self.tasks.pop(task_id, None)  # None after terminate, or finished by another attempt
+                self.attempts.pop(task_id, None)
+                self.sent.pop(task_id, None)
+                self.dispatch()
+                self.cond.notify_all()
+            if task is None:
+                continue
+            _, _, callback, error_callback = task
+            if error is not None:
+                if error_callback is not None:
+                    error_callback(error)
+            elif callback is not None:
+                callback(result)
+
+    def timeout_loop(self):
+        """ Queue tasks without result after `task_timeout` again (multiprocessing.Pool never reports a crashed worker),
+        the first result of any attempt is used. Fail them after `max_attempts` timeouts, or when no agent has been
+        connected for `task_timeout`.
+        """
+        while True:
+            failed = []
+            with self.cond:
+                self.cond.wait(timeout=min(self.task_timeout, 5.0))
+                if self.closed:
+                    return
+                now = time.time()
+                for task_id, (agent_id, sent_time) in list(self.sent.items()):
+                    if now - sent_time < self.task_timeout:
+                        continue
+                    del self.sent[task_id]  # the attempt stays in the agent's in_flight until it returns
+                    name = self.agents[agent_id].name if agent_id in self.agents else agent_id
+                    self.attempts[task_id] = self.attempts.get(task_id, 0) + 1
+                    if self.attempts[task_id] >= self.max_attempts:
+                        failed.append((self.tasks.pop(task_id), TimeoutError(
+                            f"Remote task timed out {self.max_attempts} times after {self.task_timeout}s."
+                        )))
+                        self.attempts.pop(task_id)
+                        logger.warning(f"⚠️ Task {task_id} on agent '{name}' timed out {self.max_attempts} times, giving up.")
+                    else:
+                        self.pending.append(task_id)
+                        logger.warning(f"⚠️ Task {task_id} on agent '{name}' has no result after {self.task_timeout}s, queued again.")
+                if self.no_agents_since is not None and self.tasks and now - self.no_agents_since >= self.task_timeout:
+                    logger.warning(f"⚠️ No worker agent connected for {self.task_timeout}s, {len(self.tasks)} tasks failed.")
+                    error = ConnectionError(f"No worker agent connected for {self.task_timeout}s.")
+                    failed.extend((task, error) for task in self.tasks.values())
+                    self.tasks.clear()
+                    self.attempts.clear()
+                    self.pending.clear()
+                self.dispatch()
+                self.cond.notify_all()
+            for (_, _, _, error_callback), error in failed:
+                if error_callback is not None:
+                    error_callback(error)
+
+    def apply_async(self, func, args=(), callback=None, error_callback=None):
+        with self.cond:
+            task_id = self.num_tasks
+            self.num_tasks += 1
+            self.tasks[task_id] = (func, args, callback, error_callback)
+            self.pending.append(task_id)
+            self.dispatch()
+
+    def close(self):
+        """ Wait for the submitted tasks, warn while no agent is connected (without `task_timeout` they wait forever). """
+        warned = False
+        with self.cond:
+            while not self.cond.wait_for(lambda: not self.tasks, timeout=60.0):
+                if not self.agents and not warned:
+                    warned = True
+                    logger.warning(f"⚠️ Waiting for {len(self.tasks)} remote tasks, no worker agent is connected.")
+        self.terminate()
+
+    def terminate(self):
+        """ Disconnect the agents and wait for the next coordinator. Agents drop the tasks not started yet,
+        started ones run to the end and their results are dropped.
+        """
+        with self.cond:
+            self.closed = True
+            for agent_id in list(self.agents):
+                self.drop_agent(agent_id, None)
+            self.tasks.clear()
+            self.attempts.clear()
+            self.sent.clear()
+            self.pending.clear()
+            self.cond.notify_all()
+        self.listener.close()
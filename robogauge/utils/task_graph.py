@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+'''
+@File    : task_graph.py
+@Time    : 2026/10/17 22:31:14
+@Author  : wty-yy
+@Version : 1.0
+@Blog    : https://wty-yy.github.io/
+@Desc    : Episode task graph, pipelines are written as generators of episode task batches:
+- `drive` runs one generator, batch by batch (Multi/Level pipelines)
+- `TaskGraphScheduler` interleaves many generators on one worker pool (Stress pipeline), the next batch of a
+  generator (e.g. next bisection level) is ready as soon as its previous batch finished
+Ready tasks start longest-expected-first, costs are predicted from the duration history (`cost_model.py`).
+'''
+import time
+import heapq
+import queue
+import traceback
+from tqdm import tqdm
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generator, List
+
+from robogauge.utils.process_utils import Executor
+
+@dataclass
+class TaskBatch:
+    """ Episode tasks `func(data)` yielded by a pipeline generator, which receives the list of results
+    (completion order) back from `yield`.
+    """
+    func: Callable
+    data: List
+    on_result: Callable = None  # called in the main process with each result as soon as it arrives
+    desc: str = "Evaluation"
+    cost: Callable = None  # data -> expected wall time [s]
+    key: Callable = None  # data -> unique task key, finished tasks are journaled and skipped on resume
+    future_cost: float = 0.0  # expected wall time of the batches the generator yields after this one
+
+    def sorted_data(self) -> list:
+        """ Longest expected first. """
+        if self.cost is None:
+            return list(self.data)
+        return sorted(self.data, key=self.cost, reverse=True)
+
+    def add_result(self, results: list, result):
+        results.append(result)
+        if self.on_result is not None:
+            self.on_result(result)
+
+def run_batch(batch: TaskBatch, pool: Executor = None, console_output: bool = False) -> list:
+    """ Run a batch serially (pool is None) or on the pool. """
+    results = []
+    data_list = batch.sorted_data()
+    if pool is None:
+        iterator = (batch.func(data) for data in data_list)
+    else:
+        iterator = pool.imap_unordered(batch.func, data_list)
+    if console_output:
+        iterator = tqdm(iterator, total=len(batch.data), desc=batch.desc)
+    for result in iterator:
+        batch.add_result(results, result)
+    return results
+
+def drive(generator: Generator, pool: Executor = None, console_output: bool = False):
+    """ Run the batches of one pipeline generator in order, returns the generator return value. """
+    try:
+        batch = next(generator)
+        while True:
+            batch = generator.send(run_batch(batch, pool, console_output))
+    except StopIteration as e:
+        return e.value
+
+@dataclass
+class GraphNode:
+    generator: Generator
+    batch: TaskBatch = None
+    results: list = field(default_factory=list)
+    remaining: int = 0
+    batch_id: int = 0  # results of an abandoned batch (after a task error) are ignored
+
+class TaskGraphScheduler:
+    """ Run several pipeline generators side by side on one worker pool. Ready episode tasks wait in a queue
+    ordered by expected cost (longest first), one task per worker is in flight, so the pool stays busy until
+    the last task and the slow tasks don't start last.
+    """
+    def __init__(self, pool: Executor, logger=None, journal=None):
+        self.pool = pool
+        self.logger = logger
+        self.journal = journal  # `Journal` of finished tasks, replayed instead of run again
+        self.max_in_flight = pool.num_processes
+        self.done = queue.Queue()  # (token, name, batch_id, result, error) filled by the pool result thread, token is None for journaled results
+        self.nodes: Dict[str, GraphNode] = {}
+        self.ready = []  # heap of (-cost, token, name, batch_id, func, data)
+        self.in_flight = {}  # token -> (expected cost, start time)
+        self.task_keys = {}  # token -> journal key
+        self.num_tokens = 0
+        self.predicted_done, self.actual_done = 0.0, 0.0  # calibration of the cost model on this machine
+        self.returns = {}
+        self.errors = {}
+
+    def run(self, generators: Dict[str, Generator], on_finish: Callable = None, on_eta: Callable = None) -> dict:
+        """
+        Args:
+            generators: name -> pipeline generator
+            on_finish: called with (name, return value) when a generator finished
+            on_eta: called with the expected remaining wall time [s] after every finished task
+        Returns:
+            dict: name -> return value, failed generators are in `self.errors`
+        """
+        self.on_finish = on_finish
+        for name, generator in generators.items():
+            self.nodes[name] = GraphNode(generator)
+            self.advance(name, None)
+        self.submit_ready()
+        while self.nodes:
+            token, name, batch_id, result, error = self.done.get()
+            key = None
+            if token is not None:
+                cost, start = self.in_flight.pop(token)
+                self.predicted_done += cost
+                self.actual_done += time.time() - start
+                key = self.task_keys.pop(token, None)
+            self.handle(name, batch_id, result, error, key)
+            self.submit_ready()
+            if on_eta is not None:
+                on_eta(self.estimate_remaining())
+        return self.returns
+
+    def submit_ready(self):
+        while self.ready and len(self.in_flight) < self.max_in_flight:
+            neg_cost, token, name, batch_id, func, data = heapq.heappop(self.ready)
+            node = self.nodes.get(name)
+            if node is None or batch_id != node.batch_id:  # abandoned batch
+                self.task_keys.pop(token, None)
+                continue
+            self.in_flight[token] = (-neg_cost, time.time())
+            self.pool.apply_async(
+                func, (data,),
+                callback=lambda result, token=token, name=name, i=batch_id: self.done.put((token, name, i, result, None)),
+                error_callback=lambda e, token=token, name=name, i=batch_id: self.done.put((token, name, i, None, e)),
+            )
+
+    def estimate_remaining(self) -> float:
+        """ Expected remaining wall time: queued, in flight and future batch costs over the workers,
+        scaled by the actual / predicted duration ratio of the finished tasks.
+        """
+        now = time.time()
+        ratio = self.actual_done / self.predicted_done if self.predicted_done > 0 else 1.0
+        work = sum(-item[0] for item in self.ready)
+        work += sum(node.batch.future_cost for node in self.nodes.values() if node.batch is not None)
+        work = work * ratio + sum(max(cost * ratio - (now - start), 0.0) for cost, start in self.in_flight.values())
+        return work / self.max_in_flight
+
+    def handle(self, name: str, batch_id: int, result, error: Exception, key: str = None):
+        node = self.nodes.get(name)
+        if node is None or batch_id != node.batch_id:  # generator finished or batch abandoned
+            return
+        if error is not None:
+            self.advance(name, None, error)
+            return
+        if key is not None:
+            result = self.journal.append(key, result)
+        node.batch.add_result(node.results, result)
+        node.remaining -= 1
+        if node.remaining == 0:
+            self.advance(name, node.results)
+
+    def advance(self, name: str, results: list, error: Exception = None):
+        """ Send the results of the finished batch (or the task error) and queue the next batch. """
+        node = self.nodes[name]
+        try:
+            while True:
+                if error is not None:
+                    batch = node.generator.throw(error)
+                    error = None
+                elif results is None:
+                    batch = next(node.generator)
+                else:
+                    batch = node.generator.send(results)
+                if len(batch.data):
+                    break
+                results = []  # empty batch, continue directly
+        except StopIteration as e:
+            self.nodes.pop(name)
+            self.returns[name] = e.value
+            if self.on_finish is not None:
+                self.on_finish(name, e.value)
+            return
+        except Exception as e:
+            self.nodes.pop(name)
+            self.errors[name] = e
+            if self.logger is not None:
+                self.logger.error(f"❌ Task graph node '{name}' failed: {e}\n{traceback.format_exc()}")
+            return
+        node.batch, node.results, node.remaining = batch, [], len(batch.data)
+        node.batch_id += 1
+        for data in batch.data:
+            key = batch.key(data) if self.journal is not None and batch.key is not None else None
+            if key is not None and key in self.journal:
+                self.done.put((None, name, node.batch_id, self.journal.get(key), None))
+                continue
+            cost = batch.cost(data) if batch.cost is not None else 1.0
+            heapq.heappush(self.ready, (-cost, self.num_tokens, name, node.batch_id, batch.func, data))
+            if key is not None:
+                self.task_keys[self.num_tokens] = key
+            self.num_tokens += 1
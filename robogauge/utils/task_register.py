@@ -60,10 +60,18 @@ class TaskRegister():
     def update_args_to_cfg(self, sim_cfg, gauger_cfg, robot_cfg, args):
         if args.model_path is not None:
             robot_cfg.control.model_path = args.model_path
+        if getattr(args, 'inference_backend', None) is not None:
+            robot_cfg.control.inference_backend = args.inference_backend
+        if getattr(args, 'inference_threads', None) is not None:
+            robot_cfg.control.num_threads = args.inference_threads
         if args.headless is not None:
             sim_cfg.viewer.headless = args.headless
         if args.save_video is not None:
             sim_cfg.render.save_video = args.save_video
+        if getattr(args, 'record_trajectory', False):
+            sim_cfg.render.record_trajectory = True
+        if getattr(args, 'full_settle', False):
+            gauger_cfg.settle_snapshot = False
         if args.write_tensorboard is not None:
             gauger_cfg.write_tensorboard = args.write_tensorboard
         if args.friction is not None:
@@ -24,6 +24,9 @@ setup(
         "uvicorn",
         "pygame",
     ],
+    extras_require={
+        "onnx": ["onnx", "onnxruntime"],  # --inference-backend onnx
+    },
     python_requires=">=3.8",
     
     classifiers=[
@@ -0,0 +1,9 @@
+import pytest
+
+from robogauge.utils.logger import logger
+
+@pytest.fixture(autouse=True, scope='session')
+def session_logger(tmp_path_factory):
+    """ Global logger writing under a temporary dir, modules log through it. """
+    logger.create("tests", "pytest", console_output=False, parent_log_dir=tmp_path_factory.mktemp("logs"))
+    yield logger
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from robogauge.tasks.pipeline.base_pipeline import BasePipeline
+from robogauge.tasks.simulator.mujoco_config import MujocoConfig
+from robogauge.tasks.simulator.mujoco_simulator import MujocoSimulator
+from robogauge.utils.measure import PhaseTimer
+
+class MergedStepSim:
+    """ Native PD simulator recording the `step(nstep)` calls, truncation is checked after each of them. """
+    native_pd = True
+    sim_dt = 0.002
+    steps_to_next_truncation_check = MujocoSimulator.steps_to_next_truncation_check
+
+    def __init__(self, cfg: MujocoConfig):
+        self.cfg = cfg
+        self.n_step = 0
+        self.calls = []
+
+    def step(self, nstep: int):
+        self.calls.append(nstep)
+        self.n_step += nstep
+        return SimpleNamespace(n_step=self.n_step - 1)
+
+    def steps_to_next_frame(self) -> int:
+        return 1 << 30
+
+def run_control_interval(check_dt: float, frame_skip: int = 10) -> list:
+    cfg = MujocoConfig()
+    cfg.truncation.native_pd_check_dt = check_dt
+    pipeline = SimpleNamespace(
+        sim=MergedStepSim(cfg),
+        gauge=SimpleNamespace(steps_to_next_metric=lambda n_step, sim_dt: 1 << 30, update_metrics=lambda *args: None),
+        timer=PhaseTimer(),
+    )
+    BasePipeline.physics_steps(pipeline, frame_skip, goal_data=None)
+    return pipeline.sim.calls
+
+def test_native_pd_checks_truncation_once_per_merged_call_by_default():
+    assert run_control_interval(check_dt=0.0) == [10]
+
+def test_native_pd_splits_merged_steps_at_truncation_checks():
+    assert run_control_interval(check_dt=0.002) == [1] * 10  # every physics step, as the python PD path
+    assert run_control_interval(check_dt=0.008) == [1, 4, 4, 1]  # steps 0, 4, 8 are checked
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from robogauge.utils.cost_model import MAX_COUNT, TaskCostModel, make_cost_key
+
+def test_record_running_mean(tmp_path):
+    model = TaskCostModel(tmp_path / 'durations.json')
+    key = make_cost_key('go2.wave', 3, ['max_velocity'], 1.0)
+    model.record(key, 10.0)
+    model.record(key, 20.0)
+    assert model.predict(key) == pytest.approx(15.0)
+    for _ in range(10 * MAX_COUNT):
+        model.record(key, 40.0)
+    assert model.history[key]['count'] == MAX_COUNT
+    assert model.predict(key) == pytest.approx(40.0, abs=1e-2)  # old durations fade out
+
+def test_predict_fallbacks(tmp_path):
+    model = TaskCostModel(tmp_path / 'durations.json', default_cost=7.0)
+    assert model.predict(make_cost_key('go2.wave', 3, ['max_velocity'], 1.0)) == 7.0
+    model.record(make_cost_key('go2.wave', 3, ['max_velocity'], 1.0), 10.0)
+    model.record(make_cost_key('go2.wave', 5, ['max_velocity'], 1.0), 30.0)
+    model.record(make_cost_key('go2.wave', 5, ['target_pos'], 1.0), 50.0)
+    model.record(make_cost_key('go2.flat', None, None, 1.0), 100.0)
+    assert model.predict(make_cost_key('go2.wave', 3, ['max_velocity'], 2.0)) == 10.0  # same task/level/goals
+    assert model.predict(make_cost_key('go2.wave', 4, ['max_velocity'], 1.0)) == 20.0  # same task/goals
+    assert model.predict(make_cost_key('go2.wave', 4, ['joystick'], 1.0)) == 30.0  # same task
+    assert model.predict(make_cost_key('go2.stairs', 1, ['joystick'], 1.0)) == 47.5  # all keys
+    model.record(make_cost_key('go2.wave', 3, ['max_velocity'], 2.0), 12.0)  # clears the fallback cache
+    assert model.predict(make_cost_key('go2.wave', 3, ['max_velocity'], 0.5)) == 11.0
+
+def test_save_load_merges_other_runs(tmp_path):
+    path = tmp_path / 'cache' / 'durations.json'
+    key, other_key = make_cost_key('go2.wave', 3, None, 1.0), make_cost_key('go2.flat', None, None, 1.0)
+    first, second = TaskCostModel(path), TaskCostModel(path)
+    first.record(key, 10.0)
+    first.save()
+    second.record(key, 30.0)
+    second.record(other_key, 5.0)
+    second.save()
+    assert second.predict(key) == pytest.approx(20.0)  # merged with the durations saved by `first`
+    loaded = TaskCostModel(path)
+    assert loaded.predict(key) == pytest.approx(20.0)
+    assert loaded.predict(other_key) == pytest.approx(5.0)
+    assert json.loads(path.read_text())[key]['count'] == 2
+    assert list(path.parent.iterdir()) == [path]  # no temporary file left
+
+def test_load_broken_file(tmp_path):
+    path = tmp_path / 'durations.json'
+    path.write_text('{"truncated')
+    model = TaskCostModel(path, default_cost=3.0)
+    assert model.history == {}
+    assert model.predict(make_cost_key('go2.wave', 3, None, 1.0)) == 3.0
@@ -0,0 +1,64 @@
+import time
+
+from robogauge.utils.job_store import JobStore, ResponseStatus
+
+def request(experiment: str, step: int) -> dict:
+    return {'model_path': f'/models/{experiment}_{step}.pt', 'step': step, 'task_name': 'go2', 'experiment_name': experiment}
+
+def status_log(store: JobStore, task_id: str) -> list:
+    rows = store.connection().execute("SELECT status FROM status_log WHERE task_id = ? ORDER BY rowid", (task_id,)).fetchall()
+    return [row['status'] for row in rows]
+
+def test_status_transitions_and_log(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite')
+    store.add_task('t0', request('A', 100), ResponseStatus.PENDING)
+    assert store.get('t0') == {'status': ResponseStatus.PENDING}
+    store.update('t0', {'status': ResponseStatus.PROCESSING}, job_key='key0')
+    store.update('t0', {'status': ResponseStatus.PROCESSING, 'progress': {'done': 1}})  # same status isn't logged again
+    store.update('t0', {'status': ResponseStatus.ERROR, 'error': 'boom'})
+    assert status_log(store, 't0') == [ResponseStatus.PENDING, ResponseStatus.PROCESSING, ResponseStatus.ERROR]
+    assert store.get('t0') == {'status': ResponseStatus.ERROR, 'error': 'boom'}
+    row = store.query()[0]
+    assert row['job_key'] == 'key0'
+    assert row['submitted_at'] <= row['started_at'] <= row['finished_at']
+    store.update('unknown', {'status': ResponseStatus.FINISHED})  # ignored
+    assert store.get('unknown') is None
+
+def test_results_joined_by_job_key(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite')
+    results = {'go2': {'mean': 0.5}}
+    for task_id in ['t0', 't1']:
+        store.add_task(task_id, request('A', 100), ResponseStatus.PENDING)
+    store.put_result('key0', results)
+    for task_id in ['t0', 't1']:
+        store.update(task_id, {'status': ResponseStatus.FINISHED, 'step': 100, 'results': {'dropped': True}}, job_key='key0')
+    for task_id in ['t0', 't1']:
+        assert store.get(task_id) == {'status': ResponseStatus.FINISHED, 'step': 100, 'results': results}
+    stored = store.connection().execute("SELECT response FROM tasks WHERE task_id = 't0'").fetchone()['response']
+    assert 'results' not in stored  # one copy per job key
+    assert store.get_result('key0') == results and store.get_result('key1') is None
+
+def test_query_filters(tmp_path):
+    store = JobStore(tmp_path / 'jobs.sqlite')
+    for i, (experiment, step) in enumerate([('A', 100), ('A', 200), ('B', 100)]):
+        store.add_task(f't{i}', request(experiment, step), ResponseStatus.PENDING)
+        time.sleep(0.01)
+    store.update('t1', {'status': ResponseStatus.FINISHED}, job_key='key1')
+    assert [row['task_id'] for row in store.query()] == ['t2', 't1', 't0']  # newest first
+    assert [row['task_id'] for row in store.query(experiment_name='A')] == ['t1', 't0']
+    assert [row['task_id'] for row in store.query(step=100)] == ['t2', 't0']
+    assert [row['task_id'] for row in store.query(experiment_name='A', status=ResponseStatus.PENDING)] == ['t0']
+    assert [row['task_id'] for row in store.query(limit=1)] == ['t2']
+    assert store.query(experiment_name='C') == []
+
+def test_unfinished_after_restart(tmp_path):
+    path = tmp_path / 'jobs.sqlite'
+    store = JobStore(path)
+    for i, status in enumerate([ResponseStatus.PENDING, ResponseStatus.PROCESSING, ResponseStatus.FINISHED, ResponseStatus.SUPERSEDED]):
+        store.add_task(f't{i}', request('A', 100 * (i + 1)), ResponseStatus.PENDING)
+        store.update(f't{i}', {'status': status})
+        time.sleep(0.01)
+    del store  # server stopped, a new process opens the same file
+    restarted = JobStore(path)
+    assert restarted.unfinished() == [('t0', request('A', 100)), ('t1', request('A', 200))]
+    assert restarted.get('t2') == {'status': ResponseStatus.FINISHED}
@@ -0,0 +1,102 @@
+import os
+import json
+import argparse
+
+import numpy as np
+import pytest
+
+from robogauge.utils import journal as journal_module
+from robogauge.utils.journal import Journal, from_json, make_fingerprint, to_json
+from robogauge.utils.measure import Stat
+
+class sim_cfg:
+    class noise:
+        enabled = True
+    class render:
+        save_video = False
+
+class robot_cfg:
+    class control:
+        model_path = 'policy.pt'
+        inference_backend = 'torchscript'
+
+def fingerprint(tmp_path, num_worlds=1):
+    model_path = tmp_path / 'policy.pt'
+    if not model_path.exists():
+        model_path.write_bytes(b'policy weights')
+    return make_fingerprint(argparse.Namespace(num_worlds=num_worlds), [str(model_path)], [(sim_cfg(), robot_cfg())])
+
+def test_fingerprint_covers_results_config(tmp_path, monkeypatch):
+    base = fingerprint(tmp_path)
+    assert fingerprint(tmp_path) == base
+    monkeypatch.setattr(sim_cfg.render, 'save_video', True)  # no effect on results
+    assert fingerprint(tmp_path) == base
+    monkeypatch.setattr(sim_cfg.noise, 'enabled', False)
+    assert fingerprint(tmp_path) != base
+    monkeypatch.undo()
+    monkeypatch.setattr(robot_cfg.control, 'inference_backend', 'onnx')
+    assert fingerprint(tmp_path) != base
+    monkeypatch.undo()
+    assert fingerprint(tmp_path, num_worlds=4) != base
+    (tmp_path / 'policy.pt').write_bytes(b'other weights')
+    assert fingerprint(tmp_path) != base
+
+def test_resume_with_other_fingerprint_is_refused(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path, 'aaaa')
+    journal.append('task', {'success': True})
+    journal.close()
+    with pytest.raises(ValueError, match='fingerprint'):
+        Journal(path, 'bbbb')
+    journal = Journal(path, 'aaaa')
+    assert journal.get('task') == {'success': True}
+    journal.close()
+
+def test_stat_round_trip():
+    results = {'summary': {'lin_vel_err': {'mean@50': Stat(0.25, np.float64(0.5))}}, 'data': (1, 2.0), 'level': np.int64(3)}
+    restored = json.loads(json.dumps(to_json(results)), object_hook=from_json)
+    assert restored == {'summary': {'lin_vel_err': {'mean@50': Stat(0.25, 0.5)}}, 'data': [1, 2.0], 'level': 3}
+    assert isinstance(restored['summary']['lin_vel_err']['mean@50'], Stat)
+
+def test_append_fsyncs_and_replays(tmp_path, monkeypatch):
+    synced, fsync = [], os.fsync
+    monkeypatch.setattr(journal_module.os, 'fsync', lambda fd: synced.append(fd) or fsync(fd))
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path, 'fp')
+    assert 'a' not in journal
+    result = journal.append('a', {'stat': Stat(1.0, 0.0), 'data': (0, 1.0)})
+    assert result == {'stat': Stat(1.0, 0.0), 'data': [0, 1.0]}  # as read back on resume
+    journal.append('b', [Stat(2.0, 0.1)])
+    assert len(synced) == 2
+    assert len(path.read_text().splitlines()) == 2  # flushed before close
+    journal.close()
+
+    with open(path, 'a') as file:
+        file.write('{"key": "c", "finger')  # torn last line of a killed run
+    journal = Journal(path, 'fp')
+    assert 'a' in journal and 'b' in journal and 'c' not in journal
+    assert journal.get('a') == result
+    assert journal.get('b') == [Stat(2.0, 0.1)] and isinstance(journal.get('b')[0], Stat)
+    journal.append('d', 2)  # first task finished after the resume
+    journal.close()
+
+    journal = Journal(path, 'fp')
+    assert sorted(journal.entries) == ['a', 'b', 'd'] and journal.get('d') == 2
+    journal.close()
+    assert len(path.read_text().splitlines()) == 3
+
+def test_corrupt_line_before_the_end_raises(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path, 'fp')
+    journal.append('a', 1)
+    journal.close()
+    with open(path, 'a') as file:
+        file.write('not json\n')
+    journal = Journal(path, 'fp')  # torn last line is cut off
+    journal.append('b', 2)
+    journal.close()
+    assert len(path.read_text().splitlines()) == 2
+    with open(path, 'r+') as file:
+        file.write('xxxx')  # overwrite the start of the first record
+    with pytest.raises(ValueError, match='corrupt'):
+        Journal(path, 'fp')
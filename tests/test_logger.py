@@ -0,0 +1,28 @@
+import logging
+
+from robogauge.utils.logger import Logger
+
+def test_close_releases_handlers_and_registry(tmp_path):
+    loggers = [Logger() for _ in range(3)]
+    for i, run_logger in enumerate(loggers):
+        run_logger.create("exp", f"run{i}", console_output=False, parent_log_dir=tmp_path)
+    names = [run_logger.logger.name for run_logger in loggers]
+    assert len(set(names)) == 3 and all(name in logging.Logger.manager.loggerDict for name in names)
+    loggers[0].info("hello")
+    file_handler = loggers[0].logger.handlers[0]
+    for run_logger in loggers:
+        run_logger.close()
+    assert file_handler.stream is None  # log file closed
+    assert all(not run_logger.logger.handlers for run_logger in loggers)
+    assert not any(name in logging.Logger.manager.loggerDict for name in names)
+    assert "hello" in (loggers[0].log_dir / "stdout.log").read_text()
+
+def test_create_again_closes_previous_run(tmp_path):
+    run_logger = Logger()
+    run_logger.create("exp0", "run0", console_output=False, parent_log_dir=tmp_path)
+    first, file_handler = run_logger.logger, run_logger.logger.handlers[0]
+    run_logger.create("exp1", "run1", console_output=False, parent_log_dir=tmp_path)  # next task of a warm worker
+    assert file_handler.stream is None and not first.handlers
+    assert first.name not in logging.Logger.manager.loggerDict
+    assert run_logger.logger.name in logging.Logger.manager.loggerDict
+    run_logger.close()
@@ -0,0 +1,58 @@
+import mujoco
+
+from robogauge.tasks.simulator.mujoco_config import MujocoConfig
+from robogauge.tasks.simulator.mujoco_simulator import MujocoSimulator
+from robogauge.tasks.simulator.batched_mujoco_simulator import BatchedMujocoSimulator
+
+# Unnamed geoms as in resources/robots/go2/go2.xml and the terrain xmls
+ROBOT_ON_TERRAIN_XML = """
+<mujoco>
+  <worldbody>
+    <geom type="box" size="1 1 0.1" pos="0 0 {terrain_z}"/>
+    <body name="go2/base" pos="0 0 0.5">
+      <freejoint/>
+      <geom type="box" size="0.2 0.1 0.1"/>
+      <body name="go2/FL_thigh" pos="0.1 0 0">
+        <joint type="hinge"/>
+        <geom type="box" size="0.1 0.05 0.05"/>
+      </body>
+      <body name="go2/FR_thigh" pos="0.15 0 0">
+        <joint type="hinge"/>
+        <geom type="box" size="0.1 0.05 0.05"/>
+      </body>
+    </body>
+  </worldbody>
+</mujoco>
+"""
+
+def make_simulator(terrain_z: float) -> MujocoSimulator:
+    sim = MujocoSimulator(MujocoConfig())
+    sim.mj_model = mujoco.MjModel.from_xml_string(ROBOT_ON_TERRAIN_XML.format(terrain_z=terrain_z))
+    sim.mj_data = mujoco.MjData(sim.mj_model)
+    sim.preload_geom_masks()
+    mujoco.mj_forward(sim.mj_model, sim.mj_data)
+    return sim
+
+def test_unnamed_robot_geom_in_unnamed_terrain_geom_is_penetration():
+    sim = make_simulator(terrain_z=0.35)  # terrain top at 0.45, robot base bottom at 0.4
+    assert sim.cfg.truncation.skip_self_penetration
+    assert all(name == '' for name in sim.geom_names)
+    is_penetrated, _, _, dist = sim.check_penetration(sim.cfg.truncation.penetration_threshold)
+    assert is_penetrated
+    assert dist < sim.cfg.truncation.penetration_threshold
+
+def test_unnamed_self_contact_is_skipped(monkeypatch):
+    sim = make_simulator(terrain_z=-1.0)  # only the overlapping thighs are in contact
+    assert sim.mj_data.ncon > 0
+    assert sim.mj_data.contact.dist.min() < sim.cfg.truncation.penetration_threshold
+    assert not sim.check_penetration(sim.cfg.truncation.penetration_threshold)[0]
+    monkeypatch.setattr(sim.cfg.truncation, 'skip_self_penetration', False)
+    assert sim.check_penetration(sim.cfg.truncation.penetration_threshold)[0]
+
+def test_batched_simulator_leaves_caller_config_unchanged():
+    cfg = MujocoConfig()
+    cfg.viewer.headless = False
+    cfg.render.save_video = True
+    batched = BatchedMujocoSimulator(cfg, num_worlds=2)
+    assert batched.cfg.viewer.headless and not batched.cfg.render.save_video
+    assert not cfg.viewer.headless and cfg.render.save_video
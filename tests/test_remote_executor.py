@@ -0,0 +1,177 @@
+import time
+import queue
+import socket
+import threading
+from multiprocessing.connection import Client, Listener
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from robogauge.scripts.worker_agent import serve
+from robogauge.utils.remote_executor import RemoteExecutor, get_authkey
+
+AUTHKEY = b'test-secret'
+release = threading.Event()
+
+def square(x):
+    return x * x
+
+ran = []
+
+def record_and_wait(x):
+    ran.append(x)
+    release.wait()
+
+def wait_and_square(x):
+    release.wait()
+    return x * x
+
+class UnpicklableError(Exception):
+    def __init__(self):
+        super().__init__("holds a lock")
+        self.lock = threading.Lock()
+
+def fail(kind):
+    if kind == 'value':
+        raise ValueError("bad value")
+    raise UnpicklableError()
+
+class Agent:
+    """ Worker agent of `worker_agent.py` on a thread pool. """
+    def __init__(self, address, num_processes: int = 2, pool=None):
+        self.pool = pool or ThreadPool(num_processes)
+        self.conn = Client(address, authkey=AUTHKEY)
+        self.conn.send(('hello', f'agent-{id(self)}', num_processes))
+        self.thread = threading.Thread(target=serve, args=(self.conn, self.pool, threading.Semaphore(num_processes)), daemon=True)
+        self.thread.start()
+
+    def disconnect(self):
+        """ Shut the socket down, as a crashed host """
+        sock = socket.fromfd(self.conn.fileno(), socket.AF_INET, socket.SOCK_STREAM)
+        sock.shutdown(socket.SHUT_RDWR)
+        sock.close()
+        self.thread.join(timeout=5)
+
+class DropFirstTaskPool(ThreadPool):
+    """ Loses the first task without calling a callback, as a crashed multiprocessing.Pool worker """
+    dropped = False
+    def apply_async(self, func, args=(), kwds={}, callback=None, error_callback=None):
+        if not self.dropped:
+            self.dropped = True
+            return
+        return super().apply_async(func, args, kwds, callback, error_callback)
+
+@pytest.fixture
+def executor():
+    executor = RemoteExecutor(4, ('127.0.0.1', 0), authkey=AUTHKEY, task_timeout=0.5)
+    yield executor
+    executor.terminate()
+
+def submit(executor, func, args_list):
+    results = queue.Queue()
+    for args in args_list:
+        executor.apply_async(
+            func, args,
+            callback=lambda result: results.put(('result', result)),
+            error_callback=lambda e: results.put(('error', e)),
+        )
+    return [results.get(timeout=10) for _ in args_list]
+
+def test_authkey_is_required(monkeypatch):
+    monkeypatch.delenv('ROBOGAUGE_AUTHKEY', raising=False)
+    with pytest.raises(ValueError):
+        get_authkey()
+    monkeypatch.setenv('ROBOGAUGE_AUTHKEY', 'secret')
+    assert get_authkey() == b'secret'
+
+def test_results_of_two_agents(executor):
+    Agent(executor.address)
+    Agent(executor.address)
+    results = submit(executor, square, [(i,) for i in range(20)])
+    assert sorted(results) == [('result', i * i) for i in range(20)]
+    executor.close()
+    assert not executor.tasks
+
+def test_errors_are_delivered(executor):
+    Agent(executor.address)
+    (kind1, error1), (kind2, error2) = sorted(submit(executor, fail, [('value',), ('unpicklable',)]), key=lambda r: type(r[1]).__name__)
+    assert (kind1, kind2) == ('error', 'error')
+    assert isinstance(error2, ValueError) and str(error2) == "bad value"
+    assert isinstance(error1, RuntimeError) and "UnpicklableError" in str(error1)
+
+def test_tasks_of_disconnected_agent_are_queued_again(executor):
+    release.clear()
+    agent = Agent(executor.address, num_processes=4)
+    results = queue.Queue()
+    for i in range(4):
+        executor.apply_async(wait_and_square, (i,), callback=results.put)
+    with executor.cond:
+        assert executor.cond.wait_for(lambda: sum(a.load() for a in executor.agents.values()) == 4, timeout=5)
+    agent.disconnect()
+    with executor.cond:
+        assert executor.cond.wait_for(lambda: not executor.agents, timeout=5)
+        assert len(executor.pending) == 4
+    release.set()
+    Agent(executor.address)
+    assert sorted(results.get(timeout=10) for _ in range(4)) == [0, 1, 4, 9]
+    executor.close()
+    assert results.empty()  # the lost agent's results are not delivered twice
+
+def test_lost_task_is_queued_again_after_timeout(executor):
+    Agent(executor.address, pool=DropFirstTaskPool(2))
+    assert submit(executor, square, [(3,)]) == [('result', 9)]
+
+def test_wrong_authkey_does_not_block_other_agents(executor):
+    stalled = socket.create_connection(executor.address)  # never answers the challenge
+    with pytest.raises(Exception):
+        Client(executor.address, authkey=b'wrong')
+    Agent(executor.address)
+    assert submit(executor, square, [(2,)]) == [('result', 4)]
+    stalled.close()
+
+def agent_loads(executor):
+    return [agent.load() for agent in executor.agents.values()]
+
+def test_timed_out_attempt_keeps_its_process_busy(executor):
+    release.clear()
+    agent = Agent(executor.address, num_processes=1)
+    results = queue.Queue()
+    executor.apply_async(wait_and_square, (3,), callback=results.put)
+    with executor.cond:  # timed out, queued again, but the agent's only process still runs the first attempt
+        assert executor.cond.wait_for(lambda: executor.attempts.get(0) == 1, timeout=5)
+        assert list(executor.pending) == [0] and agent_loads(executor) == [1]
+    Agent(executor.address, num_processes=1)
+    with executor.cond:
+        assert executor.cond.wait_for(lambda: agent_loads(executor) == [1, 1], timeout=5)
+    release.set()
+    assert results.get(timeout=10) == 9
+    with executor.cond:  # both attempts returned
+        assert executor.cond.wait_for(lambda: agent_loads(executor) == [0, 0], timeout=5)
+
+def test_tasks_fail_without_agents(executor):
+    (kind, error), = submit(executor, square, [(2,)])
+    assert kind == 'error' and isinstance(error, ConnectionError)
+    executor.close()  # nothing left to wait for
+
+def test_agent_drops_tasks_not_started_on_disconnect():
+    release.clear()
+    listener = Listener(('127.0.0.1', 0))
+    conn = Client(listener.address)
+    coordinator = listener.accept()
+    ran.clear()
+    pool, slots = ThreadPool(1), threading.Semaphore(1)
+    thread = threading.Thread(target=serve, args=(conn, pool, slots), daemon=True)
+    thread.start()
+    coordinator.send(('task', 0, record_and_wait, (0,)))
+    deadline = time.time() + 5
+    while not ran and time.time() < deadline:
+        time.sleep(0.01)
+    coordinator.send(('task', 1, record_and_wait, (1,)))  # waits for the only process
+    coordinator.close()
+    thread.join(timeout=5)
+    release.set()
+    slots.acquire(timeout=5)  # started task finished
+    pool.close()
+    pool.join()
+    assert ran == [0]
+    listener.close()
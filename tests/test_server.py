@@ -0,0 +1,93 @@
+from dataclasses import asdict
+
+from robogauge.scripts.server import EvalTaskData, JobManager
+from robogauge.utils.job_store import JobStore, ResponseStatus, make_job_key
+
+def make_manager(tmp_path):
+    """ JobManager without running slots, submissions stay pending. """
+    return JobManager(JobStore(tmp_path / 'jobs.sqlite'), shared_pool=None, num_processes=1, max_jobs=0)
+
+def submission(tmp_path, experiment: str, step: int, checkpoint: str = None, **kwargs) -> EvalTaskData:
+    model_path = tmp_path / f"{checkpoint or f'{experiment}_{step}'}.pt"
+    if not model_path.exists():
+        model_path.write_bytes(model_path.name.encode())
+    return EvalTaskData(str(model_path), step, 'go2', experiment, **kwargs)
+
+def submit(manager: JobManager, task_id: str, task_data: EvalTaskData):
+    """ Same order as the API process: store row first, then the main process picks it up. """
+    manager.store.add_task(task_id, asdict(task_data), ResponseStatus.PENDING)
+    manager.submit(task_id, task_data)
+
+def status(manager: JobManager, task_id: str) -> str:
+    return manager.store.get(task_id)['status']
+
+def test_coalesce_latest_only_supersedes_own_experiment(tmp_path):
+    manager = make_manager(tmp_path)
+    submit(manager, 'a100', submission(tmp_path, 'A', 100, checkpoint='shared'))
+    submit(manager, 'b100', submission(tmp_path, 'B', 100, checkpoint='shared'))  # same checkpoint, attaches to A's job
+    assert len(manager.pending) == 1
+    submit(manager, 'a200', submission(tmp_path, 'A', 200, coalesce='latest'))
+    assert status(manager, 'a100') == ResponseStatus.SUPERSEDED
+    assert status(manager, 'b100') == ResponseStatus.PENDING
+    assert status(manager, 'a200') == ResponseStatus.PENDING
+    shared_job = next(job for job in manager.pending if 'b100' in job.tasks)
+    assert list(shared_job.tasks) == ['b100'] and shared_job.task_data.experiment_name == 'B'
+    assert len(manager.pending) == 2
+
+def test_coalesce_every_k_drops_whole_jobs(tmp_path):
+    manager = make_manager(tmp_path)
+    for step in [100, 200, 300, 400]:
+        submit(manager, f'a{step}', submission(tmp_path, 'A', step))
+    submit(manager, 'b100', submission(tmp_path, 'B', 100))
+    submit(manager, 'a500', submission(tmp_path, 'A', 500, coalesce='every_k', coalesce_k=2))
+    statuses = {task_id: status(manager, task_id) for task_id in ['a100', 'a200', 'a300', 'a400', 'a500', 'b100']}
+    assert statuses == {
+        'a100': ResponseStatus.PENDING, 'a200': ResponseStatus.SUPERSEDED, 'a300': ResponseStatus.PENDING,
+        'a400': ResponseStatus.SUPERSEDED, 'a500': ResponseStatus.PENDING, 'b100': ResponseStatus.PENDING,
+    }
+    assert sorted(job.task_data.step for job in manager.pending) == [100, 100, 300, 500]
+    assert len(manager.jobs) == 4
+
+def test_job_key_includes_code_version(tmp_path, monkeypatch):
+    import robogauge.utils.job_store as job_store
+    model_path = tmp_path / 'model.pt'
+    model_path.write_bytes(b'weights')
+    key = make_job_key(str(model_path), ['--seeds', '0'])
+    assert make_job_key(str(model_path), ['--seeds', '0']) == key
+    monkeypatch.setattr(job_store, 'code_version', lambda: 'other')
+    assert make_job_key(str(model_path), ['--seeds', '0']) != key
+
+def test_api_reads_store(tmp_path, monkeypatch):
+    import asyncio
+    import multiprocessing
+    import robogauge.scripts.server as server
+    apps = []
+    monkeypatch.setattr(server.uvicorn, 'run', lambda app, **kwargs: apps.append(app))
+    server.run_api_server(multiprocessing.Queue(), str(tmp_path / 'jobs.sqlite'))
+    endpoints = {route.path: route.endpoint for route in apps[0].routes if hasattr(route, 'endpoint')}
+    request = server.EvalRequest(model_path='m.pt', step=100, task_name='go2', experiment_name='A')
+    task_id = endpoints['/submit_eval'](request)['task_id']
+    get_result = endpoints['/get_result/{task_id}']
+    assert asyncio.run(get_result(task_id)) == {'status': ResponseStatus.PENDING}
+    JobStore(tmp_path / 'jobs.sqlite').update(task_id, {'status': ResponseStatus.ERROR, 'error': 'boom'})
+    assert asyncio.run(get_result(task_id, wait=1)) == {'status': ResponseStatus.ERROR, 'error': 'boom'}
+    assert asyncio.run(get_result('unknown')) == {'status': ResponseStatus.NOT_FOUND}
+
+    async def stream_events():
+        response = await endpoints['/stream/{task_id}'](task_id)
+        return [event async for event in response.body_iterator]
+    assert asyncio.run(stream_events())[0].startswith('event: result')
+
+def test_result_cache_is_read_under_the_lock(tmp_path):
+    """ `run_job` stores the result, then drops the job under the lock, a submission in between must see one of them. """
+    manager = make_manager(tmp_path)
+    submit(manager, 'a100', submission(tmp_path, 'A', 100))
+    job = manager.pending.pop()
+    manager.jobs.pop(job.key)
+    manager.store.put_result(job.key, {'go2': 1.0})
+    get_result, locked = manager.store.get_result, []
+    manager.store.get_result = lambda key: locked.append(manager.lock.locked()) or get_result(key)
+    submit(manager, 'b100', submission(tmp_path, 'B', 100, checkpoint='A_100'))
+    assert locked == [True]
+    assert manager.store.get('b100') == {'status': ResponseStatus.FINISHED, 'step': 100, 'cached': True, 'results': {'go2': 1.0}}
+    assert not manager.pending and not manager.jobs
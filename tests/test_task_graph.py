@@ -0,0 +1,121 @@
+import threading
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from robogauge.utils.journal import Journal
+from robogauge.utils.measure import Stat
+from robogauge.utils.process_utils import Executor
+from robogauge.utils.task_graph import TaskBatch, TaskGraphScheduler, drive
+
+class ThreadExecutor(Executor):
+    def __init__(self, num_processes: int):
+        self.num_processes = num_processes
+        self.pool = ThreadPool(num_processes)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def apply_async(self, func, args=(), callback=None, error_callback=None):
+        with self.lock:
+            self.calls.append(args[0])
+        return self.pool.apply_async(func, args, callback=callback, error_callback=error_callback)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+
+def square(x):
+    return x * x
+
+def fail_on_negative(x):
+    if x < 0:
+        raise ValueError(f"negative {x}")
+    return x
+
+def two_batches(data, cost=None):
+    """ Yields `data`, then the squares of its results, returns the sum. """
+    first = yield TaskBatch(square, data, cost=cost, key=lambda x: f"first|{x}")
+    second = yield TaskBatch(square, sorted(first), key=lambda x: f"second|{x}")
+    return sum(second)
+
+def test_drive_serial_longest_first():
+    calls = []
+    def record(x):
+        calls.append(x)
+        return x
+    def generator():
+        results = yield TaskBatch(record, [1, 3, 2], cost=lambda x: x)
+        return results
+    assert drive(generator()) == [3, 2, 1]
+    assert calls == [3, 2, 1]
+
+def test_drive_on_pool():
+    with ThreadExecutor(2) as pool:
+        assert drive(two_batches([1, 2, 3]), pool) == 1 + 16 + 81
+
+def test_drive_raises_task_error():
+    def generator():
+        yield TaskBatch(fail_on_negative, [1, -1])
+    with pytest.raises(ValueError):
+        drive(generator())
+
+def test_scheduler_starts_longest_expected_first():
+    with ThreadExecutor(1) as pool:
+        scheduler = TaskGraphScheduler(pool)
+        returns = scheduler.run({
+            'a': two_batches([1, 5], cost=lambda x: x),
+            'b': two_batches([3], cost=lambda x: x),
+        })
+    assert returns == {'a': 1 + 625, 'b': 81}
+    assert pool.calls[:3] == [5, 3, 1]  # first batches of both generators, ordered by cost
+
+def test_scheduler_drops_failed_generator():
+    finished = []
+    def failing():
+        yield TaskBatch(fail_on_negative, [1, -1, 2])
+        return 'unreachable'
+    def recovering():
+        try:
+            yield TaskBatch(fail_on_negative, [-2, 3])
+        except ValueError:
+            results = yield TaskBatch(fail_on_negative, [4])
+            return results
+    with ThreadExecutor(2) as pool:
+        scheduler = TaskGraphScheduler(pool)
+        returns = scheduler.run({
+            'failing': failing(), 'recovering': recovering(), 'ok': two_batches([2]),
+        }, on_finish=lambda name, value: finished.append(name))
+    assert returns == {'recovering': [4], 'ok': 16}
+    assert isinstance(scheduler.errors['failing'], ValueError)
+    assert sorted(finished) == ['ok', 'recovering']
+    assert not scheduler.nodes and not scheduler.in_flight
+
+def test_scheduler_replays_journal(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path, 'fp')
+    with ThreadExecutor(2) as pool:
+        first = TaskGraphScheduler(pool, journal=journal).run({'a': two_batches([1, 2])})
+    journal.close()
+    journal = Journal(path, 'fp')
+    assert set(journal.entries) == {'first|1', 'first|2', 'second|1', 'second|4'}
+    with ThreadExecutor(2) as pool:
+        second = TaskGraphScheduler(pool, journal=journal).run({'a': two_batches([1, 2, 3])})
+    journal.close()
+    assert first == {'a': 1 + 16}
+    assert second == {'a': 1 + 16 + 81}
+    assert sorted(pool.calls) == [3, 9]  # only the tasks missing from the journal ran
+
+def test_journaled_results_look_like_resumed_ones(tmp_path):
+    """ Fresh results are read back from the journal, tuples become lists and Stats stay Stats. """
+    def generator():
+        results = yield TaskBatch(lambda x: {'pair': (x, x), 'stat': Stat(x, 0.5)}, [1], key=lambda x: f"k{x}")
+        return results
+    journal = Journal(tmp_path / 'journal.jsonl', 'fp')
+    with ThreadExecutor(1) as pool:
+        returns = TaskGraphScheduler(pool, journal=journal).run({'a': generator()})
+    journal.close()
+    assert returns == {'a': [{'pair': [1, 1], 'stat': Stat(1, 0.5)}]}
+    assert isinstance(returns['a'][0]['stat'], Stat)